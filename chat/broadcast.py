@@ -0,0 +1,62 @@
+import asyncio
+import logging
+from collections import defaultdict
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from chat.history import get_history
+from chat.protocol import messages_frame
+
+
+logger = logging.getLogger(__name__)
+
+
+def chat_room(collaboration_id):
+    return f'chat_{collaboration_id}'
+
+
+def student_group(student_id):
+    return f'student_{student_id}'
+
+
+def send_to_student(student_id, event):
+    """
+    Sends a channel layer event to every socket of a student from
+    synchronous code such as model signals.
+    """
+    try:
+        async_to_sync(get_channel_layer().group_send)(student_group(student_id), event)
+    except Exception:
+        logger.exception('Could not send %s to student %s', event['type'], student_id)
+
+
+class RoomBroadcaster:
+    """
+    Coalesces the messages published to a room within `window` seconds
+    into a single group_send, so a burst reaches every socket in the room
+    as one frame that is encoded only once. Every burst is also appended
+    to the room's recent history.
+    """
+
+    def __init__(self, window=0.02):
+        self.window = window
+        self._pending = defaultdict(list)
+        self._tasks = {}
+
+    def publish(self, channel_layer, room, payload):
+        self._pending[room].append(payload)
+        if room not in self._tasks:
+            self._tasks[room] = asyncio.ensure_future(self._send_later(channel_layer, room))
+
+    async def _send_later(self, channel_layer, room):
+        await asyncio.sleep(self.window)
+        payloads = self._pending.pop(room)
+        del self._tasks[room]
+
+        await get_history().append(room, payloads)
+        await channel_layer.group_send(room, {
+            'type': 'chat.frame',
+            'text': messages_frame(payloads),
+        })
+
+
+broadcaster = RoomBroadcaster()
@@ -0,0 +1,110 @@
+import asyncio
+import logging
+from channels.db import database_sync_to_async
+from django.db import IntegrityError, transaction
+from chat.models import Message
+from core.models import Collaboration
+
+
+logger = logging.getLogger(__name__)
+
+MAX_RETRY_DELAY = 30
+
+
+class MessageBuffer:
+    """
+    Write-behind buffer for chat messages.
+
+    Messages are broadcast as soon as they arrive and persisted here with
+    bulk_create, either when `batch_size` of them are waiting or
+    `flush_interval` seconds after the first one was buffered. Consumers
+    flush it when their socket closes and the server when it shuts down.
+
+    A batch that fails to persist goes back to the head of the buffer and
+    is retried with exponential backoff, up to `max_retry_delay` seconds
+    apart, until the database takes it.
+    """
+
+    def __init__(self, batch_size=50, flush_interval=0.2, max_retry_delay=MAX_RETRY_DELAY):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_retry_delay = max_retry_delay
+        self._pending = []
+        self._timer = None
+        self._failures = 0
+
+    def __len__(self):
+        return len(self._pending)
+
+    def add(self, message):
+        self._pending.append(message)
+        if len(self._pending) >= self.batch_size and not self._failures:
+            spawn(self.flush())
+        elif self._timer is None:
+            self._timer = spawn(self._flush_later(self.flush_interval))
+
+    async def flush(self):
+        """
+        Persists the buffered messages and returns whether it could.
+        """
+        if self._timer is not None and self._timer is not asyncio.current_task():
+            self._timer.cancel()
+        self._timer = None
+
+        batch, self._pending = self._pending, []
+        if not batch:
+            return True
+
+        try:
+            await database_sync_to_async(persist)(batch)
+        except Exception:
+            self._pending[:0] = batch
+            self._failures += 1
+            delay = min(self.flush_interval * 2 ** self._failures, self.max_retry_delay)
+            logger.exception('Could not persist %d chat messages, retrying in %.1fs', len(batch), delay)
+            if self._timer is None:
+                self._timer = spawn(self._flush_later(delay))
+            return False
+
+        self._failures = 0
+        return True
+
+    async def close(self):
+        """
+        Flushes the buffer one last time, as the server shuts down.
+        """
+        if not await self.flush():
+            self._timer.cancel()
+            self._timer = None
+            logger.error('Lost %d chat messages at shutdown', len(self._pending))
+
+    async def _flush_later(self, delay):
+        await asyncio.sleep(delay)
+        await self.flush()
+
+
+def spawn(coroutine):
+    future = asyncio.ensure_future(coroutine)
+    future.add_done_callback(log_failure)
+    return future
+
+def log_failure(future):
+    if not future.cancelled() and future.exception() is not None:
+        logger.error('Flushing chat messages failed', exc_info=future.exception())
+
+
+def persist(messages):
+    try:
+        with transaction.atomic():
+            Message.objects.bulk_create(messages)
+    except IntegrityError:
+        # Some collaboration expired while its messages were buffered.
+        live = set(Collaboration.objects
+                   .filter(id__in={message.collaboration_id for message in messages})
+                   .values_list('id', flat=True))
+        kept = [message for message in messages if message.collaboration_id in live]
+        logger.warning('Dropped %d messages of expired collaborations', len(messages) - len(kept))
+        Message.objects.bulk_create(kept)
+
+
+message_buffer = MessageBuffer()
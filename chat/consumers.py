@@ -1,52 +1,184 @@
-import json
-from asgiref.sync import async_to_sync
-from chat.models import Message
-from core.models import Student, Collaboration
-from django.shortcuts import get_object_or_404
+import asyncio
+import uuid
+from urllib.parse import parse_qs
+from django.db.models import Q
+from django.utils import timezone
 from channels.consumer import AsyncConsumer
 from channels.db import database_sync_to_async
-from rest_framework.exceptions import PermissionDenied
+from channels.exceptions import StopConsumer
+from chat.broadcast import broadcaster, chat_room, student_group
+from chat.buffer import message_buffer
+from chat.history import get_history
+from chat.models import Message
+from chat.protocol import error_frame, message_payload, messages_frame, parse_message
+from core.models import Collaboration
+
+
+@database_sync_to_async
+def is_participant(collaboration_id, student_id):
+    return Collaboration.objects.filter(
+        Q(applicant=student_id) | Q(collaborator=student_id), id=collaboration_id
+    ).exists()
+
+
+@database_sync_to_async
+def collaboration_ids(student_id):
+    return set(Collaboration.objects.of_student(student_id).values_list('id', flat=True))
+
+
+@database_sync_to_async
+def messages_since(collaboration_id, message_id, limit=500):
+    messages = Message.objects.filter(collaboration=collaboration_id)
+    anchor = messages.filter(uid=message_id).values('timestamp', 'id').first()
+    if anchor is None:
+        return []
+
+    missed = messages.filter(
+        Q(timestamp__gt=anchor['timestamp']) | Q(timestamp=anchor['timestamp'], id__gt=anchor['id'])
+    ).order_by('timestamp', 'id')[:limit]
+    return [message_payload(message) for message in missed]
+
+
+class ChatMixin:
+    """
+    Message handling shared by the per-collaboration and the multiplexed
+    student sockets.
+    """
+
+    async def send_frame(self, text):
+        await self.send({
+            'type': 'websocket.send',
+            'text': text
+        })
+
+    async def receive_message(self, event):
+        if event.get('text') is None:
+            return None
+
+        frame = parse_message(event['text'])
+        if frame is None:
+            await self.send_frame(error_frame('Unsupported frame'))
+        return frame
+
+    def post_message(self, collaboration_id, text):
+        message = Message(text=text, sender_id=self.student.pk, collaboration_id=collaboration_id,
+                          read=False, timestamp=timezone.now())
+        message_buffer.add(message)
+        broadcaster.publish(self.channel_layer, chat_room(collaboration_id), message_payload(message))
+
+    async def chat_frame(self, event):
+        await self.send_frame(event['text'])
 
 
-class ChatConsumer(AsyncConsumer):
+class ChatConsumer(ChatMixin, AsyncConsumer):
+    chat_room = None
 
     async def websocket_connect(self, event):
-        collaboration_id = self.scope['url_route']['kwargs']['collaboration_id']
-        collaboration = get_object_or_404(Collaboration, id=collaboration_id)
-        student = self.scope['student']
-        if student != collaboration.applicant and student !=collaboration.collaborator:
-            raise PermissionDenied('You don\'t have permission to perform this action')
-        chat_room = f'chat_{collaboration_id}'
-        self.chat_room = chat_room
+        self.collaboration_id = self.scope['url_route']['kwargs']['collaboration_id']
+        self.student = self.scope['student']
+
+        if not await is_participant(self.collaboration_id, self.student.pk):
+            await self.send({
+                'type': 'websocket.close'
+            })
+            return
+
+        self.chat_room = chat_room(self.collaboration_id)
         await self.channel_layer.group_add(
-            chat_room,
+            self.chat_room,
             self.channel_name
         )
         await self.send({
             'type': 'websocket.accept'
         })
 
+        since = parse_qs(self.scope['query_string'].decode()).get('since')
+        if since:
+            await self.resume(since[0])
+
+    async def resume(self, message_id):
+        """
+        Pushes the messages sent after message_id, read from the room's
+        recent history and only from the database when it is not cached.
+        """
+        try:
+            message_id = str(uuid.UUID(message_id))
+        except ValueError:
+            await self.send_frame(error_frame('Invalid since'))
+            return
+
+        missed = await get_history().since(self.chat_room, message_id)
+        if missed is None:
+            await message_buffer.flush()
+            missed = await messages_since(self.collaboration_id, message_id)
+
+        if missed:
+            await self.send_frame(messages_frame(missed))
+
     async def websocket_receive(self, event):
-        message = event.get('text', None)
-        if message is not None:
-            collaboration_id = self.scope['url_route']['kwargs']['collaboration_id']
-            collaboration = get_object_or_404(Collaboration, id=collaboration_id)
-            student = self.scope['student']
-            message_object = Message.objects.create(text=message, sender=student, collaboration=collaboration, read=False)
-            await self.channel_layer.group_send(
+        if self.chat_room is None:
+            return
+
+        frame = await self.receive_message(event)
+        if frame is not None:
+            self.post_message(self.collaboration_id, frame['text'])
+
+    async def websocket_disconnect(self, event):
+        if self.chat_room is not None:
+            await self.channel_layer.group_discard(
                 self.chat_room,
-                {
-                    'type': 'chat_message',
-                    'text': str({'id': message_object.id, 'text': message, 'sender': message_object.sender.user.id}),
-                    
-                }
+                self.channel_name
             )
+        await message_buffer.flush()
+        raise StopConsumer()
+
+
+class StudentConsumer(ChatMixin, AsyncConsumer):
+    """
+    A single socket per student that joins the chat rooms of all their
+    collaborations and routes frames by collaboration id. Rooms are joined
+    and left as collaborations are created and expire. The socket also
+    carries the student's notifications.
+    """
 
-    async def chat_message(self, event):
+    async def websocket_connect(self, event):
+        self.student = self.scope['student']
+        self.collaborations = await collaboration_ids(self.student.pk)
+
+        groups = [student_group(self.student.pk)] + [chat_room(id) for id in self.collaborations]
+        await asyncio.gather(*[self.channel_layer.group_add(group, self.channel_name) for group in groups])
         await self.send({
-            'type': 'websocket.send',
-            'text': event['text']
+            'type': 'websocket.accept'
         })
 
+    async def websocket_receive(self, event):
+        frame = await self.receive_message(event)
+        if frame is None:
+            return
+
+        collaboration_id = frame.get('collaboration')
+        if not isinstance(collaboration_id, int) or isinstance(collaboration_id, bool):
+            await self.send_frame(error_frame('Invalid collaboration'))
+            return
+        if collaboration_id not in self.collaborations:
+            await self.send_frame(error_frame('Unknown collaboration'))
+            return
+
+        self.post_message(collaboration_id, frame['text'])
+
+    async def websocket_disconnect(self, event):
+        groups = [student_group(self.student.pk)] + [chat_room(id) for id in self.collaborations]
+        await asyncio.gather(*[self.channel_layer.group_discard(group, self.channel_name) for group in groups])
+        await message_buffer.flush()
+        raise StopConsumer()
+
+    async def collaboration_joined(self, event):
+        self.collaborations.add(event['collaboration'])
+        await self.channel_layer.group_add(chat_room(event['collaboration']), self.channel_name)
 
+    async def collaboration_left(self, event):
+        self.collaborations.discard(event['collaboration'])
+        await self.channel_layer.group_discard(chat_room(event['collaboration']), self.channel_name)
 
+    async def notification(self, event):
+        await self.send_frame(event['text'])
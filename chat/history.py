@@ -0,0 +1,103 @@
+import asyncio
+import json
+from collections import defaultdict, deque
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+
+DEFAULT_HISTORY = {
+    'BACKEND': 'chat.history.MemoryHistory',
+    'SIZE': 100,
+}
+
+
+class BaseHistory:
+    """
+    Bounded cache of the last `size` message payloads sent to each room,
+    used to replay what a reconnecting client missed without a query.
+    """
+
+    def __init__(self, size=100, **options):
+        self.size = size
+
+    async def append(self, room, payloads):
+        raise NotImplementedError
+
+    async def recent(self, room):
+        raise NotImplementedError
+
+    async def since(self, room, message_id):
+        """
+        Returns the payloads sent to room after message_id, or None when
+        message_id is no longer cached and the caller must ask the database.
+        """
+        payloads = await self.recent(room)
+        for index, payload in enumerate(payloads):
+            if payload['id'] == message_id:
+                return payloads[index + 1:]
+        return None
+
+
+class MemoryHistory(BaseHistory):
+    """
+    Process-local history for tests and single-process deployments.
+    """
+
+    def __init__(self, size=100, **options):
+        super().__init__(size)
+        self._rooms = defaultdict(lambda: deque(maxlen=self.size))
+
+    async def append(self, room, payloads):
+        self._rooms[room].extend(payloads)
+
+    async def recent(self, room):
+        return list(self._rooms.get(room, ()))
+
+
+class RedisHistory(BaseHistory):
+    """
+    History kept in Redis lists shared by every daphne process, trimmed to
+    `size` entries and expired `ttl` seconds after the room's last message.
+    """
+
+    key_prefix = 'chat:history:'
+
+    def __init__(self, size=100, url=None, ttl=7 * 24 * 3600, **options):
+        super().__init__(size)
+        self.url = url or settings.CHANNEL_LAYERS['default']['CONFIG']['hosts'][0]
+        self.ttl = ttl
+        self._pools = {}
+
+    async def append(self, room, payloads):
+        redis = await self._redis()
+        key = self.key_prefix + room
+        transaction = redis.multi_exec()
+        transaction.rpush(key, *[json.dumps(payload) for payload in payloads])
+        transaction.ltrim(key, -self.size, -1)
+        transaction.expire(key, self.ttl)
+        await transaction.execute()
+
+    async def recent(self, room):
+        redis = await self._redis()
+        return [json.loads(payload) for payload in await redis.lrange(self.key_prefix + room, 0, -1)]
+
+    async def _redis(self):
+        import aioredis
+
+        loop = asyncio.get_event_loop()
+        if loop not in self._pools:
+            self._pools[loop] = await aioredis.create_redis_pool(self.url)
+        return self._pools[loop]
+
+
+_history = (None, None)
+
+
+def get_history():
+    global _history
+
+    config = getattr(settings, 'CHAT_HISTORY', DEFAULT_HISTORY)
+    if _history[0] != config:
+        options = {key.lower(): value for key, value in config.items() if key != 'BACKEND'}
+        _history = (config, import_string(config['BACKEND'])(**options))
+    return _history[1]
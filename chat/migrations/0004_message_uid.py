@@ -0,0 +1,37 @@
+# Generated by Django 2.2.13 on 2026-10-18 20:36
+
+from django.db import migrations, models
+import django.utils.timezone
+import uuid
+
+
+def populate_uids(apps, schema_editor):
+    Message = apps.get_model('chat', 'Message')
+    for message in Message.objects.only('id').iterator():
+        Message.objects.filter(id=message.id).update(uid=uuid.uuid4())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0003_auto_20200502_1100'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='message',
+            name='uid',
+            field=models.UUIDField(null=True, editable=False),
+        ),
+        migrations.RunPython(populate_uids, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='message',
+            name='uid',
+            field=models.UUIDField(default=uuid.uuid4, editable=False, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='message',
+            name='timestamp',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 2.2.13 on 2026-10-18 21:06
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0004_message_uid'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='message',
+            name='collaboration',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='messages', to='core.Collaboration'),
+        ),
+        migrations.AddIndex(
+            model_name='message',
+            index=models.Index(fields=['collaboration', 'timestamp', 'id'], name='chat_messag_collabo_dcbbb0_idx'),
+        ),
+    ]
@@ -1,9 +1,18 @@
+import uuid
 from django.db import models
+from django.utils import timezone
 from core.models import Student, Collaboration
 
 class Message(models.Model):
+    uid = models.UUIDField(default=uuid.uuid4, unique=True, editable=False)
     text = models.TextField()
     read = models.BooleanField()
-    timestamp = models.DateTimeField(auto_now_add=True)
+    timestamp = models.DateTimeField(default=timezone.now, editable=False)
     sender = models.ForeignKey(Student, on_delete=models.CASCADE, related_name='messages')
-    collaboration = models.ForeignKey(Collaboration, on_delete=models.CASCADE, related_name='messages')
+    collaboration = models.ForeignKey(Collaboration, on_delete=models.CASCADE, related_name='messages',
+                                      db_index=False)
+
+    class Meta:
+        # A collaboration's timeline in keyset order; also serves the
+        # foreign key.
+        indexes = [models.Index(fields=['collaboration', 'timestamp', 'id'])]
@@ -0,0 +1,17 @@
+from django.db import transaction
+from chat.broadcast import send_to_student
+from chat.protocol import notification_frame
+
+
+def notify(student_ids, event, data):
+    """
+    Pushes a notification to the student sockets of student_ids once the
+    current transaction commits.
+    """
+    message = {'type': 'notification', 'text': notification_frame(event, data)}
+
+    def send():
+        for student_id in student_ids:
+            send_to_student(student_id, message)
+
+    transaction.on_commit(send)
@@ -0,0 +1,66 @@
+"""
+JSON wire protocol of the chat sockets.
+
+Clients send `{"v": 1, "type": "message", "text": "..."}` frames; plain
+text frames are still accepted as the message text. On the multiplexed
+student socket the frame also names its `collaboration`. The server sends
+`{"v": 1, "type": "messages", "messages": [...]}` frames, each carrying
+every message of a burst sent to a room, and student sockets also get
+`{"v": 1, "type": "notification", "event": "...", "data": {...}}` frames.
+"""
+
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+PROTOCOL_VERSION = 1
+
+
+def dumps(payload):
+    if orjson is not None:
+        return orjson.dumps(payload).decode()
+    return json.dumps(payload, ensure_ascii=False, separators=(',', ':'))
+
+
+def parse_message(text):
+    """
+    Returns the message frame sent by a client as a dict with its `text`
+    and, on multiplexed sockets, its `collaboration`. Returns None if the
+    frame is a JSON object that is not a message.
+    """
+    try:
+        frame = json.loads(text)
+    except ValueError:
+        return {'text': text}
+
+    if not isinstance(frame, dict):
+        return {'text': text}
+    if frame.get('type') != 'message' or not isinstance(frame.get('text'), str):
+        return None
+    return frame
+
+
+def message_payload(message):
+    return {
+        'id': str(message.uid),
+        'collaboration': message.collaboration_id,
+        'sender': message.sender_id,
+        'text': message.text,
+        'timestamp': message.timestamp.isoformat(),
+    }
+
+
+def messages_frame(payloads):
+    return dumps({'v': PROTOCOL_VERSION, 'type': 'messages', 'messages': payloads})
+
+
+def notification_frame(event, data):
+    return dumps({'v': PROTOCOL_VERSION, 'type': 'notification', 'event': event, 'data': data})
+
+
+def error_frame(detail):
+    return dumps({'v': PROTOCOL_VERSION, 'type': 'error', 'detail': detail})
@@ -4,4 +4,5 @@ from chat import consumers
 
 websocket_urlpatterns = [
     path('ws/collaborations/<int:collaboration_id>/', consumers.ChatConsumer),
+    path('ws/students/me/', consumers.StudentConsumer),
 ]
\ No newline at end of file
@@ -6,4 +6,4 @@ class MessageSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Message
-        fields = ('id', 'text', 'read', 'timestamp', 'sender', 'collaboration')
\ No newline at end of file
+        fields = ('id', 'uid', 'text', 'read', 'timestamp', 'sender', 'collaboration')
\ No newline at end of file
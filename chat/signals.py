@@ -0,0 +1,28 @@
+from datetime import date
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from chat.broadcast import send_to_student
+from chat.notifications import notify
+from core.models import Collaboration
+
+
+def send_to_participants(collaboration, event_type):
+    event = {'type': event_type, 'collaboration': collaboration.id}
+    for student_id in (collaboration.applicant_id, collaboration.collaborator_id):
+        send_to_student(student_id, event)
+
+
+@receiver(post_save, sender=Collaboration)
+def join_collaboration_room(sender, instance, created, **kwargs):
+    if created:
+        transaction.on_commit(lambda: send_to_participants(instance, 'collaboration.joined'))
+
+
+@receiver(post_delete, sender=Collaboration)
+def leave_collaboration_room(sender, instance, **kwargs):
+    transaction.on_commit(lambda: send_to_participants(instance, 'collaboration.left'))
+
+    if instance.deadline < date.today():
+        notify((instance.applicant_id, instance.collaborator_id), 'collaboration.expired',
+               {'collaboration': instance.id})
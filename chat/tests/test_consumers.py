@@ -0,0 +1,347 @@
+import asyncio
+import datetime
+import json
+from unittest import mock
+from asgiref.sync import async_to_sync
+from channels.db import database_sync_to_async
+from channels.testing import WebsocketCommunicator
+from django.db import OperationalError
+from django.test import TransactionTestCase, override_settings
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from chat import buffer
+from chat.buffer import MessageBuffer, message_buffer
+from chat.history import get_history
+from chat.models import Message
+from chronus.routing import application
+from rest_framework.test import APIClient
+from core.models import Student, User, Collaboration, CollaborationRequest
+from core.schedule import check_collaborations
+
+
+def create_student(email):
+    user = User.objects.create_user(email, 'testpass1234')
+    return Student.objects.create(user=user)
+
+
+@override_settings(CHANNEL_LAYERS={'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}},
+                   CHAT_HISTORY={'BACKEND': 'chat.history.MemoryHistory', 'SIZE': 3})
+class ChatConsumerTests(TransactionTestCase):
+
+    def setUp(self):
+        get_history()._rooms.clear()
+        self.applicant = create_student('applicant@test.com')
+        self.collaborator = create_student('collaborator@test.com')
+        self.outsider = create_student('outsider@test.com')
+        self.collaboration = Collaboration.objects.create(
+            title='Ayuda en proyecto de inglés', requested_minutes=15,
+            deadline=datetime.date.today(), applicant=self.applicant, collaborator=self.collaborator
+        )
+
+    def communicator(self, student, since=None):
+        token, _ = Token.objects.get_or_create(user=student.user)
+        path = f'ws/collaborations/{self.collaboration.id}/?token={token.key}'
+        if since:
+            path += f'&since={since}'
+        return WebsocketCommunicator(application, path)
+
+    def send_messages(self, texts):
+        async def send():
+            applicant = self.communicator(self.applicant)
+            await applicant.connect()
+            ids = []
+            for text in texts:
+                await applicant.send_to(text_data=text)
+                ids += [message['id'] for message in json.loads(await applicant.receive_from())['messages']]
+            await applicant.disconnect()
+            return ids
+
+        return async_to_sync(send)()
+
+    def resume(self, since):
+        async def reconnect():
+            collaborator = self.communicator(self.collaborator, since=since)
+            await collaborator.connect()
+            frame = json.loads(await collaborator.receive_from())
+            await collaborator.disconnect()
+            return [message['text'] for message in frame['messages']]
+
+        return async_to_sync(reconnect)()
+
+    def test_messages_are_broadcast_and_persisted_on_disconnect(self):
+        async def chat():
+            applicant = self.communicator(self.applicant)
+            collaborator = self.communicator(self.collaborator)
+            self.assertTrue((await applicant.connect())[0])
+            self.assertTrue((await collaborator.connect())[0])
+
+            await applicant.send_to(text_data='Hola')
+            received = json.loads(await collaborator.receive_from())['messages'][0]
+
+            await applicant.disconnect()
+            await collaborator.disconnect()
+            return received
+
+        received = async_to_sync(chat)()
+
+        message = Message.objects.get()
+        self.assertEqual(received['text'], 'Hola')
+        self.assertEqual(received['sender'], self.applicant.pk)
+        self.assertEqual(received['id'], str(message.uid))
+        self.assertEqual(len(message_buffer), 0)
+
+    def test_outsiders_cannot_join_the_chat(self):
+        async def join():
+            outsider = self.communicator(self.outsider)
+            connected, _ = await outsider.connect()
+            await outsider.disconnect()
+            return connected
+
+        self.assertFalse(async_to_sync(join)())
+
+    def test_bursts_are_coalesced_into_one_frame(self):
+        async def burst():
+            applicant = self.communicator(self.applicant)
+            collaborator = self.communicator(self.collaborator)
+            await applicant.connect()
+            await collaborator.connect()
+
+            await applicant.send_to(text_data=json.dumps({'v': 1, 'type': 'message', 'text': 'Hola'}))
+            await applicant.send_to(text_data=json.dumps({'v': 1, 'type': 'message', 'text': '¿Qué tal?'}))
+            frame = json.loads(await collaborator.receive_from())
+            nothing_else = await collaborator.receive_nothing()
+
+            await applicant.disconnect()
+            await collaborator.disconnect()
+            return frame, nothing_else
+
+        frame, nothing_else = async_to_sync(burst)()
+
+        self.assertEqual(frame['v'], 1)
+        self.assertEqual(frame['type'], 'messages')
+        self.assertEqual([message['text'] for message in frame['messages']], ['Hola', '¿Qué tal?'])
+        self.assertTrue(nothing_else)
+        self.assertEqual(Message.objects.count(), 2)
+
+    def test_unsupported_frames_are_rejected(self):
+        async def send_unsupported():
+            applicant = self.communicator(self.applicant)
+            await applicant.connect()
+            await applicant.send_to(text_data=json.dumps({'type': 'typing'}))
+            frame = json.loads(await applicant.receive_from())
+            await applicant.disconnect()
+            return frame
+
+        self.assertEqual(async_to_sync(send_unsupported)()['type'], 'error')
+
+    def test_reconnect_resumes_from_the_recent_history(self):
+        ids = self.send_messages(['uno', 'dos', 'tres'])
+
+        with self.assertNumQueries(0):
+            missed = async_to_sync(get_history().since)(f'chat_{self.collaboration.id}', ids[0])
+        self.assertEqual([message['text'] for message in missed], ['dos', 'tres'])
+        self.assertEqual(self.resume(ids[0]), ['dos', 'tres'])
+
+    def test_reconnect_falls_back_to_the_database(self):
+        ids = self.send_messages(['uno', 'dos', 'tres', 'cuatro'])
+
+        self.assertEqual(self.resume(ids[0]), ['dos', 'tres', 'cuatro'])
+
+    def test_malformed_since_gets_an_error_frame(self):
+        async def reconnect():
+            collaborator = self.communicator(self.collaborator, since='not-a-uuid')
+            connected, _ = await collaborator.connect()
+            frame = json.loads(await collaborator.receive_from())
+            await collaborator.send_to(text_data='Hola')
+            echoed = json.loads(await collaborator.receive_from())
+            await collaborator.disconnect()
+            return connected, frame, echoed
+
+        connected, frame, echoed = async_to_sync(reconnect)()
+
+        self.assertTrue(connected)
+        self.assertEqual(frame['type'], 'error')
+        self.assertEqual(echoed['messages'][0]['text'], 'Hola')
+
+
+@override_settings(CHANNEL_LAYERS={'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}},
+                   CHAT_HISTORY={'BACKEND': 'chat.history.MemoryHistory', 'SIZE': 3})
+class StudentConsumerTests(TransactionTestCase):
+
+    def setUp(self):
+        self.applicant = create_student('applicant@test.com')
+        self.collaborator = create_student('collaborator@test.com')
+        self.collaboration = self.create_collaboration()
+
+    def create_collaboration(self):
+        return Collaboration.objects.create(
+            title='Ayuda en proyecto de inglés', requested_minutes=15,
+            deadline=datetime.date.today(), applicant=self.applicant, collaborator=self.collaborator
+        )
+
+    def communicator(self, student):
+        token, _ = Token.objects.get_or_create(user=student.user)
+        return WebsocketCommunicator(application, f'ws/students/me/?token={token.key}')
+
+    def message(self, collaboration, text):
+        return json.dumps({'v': 1, 'type': 'message', 'collaboration': collaboration.id, 'text': text})
+
+    def test_messages_are_routed_by_collaboration(self):
+        async def chat():
+            applicant = self.communicator(self.applicant)
+            collaborator = self.communicator(self.collaborator)
+            await applicant.connect()
+            await collaborator.connect()
+
+            await applicant.send_to(text_data=self.message(self.collaboration, 'Hola'))
+            frame = json.loads(await collaborator.receive_from())
+
+            await applicant.disconnect()
+            await collaborator.disconnect()
+            return frame['messages'][0]
+
+        message = async_to_sync(chat)()
+
+        self.assertEqual(message['collaboration'], self.collaboration.id)
+        self.assertEqual(message['text'], 'Hola')
+
+    def test_invalid_collaborations_get_an_error_frame(self):
+        async def chat():
+            applicant = self.communicator(self.applicant)
+            await applicant.connect()
+            frames = []
+            for collaboration in ([self.collaboration.id], {'id': 1}, str(self.collaboration.id), True, None):
+                await applicant.send_to(text_data=json.dumps({'v': 1, 'type': 'message', 'text': 'Hola',
+                                                              'collaboration': collaboration}))
+                frames.append(json.loads(await applicant.receive_from()))
+
+            await applicant.send_to(text_data=self.message(self.collaboration, 'Sigo aquí'))
+            frames.append(json.loads(await applicant.receive_from()))
+            await applicant.disconnect()
+            return frames
+
+        *errors, message = async_to_sync(chat)()
+
+        self.assertEqual([frame['detail'] for frame in errors], ['Invalid collaboration'] * 5)
+        self.assertEqual(message['messages'][0]['text'], 'Sigo aquí')
+
+    def test_new_collaborations_are_joined_and_expired_ones_left(self):
+        async def chat():
+            collaborator = self.communicator(self.collaborator)
+            applicant = self.communicator(self.applicant)
+            await collaborator.connect()
+            await applicant.connect()
+
+            collaboration = await database_sync_to_async(self.create_collaboration)()
+            await applicant.send_to(text_data=self.message(collaboration, 'Nueva'))
+            joined = json.loads(await collaborator.receive_from())
+            await applicant.receive_from()
+
+            await database_sync_to_async(self.collaboration.delete)()
+            await applicant.receive_nothing()
+            await applicant.send_to(text_data=self.message(self.collaboration, 'Caducada'))
+            left = json.loads(await applicant.receive_from())
+
+            await applicant.disconnect()
+            await collaborator.disconnect()
+            return joined, left
+
+        joined, left = async_to_sync(chat)()
+
+        self.assertEqual(joined['messages'][0]['text'], 'Nueva')
+        self.assertEqual(left['type'], 'error')
+
+    def test_offers_are_notified_to_the_applicant(self):
+        collaboration_request = CollaborationRequest.objects.create(
+            title='Ayuda en proyecto de física', requested_minutes=15,
+            deadline=datetime.date.today(), applicant=self.applicant
+        )
+
+        def offer():
+            client = APIClient()
+            client.force_authenticate(self.collaborator.user)
+            return client.put(f'/api/v1/collaboration-requests/{collaboration_request.id}/offer/').status_code
+
+        async def listen():
+            applicant = self.communicator(self.applicant)
+            await applicant.connect()
+            status_code = await database_sync_to_async(offer)()
+            frame = json.loads(await applicant.receive_from())
+            await applicant.disconnect()
+            return status_code, frame
+
+        status_code, frame = async_to_sync(listen)()
+
+        self.assertEqual(status_code, 200)
+        self.assertEqual(frame['type'], 'notification')
+        self.assertEqual(frame['event'], 'offer.created')
+        self.assertEqual(frame['data']['collaboration_request'], collaboration_request.id)
+        self.assertEqual(frame['data']['offerer']['id'], self.collaborator.pk)
+
+    def test_expiry_is_notified_to_both_participants(self):
+        Collaboration.objects.filter(id=self.collaboration.id).update(
+            deadline=datetime.date.today() - datetime.timedelta(days=1)
+        )
+
+        async def listen():
+            applicant = self.communicator(self.applicant)
+            collaborator = self.communicator(self.collaborator)
+            await applicant.connect()
+            await collaborator.connect()
+            await database_sync_to_async(check_collaborations)()
+            frames = [json.loads(await applicant.receive_from()), json.loads(await collaborator.receive_from())]
+            await applicant.disconnect()
+            await collaborator.disconnect()
+            return frames
+
+        for frame in async_to_sync(listen)():
+            self.assertEqual(frame['event'], 'collaboration.expired')
+            self.assertEqual(frame['data'], {'collaboration': self.collaboration.id})
+
+
+@override_settings(CHANNEL_LAYERS={'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}})
+class MessageBufferTests(TransactionTestCase):
+
+    def setUp(self):
+        self.applicant = create_student('applicant@test.com')
+        self.collaboration = Collaboration.objects.create(
+            title='Ayuda', requested_minutes=15, deadline=datetime.date.today(),
+            applicant=self.applicant, collaborator=create_student('collaborator@test.com')
+        )
+
+    def message(self, text):
+        return Message(text=text, sender_id=self.applicant.pk, collaboration_id=self.collaboration.id,
+                       read=False, timestamp=timezone.now())
+
+    def test_failed_batches_are_kept_and_retried(self):
+        message_buffer = MessageBuffer(flush_interval=0.01)
+        persist = buffer.persist
+        failures = [OperationalError('connection lost')]
+
+        def flaky_persist(messages):
+            if failures:
+                raise failures.pop()
+            persist(messages)
+
+        async def chat():
+            with mock.patch.object(buffer, 'persist', flaky_persist):
+                message_buffer.add(self.message('Hola'))
+                await asyncio.sleep(0.02)
+                message_buffer.add(self.message('¿Sigues ahí?'))
+                self.assertEqual(len(message_buffer), 2)
+                await asyncio.sleep(0.1)
+            return len(message_buffer)
+
+        with self.assertLogs('chat.buffer', 'ERROR'):
+            self.assertEqual(async_to_sync(chat)(), 0)
+        self.assertEqual(list(Message.objects.order_by('id').values_list('text', flat=True)), ['Hola', '¿Sigues ahí?'])
+
+    def test_close_flushes_what_is_left(self):
+        message_buffer = MessageBuffer(flush_interval=60)
+
+        async def shutdown():
+            message_buffer.add(self.message('Adiós'))
+            await message_buffer.close()
+
+        async_to_sync(shutdown)()
+        self.assertEqual(Message.objects.get().text, 'Adiós')
@@ -1,5 +1,5 @@
-from rest_framework.authtoken.models import Token
 from rest_framework.exceptions import AuthenticationFailed 
+from core.authentication import token_cache
 
 class TokenAuthMiddleware:
     """
@@ -12,9 +12,8 @@ class TokenAuthMiddleware:
     def __call__(self, scope):
         query = dict((x.split('=') for x in scope['query_string'].decode().split("&")))
         token = query['token']
-        try:
-            token = Token.objects.get(key=token)
-        except Token.DoesNotExist:
+        user = token_cache.get_user(token)
+        if user is None:
             raise AuthenticationFailed("Invalid token!")
-        scope['student'] = token.user.student
+        scope['student'] = user.student
         return self.inner(scope)
\ No newline at end of file
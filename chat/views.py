@@ -1,6 +1,7 @@
 from django.shortcuts import get_object_or_404
 from rest_framework import generics
 from chat.models import Message
+from chat.pagination import MessagePagination
 from chat.serializers import MessageSerializer
 from core.models import Collaboration
 from core.exceptions import ResourcePermissionException
@@ -8,6 +9,7 @@ from core.exceptions import ResourcePermissionException
 
 class ListMessagesView(generics.ListAPIView):
     serializer_class = MessageSerializer
+    pagination_class = MessagePagination
     
     def get_queryset(self):
         student = self.request.user.student
@@ -15,7 +17,7 @@ class ListMessagesView(generics.ListAPIView):
         collaboration_id = self.request.query_params.get('collaboration_id', None)
         collaboration = get_object_or_404(Collaboration, id=collaboration_id)
         if collaboration.applicant == student or collaboration.collaborator == student:
-            queryset = Message.objects.order_by('timestamp').filter(collaboration=collaboration_id)
+            queryset = Message.objects.filter(collaboration=collaboration_id)
             return queryset
         else:
             raise ResourcePermissionException
@@ -1,9 +1,19 @@
 import os
 import datetime
-import boto3
-from botocore.client import Config
+from functools import lru_cache
 
-client = boto3.client('s3', config=Config(signature_version='s3v4'))
+
+@lru_cache(maxsize=None)
+def get_client():
+    import boto3
+    from botocore.client import Config
+    return boto3.client('s3', config=Config(signature_version='s3v4'))
+
+def __getattr__(name):
+    # The client is created on first use rather than at import.
+    if name == 'client':
+        return get_client()
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
 
 AWS_ACCESS_KEY_ID = os.getenv('ACCESS_KEY_ID')
 AWS_SECRET_ACCESS_KEY = os.getenv('SECRET_ACCESS_KEY')
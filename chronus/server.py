@@ -0,0 +1,48 @@
+"""
+daphne entrypoint that also negotiates permessage-deflate compression on
+WebSocket connections and flushes buffered chat messages on shutdown. It
+takes the same arguments as daphne:
+
+    python -m chronus.server chronus.asgi:application --port 8000
+"""
+
+import asyncio
+from autobahn.websocket.compress import PerMessageDeflateOffer, PerMessageDeflateOfferAccept
+from daphne.cli import CommandLineInterface
+from daphne.server import Server
+from twisted.internet import defer
+
+
+def accept_deflate(offers):
+    for offer in offers:
+        if isinstance(offer, PerMessageDeflateOffer):
+            return PerMessageDeflateOfferAccept(offer)
+
+
+class CompressingServer(Server):
+
+    @property
+    def ws_factory(self):
+        return self._ws_factory
+
+    @ws_factory.setter
+    def ws_factory(self, factory):
+        factory.setProtocolOptions(perMessageCompressionAccept=accept_deflate)
+        self._ws_factory = factory
+
+    def kill_all_applications(self):
+        # Consumers are cancelled at shutdown rather than disconnected, so
+        # the messages they buffered are flushed here instead.
+        from chat.buffer import message_buffer
+
+        killed = super().kill_all_applications()
+        killed.addCallback(lambda _: defer.Deferred.fromFuture(asyncio.ensure_future(message_buffer.close())))
+        return killed
+
+
+class CompressingCommandLineInterface(CommandLineInterface):
+    server_class = CompressingServer
+
+
+if __name__ == '__main__':
+    CompressingCommandLineInterface.entrypoint()
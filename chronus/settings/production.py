@@ -44,16 +44,20 @@ INSTALLED_APPS = [
     'corsheaders',
     'storages',
     'core.apps.CoreConfig',
-    'chat',
+    'chat.apps.ChatConfig',
 ]
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework.authentication.TokenAuthentication',
+        'core.authentication.CachedTokenAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
     ),
+    'DEFAULT_RENDERER_CLASSES': (
+        'core.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
 }
 
 MIDDLEWARE = [
@@ -98,6 +102,11 @@ CHANNEL_LAYERS = {
     },
 }
 
+CHAT_HISTORY = {
+    'BACKEND': 'chat.history.RedisHistory',
+    'SIZE': 100,
+}
+
 
 import dj_database_url
 from decouple import config
@@ -143,9 +152,31 @@ USE_TZ = True
 
 AUTH_USER_MODEL = 'core.User'
 
+#Token cache config
+TOKEN_CACHE_TTL = config('TOKEN_CACHE_TTL', default=60, cast=int)
+
+#Cache config
+CACHES = {
+    'default': {
+        'BACKEND': 'django_redis.cache.RedisCache',
+        'LOCATION': os.getenv('REDIS_URL'),
+    } if os.getenv('REDIS_URL') else {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+RESPONSE_CACHE_TTL = config('RESPONSE_CACHE_TTL', default=300, cast=int)
+
+#Scheduler config
+SCHEDULER_AUTOSTART = config('SCHEDULER_AUTOSTART', default=True, cast=bool)
+# Off when `manage.py process_images --loop` resizes uploads in its own process.
+IMAGE_WORKER_IN_PROCESS = config('IMAGE_WORKER_IN_PROCESS', default=True, cast=bool)
+PROFILE_IMAGE_MAX_UPLOAD_SIZE = config('PROFILE_IMAGE_MAX_UPLOAD_SIZE', default=10 * 1024 * 1024, cast=int)
+
 #Mail config
 SENDGRID_API_KEY = os.getenv('SENDGRID_API_KEY')
 
+EMAIL_BACKEND = config('EMAIL_BACKEND', default='django.core.mail.backends.smtp.EmailBackend')
+
 EMAIL_HOST = 'smtp.sendgrid.net'
 EMAIL_HOST_USER = 'apikey' 
 EMAIL_HOST_PASSWORD = SENDGRID_API_KEY
@@ -167,9 +198,18 @@ AWS_SECRET_ACCESS_KEY = os.getenv('SECRET_ACCESS_KEY')
 DEFAULT_FILE_STORAGE = 'chronus.storage_backends.MediaStorage'
 AWS_STORAGE_BUCKET_NAME = os.getenv('STORAGE_BUCKET_NAME')
 AWS_S3_REGION_NAME = 'eu-west-3'
+AWS_S3_SIGNATURE_VERSION = 's3v4'
 AWS_DEFAULT_ACL = 'public-read'
 AWS_S3_CUSTOM_DOMAIN = f'{AWS_STORAGE_BUCKET_NAME}.s3.amazonaws.com'
 AWS_S3_OBJECT_PARAMETERS = {'CacheControl': 'max-age=86400'}
+AWS_S3_ENDPOINT_URL = config('S3_ENDPOINT_URL', default=None)
+# Private media is served through presigned URLs, or CloudFront signed ones
+# when a CloudFront key pair is configured. See core.media.
+AWS_MEDIA_PRIVATE = config('MEDIA_PRIVATE', default=False, cast=bool)
+AWS_QUERYSTRING_EXPIRE = config('MEDIA_URL_EXPIRE', default=3600, cast=int)
+AWS_CLOUDFRONT_DOMAIN = config('CLOUDFRONT_DOMAIN', default=None)
+AWS_CLOUDFRONT_KEY_ID = config('CLOUDFRONT_KEY_ID', default=None)
+AWS_CLOUDFRONT_KEY = config('CLOUDFRONT_KEY', default='').replace('\\n', '\n')
 # s3 static settings
 AWS_LOCATION = 'static'
 STATIC_URL = f'https://{AWS_S3_CUSTOM_DOMAIN}/{AWS_LOCATION}/'
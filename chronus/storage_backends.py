@@ -1,5 +1,11 @@
 from storages.backends.s3boto3 import S3Boto3Storage
+from storages.utils import setting
 
 class MediaStorage(S3Boto3Storage):
     location = 'media'
-    file_overwrite = False
\ No newline at end of file
+    file_overwrite = False
+
+    def __init__(self, **settings):
+        if setting('AWS_MEDIA_PRIVATE', False):
+            settings = {'default_acl': 'private', 'custom_domain': None, 'querystring_auth': True, **settings}
+        super().__init__(**settings)
@@ -5,5 +5,8 @@ class CoreConfig(AppConfig):
     name = 'core'
 
     def ready(self):
-        from core.schedule import start
-        start()
+        import core.signals  # noqa: F401
+
+        from core.schedule import should_start, start
+        if should_start():
+            start()
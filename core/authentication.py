@@ -0,0 +1,136 @@
+import copy
+import threading
+import time
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import AuthenticationFailed
+
+
+class TokenCache:
+    """
+    Process-wide TTL cache from token key to its user, with the student and
+    the token already attached. It serves both the REST authentication
+    class and the Channels middleware.
+
+    Every lookup returns fresh copies of the cached instances so requests
+    never share mutable model objects.
+
+    Invalidating a token or a user also stamps the time in the shared
+    cache, and every hit checks those stamps, so the other processes stop
+    serving the entry on their next lookup instead of when it expires.
+    """
+
+    def __init__(self, ttl=60, max_size=10000):
+        self.ttl = ttl
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get_user(self, key):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is not None and entry[0] > now and not self._invalidated(key, *entry[1:]):
+            with self._lock:
+                self.hits += 1
+            return clone_user(entry[2])
+
+        with self._lock:
+            self.misses += 1
+        loaded_at = time.time()
+        try:
+            token = Token.objects.select_related('user__student').get(key=key)
+        except Token.DoesNotExist:
+            self.forget(key)
+            return None
+
+        with self._lock:
+            if len(self._entries) >= self.max_size:
+                self._evict(now)
+            self._entries[key] = (now + self.ttl, loaded_at, token.user)
+        return clone_user(token.user)
+
+    def invalidate(self, key):
+        self.forget(key)
+        self._stamp(token_stamp_key(key))
+
+    def invalidate_user(self, user_id):
+        with self._lock:
+            for key in [key for key, (_, _, user) in self._entries.items() if user.pk == user_id]:
+                del self._entries[key]
+        self._stamp(user_stamp_key(user_id))
+
+    def forget(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'size': len(self._entries)}
+
+    def _stamp(self, stamp_key):
+        # Entries loaded before the stamp expire within ttl, and so can it.
+        cache.set(stamp_key, time.time(), self.ttl)
+
+    def _invalidated(self, key, loaded_at, user):
+        stamps = cache.get_many([token_stamp_key(key), user_stamp_key(user.pk)])
+        return any(stamp >= loaded_at for stamp in stamps.values())
+
+    def _evict(self, now):
+        expired = [key for key, (expires_at, *_) in self._entries.items() if expires_at <= now]
+        for key in expired or list(self._entries)[:len(self._entries) // 10 + 1]:
+            del self._entries[key]
+
+
+def token_stamp_key(key):
+    return f'token-cache:token:{key}'
+
+def user_stamp_key(user_id):
+    return f'token-cache:user:{user_id}'
+
+
+def clone_instance(instance):
+    clone = copy.copy(instance)
+    clone._state = copy.copy(instance._state)
+    clone._state.fields_cache = {}
+    return clone
+
+
+def clone_user(user):
+    clone = clone_instance(user)
+
+    cached = user._state.fields_cache
+    if 'auth_token' in cached:
+        clone._state.fields_cache['auth_token'] = cached['auth_token']
+    if cached.get('student') is not None:
+        student = clone_instance(cached['student'])
+        student._state.fields_cache['user'] = clone
+        clone._state.fields_cache['student'] = student
+
+    return clone
+
+
+token_cache = TokenCache(ttl=getattr(settings, 'TOKEN_CACHE_TTL', 60))
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+
+    def authenticate_credentials(self, key):
+        user = token_cache.get_user(key)
+        if user is None:
+            raise AuthenticationFailed('Invalid token.')
+
+        if not user.is_active:
+            raise AuthenticationFailed('User inactive or deleted.')
+
+        return (user, user.auth_token)
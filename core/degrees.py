@@ -0,0 +1,126 @@
+"""
+The degree catalog, kept in the DegreeCatalog table and loaded into it from
+core/data/degrees.json by `manage.py load_degrees`.
+
+Each process keeps an immutable snapshot of the catalog to look degree codes
+up without queries. Changes made in the process drop it right away. Other
+processes drop theirs when they notice the shared version token has
+changed, which they check at most every CHECK_INTERVAL seconds.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+import uuid
+from collections import namedtuple
+from types import MappingProxyType
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from core.models import Degree, DegreeCatalog
+
+
+DEGREES_FILE = os.path.join(os.path.dirname(__file__), 'data', 'degrees.json')
+VERSION_KEY = 'degree-catalog:version'
+CHECK_INTERVAL = getattr(settings, 'DEGREE_CATALOG_CHECK_INTERVAL', 60)
+# How long clients may use the catalog before revalidating it.
+MAX_AGE = getattr(settings, 'DEGREE_CATALOG_MAX_AGE', 3600)
+
+Catalog = namedtuple('Catalog', ('names', 'entries', 'etag'))
+SyncStats = namedtuple('SyncStats', ('created', 'updated', 'deleted', 'kept'))
+
+
+def read_file(path=DEGREES_FILE):
+    """
+    {code: name} for the degrees in the JSON file at path.
+    """
+    with open(path, encoding='utf-8') as json_file:
+        return {int(code): name for code, name in json.load(json_file).items()}
+
+def sync(names, prune=False):
+    """
+    Makes the catalog match names, a {code: name} dict. Codes missing from
+    it are deleted with prune, unless some degree still refers to them:
+    those are kept and returned in SyncStats.kept.
+    """
+    with transaction.atomic():
+        existing = dict(DegreeCatalog.objects.select_for_update().values_list('id', 'name'))
+        created = [DegreeCatalog(id=code, name=name) for code, name in names.items() if code not in existing]
+        updated = [DegreeCatalog(id=code, name=name) for code, name in names.items()
+                   if code in existing and existing[code] != name]
+        DegreeCatalog.objects.bulk_create(created)
+        DegreeCatalog.objects.bulk_update(updated, ['name'])
+
+        kept = sorted(existing.keys() - names.keys())
+        deleted = 0
+        if prune and kept:
+            referenced = set(Degree.objects.filter(name__in=kept).values_list('name', flat=True))
+            deleted, _ = DegreeCatalog.objects.filter(id__in=set(kept) - referenced).delete()
+            kept = sorted(referenced)
+
+        if created or updated or deleted:
+            catalog.invalidate()
+    return SyncStats(created=len(created), updated=len(updated), deleted=deleted, kept=kept)
+
+def version():
+    token = cache.get(VERSION_KEY)
+    if token is None:
+        cache.add(VERSION_KEY, uuid.uuid4().hex, None)
+        token = cache.get(VERSION_KEY, '')
+    return token
+
+
+class DegreeCatalogCache:
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.catalog = None
+        self.version = None
+        self.checked_at = 0
+
+    def get(self):
+        """
+        The current Catalog: names maps codes to names, entries lists the
+        (code, name) pairs in order and etag identifies their content.
+        """
+        catalog = self.catalog
+        if catalog is not None and time.monotonic() - self.checked_at < CHECK_INTERVAL:
+            return catalog
+
+        with self.lock:
+            token = version()
+            if self.catalog is None or token != self.version:
+                self.catalog = load()
+                self.version = token
+            self.checked_at = time.monotonic()
+            return self.catalog
+
+    def invalidate(self):
+        """
+        Drops the snapshot of every process, once the current transaction
+        commits so that none of them reloads what it is about to change.
+        """
+        def bump():
+            cache.set(VERSION_KEY, uuid.uuid4().hex, None)
+            self.reset()
+
+        self.reset()
+        transaction.on_commit(bump)
+
+
+def load():
+    entries = tuple(DegreeCatalog.objects.order_by('id').values_list('id', 'name'))
+    return Catalog(
+        names=MappingProxyType(dict(entries)),
+        entries=entries,
+        etag=hashlib.sha1(json.dumps(entries, ensure_ascii=False).encode()).hexdigest()[:16],
+    )
+
+
+catalog = DegreeCatalogCache()
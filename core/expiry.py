@@ -0,0 +1,187 @@
+import heapq
+import itertools
+import logging
+import threading
+import time
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from django.db import close_old_connections
+
+
+logger = logging.getLogger(__name__)
+
+
+def due_at(deadline):
+    """
+    A row expires as soon as its deadline day is over, the same moment the
+    `deadline < date.today()` checks start to hold.
+    """
+    return datetime.combine(deadline + timedelta(days=1), datetime.min.time())
+
+
+class ExpiryQueue:
+    """
+    Min-heap of (due, key) entries. Rescheduled and cancelled keys are left
+    in the heap and skipped when they reach the top.
+    """
+
+    def __init__(self):
+        self._heap = []
+        self._due = {}
+        self._counter = itertools.count()
+        self._cond = threading.Condition()
+
+    def __len__(self):
+        return len(self._due)
+
+    def schedule(self, key, due):
+        with self._cond:
+            if self._due.get(key) == due:
+                return
+            self._due[key] = due
+            heapq.heappush(self._heap, (due, next(self._counter), key))
+            self._cond.notify()
+
+    def cancel(self, key):
+        with self._cond:
+            self._due.pop(key, None)
+
+    def clear(self):
+        with self._cond:
+            self._heap.clear()
+            self._due.clear()
+
+    def wake(self):
+        with self._cond:
+            self._cond.notify()
+
+    def pop_due(self, now=None):
+        now = now or datetime.now()
+        with self._cond:
+            return self._pop_due(now)
+
+    def wait_due(self, timeout):
+        """
+        Blocks until the earliest entry comes due, a new entry is scheduled or
+        timeout seconds pass, and returns the keys that are due by then.
+        """
+        with self._cond:
+            delay = self._delay(datetime.now())
+            if delay is None or delay > 0:
+                self._cond.wait(timeout if delay is None else min(delay, timeout))
+            return self._pop_due(datetime.now())
+
+    def _delay(self, now):
+        while self._heap:
+            due, _, key = self._heap[0]
+            if self._due.get(key) == due:
+                return (due - now).total_seconds()
+            heapq.heappop(self._heap)
+        return None
+
+    def _pop_due(self, now):
+        keys = []
+        while self._heap and self._heap[0][0] <= now:
+            due, _, key = heapq.heappop(self._heap)
+            if self._due.get(key) == due:
+                del self._due[key]
+                keys.append(key)
+        return keys
+
+
+class ExpiryEngine:
+    """
+    Expires rows exactly when their deadline comes due instead of polling.
+
+    The queue is loaded from the database on start, kept current by model
+    signals raised in this process and topped up with the rows other
+    processes created every `resync_interval` seconds. Those are found by
+    id, and ids can commit out of order, so every resync also expires the
+    overdue rows the queue missed.
+    """
+
+    resync_interval = 300
+    retry_delay = 60
+
+    def __init__(self, models, expire):
+        self.models = tuple(models)
+        self.expire = expire
+        self.queue = ExpiryQueue()
+        self._last_seen = {}
+        self._thread = None
+        self._stop_event = None
+
+    @property
+    def running(self):
+        return self._thread is not None
+
+    def start(self):
+        if self.running:
+            return
+        self.queue.clear()
+        self._last_seen = {model: 0 for model in self.models}
+        self.resync()
+
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(target=self._run, args=(self._stop_event,),
+                                        name='expiry-engine', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if not self.running:
+            return
+        self._stop_event.set()
+        self._thread = None
+        self.queue.wake()
+
+    def track(self, instance):
+        if self.running:
+            self.queue.schedule((type(instance), instance.pk), due_at(instance.deadline))
+
+    def untrack(self, instance):
+        if self.running:
+            self.queue.cancel((type(instance), instance.pk))
+
+    def resync(self):
+        for model in self.models:
+            rows = (model.objects
+                    .filter(id__gt=self._last_seen[model])
+                    .order_by('id')
+                    .values_list('id', 'deadline'))
+            for pk, deadline in rows.iterator():
+                self.queue.schedule((model, pk), due_at(deadline))
+                self._last_seen[model] = pk
+
+            overdue = list(model.objects.filter(deadline__lt=date.today()).values_list('id', flat=True))
+            if overdue:
+                for pk in overdue:
+                    self.queue.cancel((model, pk))
+                expired = self.expire(model, overdue)
+                logger.info('Expired %d overdue %s', expired, model._meta.verbose_name_plural)
+
+    def _run(self, stop_event):
+        next_resync = time.monotonic() + self.resync_interval
+
+        while not stop_event.is_set():
+            keys = self.queue.wait_due(max(next_resync - time.monotonic(), 0))
+            if stop_event.is_set():
+                break
+
+            try:
+                due = defaultdict(list)
+                for model, pk in keys:
+                    due[model].append(pk)
+                for model, ids in due.items():
+                    expired = self.expire(model, ids)
+                    logger.info('Expired %d %s', expired, model._meta.verbose_name_plural)
+
+                if time.monotonic() >= next_resync:
+                    self.resync()
+                    next_resync = time.monotonic() + self.resync_interval
+            except Exception:
+                logger.exception('Expiry engine run failed')
+                retry_at = datetime.now() + timedelta(seconds=self.retry_delay)
+                for key in keys:
+                    self.queue.schedule(key, retry_at)
+            finally:
+                close_old_connections()
@@ -0,0 +1,90 @@
+from decimal import Decimal
+from rest_framework import serializers
+from core.degrees import catalog
+from core.images import variant
+from core.media import media_urls
+
+
+MINUTES_PER_HOUR = 60
+
+
+def minutes_to_hours(minutes):
+    return Decimal(minutes) / MINUTES_PER_HOUR
+
+def hours_to_minutes(hours):
+    minutes = hours * MINUTES_PER_HOUR
+    if minutes != int(minutes):
+        raise serializers.ValidationError(f'{hours} is not an allowed value')
+    return int(minutes)
+
+
+class HoursField(serializers.DecimalField):
+    """
+    Time is stored as whole minutes but the API reads and writes it as
+    decimal hours with two decimal places. Validators run on the minutes.
+    """
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault('max_digits', 6)
+        kwargs.setdefault('decimal_places', 2)
+        super().__init__(**kwargs)
+
+    def to_internal_value(self, data):
+        return hours_to_minutes(super().to_internal_value(data))
+
+    def to_representation(self, value):
+        return super().to_representation(minutes_to_hours(value))
+
+
+def media_url(name, request=None):
+    """
+    The URL core.media hands out for the stored file name, which is signed
+    at most once per key and epoch.
+    """
+    if not name:
+        return None
+    url = media_urls.url(name)
+    return request.build_absolute_uri(url) if request is not None else url
+
+
+class ProfileImageField(serializers.Field):
+    """
+    A student's profile image, read-only, as the URL of its smallest
+    variant at least `width` pixels wide. Images are uploaded through
+    core.images instead.
+    """
+
+    def __init__(self, width, **kwargs):
+        self.width = width
+        kwargs['source'] = '*'
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, student):
+        name = variant(student.profile_image.name, student.profile_image_sizes, self.width)
+        return media_url(name, self.context.get('request', None))
+
+
+class DegreeField(serializers.Field):
+    """
+    A degree of the catalog, read and written as its code. Codes are looked
+    up in the catalog core.degrees keeps in memory rather than queried.
+    """
+
+    default_error_messages = {
+        'invalid_choice': '"{input}" is not a valid choice.'
+    }
+
+    def to_internal_value(self, data):
+        if isinstance(data, int) and not isinstance(data, bool):
+            code = data
+        elif isinstance(data, str) and data.strip().isascii() and data.strip().isdigit():
+            code = int(data)
+        else:
+            code = None
+        if code not in catalog.get().names:
+            self.fail('invalid_choice', input=data)
+        return code
+
+    def to_representation(self, code):
+        return str(code)
@@ -0,0 +1,42 @@
+from collections import namedtuple
+from rest_framework.exceptions import ValidationError
+
+
+class Fieldset(namedtuple('Fieldset', ('fields', 'expand'))):
+    """
+    The fields a client asked for with ?fields=, None meaning all of them,
+    and the nested relations to render in full with ?expand=, None meaning
+    all of them. Relations left out of expand are rendered as primary keys.
+    """
+
+    def includes(self, name):
+        return self.fields is None or name in self.fields
+
+    def expands(self, name):
+        return self.includes(name) and (self.expand is None or name in self.expand)
+
+
+ALL = Fieldset(None, None)
+
+
+def parse_names(request, param, valid):
+    value = request.query_params.get(param)
+    if value is None:
+        return None
+
+    names = frozenset(name.strip() for name in value.split(',') if name.strip())
+    unknown = names - set(valid)
+    if unknown:
+        raise ValidationError({param: f'Unknown fields: {", ".join(sorted(unknown))}. '
+                                      f'Valid fields are: {", ".join(valid)}'})
+    return names
+
+def get_fieldset(request, serializer_class):
+    """
+    The Fieldset requested for serializer_class, whose Meta.fields and
+    expandable_fields are the valid names. Only reads can be sparse.
+    """
+    if request is None or request.method not in ('GET', 'HEAD'):
+        return ALL
+    return Fieldset(parse_names(request, 'fields', serializer_class.Meta.fields),
+                    parse_names(request, 'expand', serializer_class.expandable_fields))
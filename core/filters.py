@@ -0,0 +1,49 @@
+from django.db.models import Count
+
+from core.models import Competence
+
+
+RequestCompetence = Competence.collaboration_requests.through
+
+
+def filter_collaboration_requests(queryset, filters):
+    """
+    Applies the validated CollaborationRequestFilterSerializer filters but
+    the competences, which with_competences applies so the competence
+    facets can be counted without them.
+    """
+    if 'min_requested_time' in filters:
+        queryset = queryset.filter(requested_minutes__gte=filters['min_requested_time'])
+    if 'max_requested_time' in filters:
+        queryset = queryset.filter(requested_minutes__lte=filters['max_requested_time'])
+    if 'deadline_after' in filters:
+        queryset = queryset.filter(deadline__gte=filters['deadline_after'])
+    if 'deadline_before' in filters:
+        queryset = queryset.filter(deadline__lte=filters['deadline_before'])
+    return queryset
+
+def with_competences(queryset, competence_ids):
+    """
+    Requests asking for any of competence_ids, through a semi-join on the
+    (competence, request) index so requests matching several of them are
+    not repeated.
+    """
+    if not competence_ids:
+        return queryset
+    return queryset.filter(id__in=RequestCompetence.objects
+                           .filter(competence_id__in=competence_ids)
+                           .values('collaborationrequest_id'))
+
+def competence_facets(queryset):
+    """
+    [{id, name, count}] with how many of the requests in queryset ask for
+    each competence, most common first, in one aggregate query.
+    """
+    return [
+        {'id': competence_id, 'name': name, 'count': count}
+        for competence_id, name, count in RequestCompetence.objects
+        .filter(collaborationrequest_id__in=queryset.values('id'))
+        .values_list('competence_id', 'competence__name')
+        .annotate(count=Count('collaborationrequest_id'))
+        .order_by('-count', 'competence_id')
+    ]
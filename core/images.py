@@ -0,0 +1,253 @@
+"""
+Profile images uploaded straight to storage and resized in the background,
+so that neither their bytes nor Pillow go through a request thread.
+
+1. start_upload() reserves a key and presigned_put() tells the client how
+   to PUT the image there: a presigned S3 URL, or a signed URL of
+   UploadTargetView for other storages.
+2. Once the client has uploaded it, complete() queues the upload.
+3. The worker checks the image, stores a WebP variant of it for each of
+   PROFILE_IMAGE_SIZES and points the student at them. Serializers then
+   ask variant() for the smallest one that fits where it is shown.
+
+The worker runs in the app process unless IMAGE_WORKER_IN_PROCESS is off,
+in which case `manage.py process_images --loop` does the resizing.
+"""
+
+import io
+import logging
+import posixpath
+import uuid
+from collections import namedtuple
+from datetime import timedelta
+from django.conf import settings
+from django.core import signing
+from django.core.files import File
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.urls import reverse
+from django.utils import timezone
+from PIL import Image, ImageOps
+from rest_framework.exceptions import ValidationError
+from storages.backends.s3boto3 import S3Boto3Storage
+
+from core.models import ImageUpload, Student
+from core.workers import Worker
+
+
+logger = logging.getLogger(__name__)
+
+PROFILE_IMAGE_SIZES = (96, 256, 1024)
+# The widths profile images are shown at: next to a name, and on a profile.
+AVATAR_WIDTH = 96
+PROFILE_WIDTH = 256
+CONTENT_TYPES = {'image/jpeg': 'jpg', 'image/png': 'png', 'image/webp': 'webp', 'image/gif': 'gif'}
+FORMATS = ('JPEG', 'PNG', 'WEBP', 'GIF')
+MAX_UPLOAD_SIZE = getattr(settings, 'PROFILE_IMAGE_MAX_UPLOAD_SIZE', 10 * 1024 * 1024)
+MAX_PIXELS = 40 * 1000 * 1000
+WEBP_QUALITY = 80
+UPLOAD_EXPIRE = 900
+UPLOAD_SALT = 'core.images.upload'
+
+BATCH_SIZE = 10
+MAX_ATTEMPTS = 3
+RETRY_DELAY = 30
+PROCESSING_TIMEOUT = 300
+POLL_INTERVAL = 60
+
+DrainStats = namedtuple('DrainStats', ('ready', 'retried', 'failed'))
+
+
+class InvalidImage(Exception):
+    """
+    The uploaded file is not an image that can be used, so processing it
+    again would not help.
+    """
+
+
+def variant_name(directory, size):
+    return f'{directory}/{size}.webp'
+
+def variant(name, sizes, width):
+    """
+    The name of the smallest variant of the image `name` at least `width`
+    pixels wide, or of the largest one if none is. Images stored before
+    variants existed have none and are used as they are.
+    """
+    if not name or not sizes:
+        return name
+    sizes = sorted(int(size) for size in sizes.split(','))
+    return variant_name(posixpath.dirname(name), next((size for size in sizes if size >= width), sizes[-1]))
+
+def start_upload(student, content_type):
+    return ImageUpload.objects.create(student=student, content_type=content_type,
+                                      key=f'uploads/{uuid.uuid4().hex}.{CONTENT_TYPES[content_type]}')
+
+def presigned_put(upload, request):
+    """
+    How the client uploads the image for upload: a PUT of its bytes with
+    the given headers to url, within expires_in seconds.
+    """
+    storage = default_storage
+    if isinstance(storage, S3Boto3Storage):
+        url = storage.bucket.meta.client.generate_presigned_url('put_object', Params={
+            'Bucket': storage.bucket_name,
+            'Key': posixpath.join(storage.location, upload.key),
+            'ContentType': upload.content_type,
+        }, ExpiresIn=UPLOAD_EXPIRE, HttpMethod='PUT')
+    else:
+        token = signing.dumps(upload.pk, salt=UPLOAD_SALT)
+        url = request.build_absolute_uri(reverse('core:upload-target', args=[token]))
+
+    return {'method': 'PUT', 'url': url, 'headers': {'Content-Type': upload.content_type}, 'expires_in': UPLOAD_EXPIRE}
+
+def receive(token, stream):
+    """
+    Stores the body of a PUT to the URL presigned_put() gave out for
+    storages that cannot presign uploads themselves. The body is streamed
+    to storage, never read whole.
+    """
+    upload = ImageUpload.objects.get(pk=signing.loads(token, salt=UPLOAD_SALT, max_age=UPLOAD_EXPIRE),
+                                     status=ImageUpload.CREATED)
+    replace(default_storage, upload.key, File(stream))
+    return upload
+
+def complete(upload):
+    if upload.status not in (ImageUpload.CREATED, ImageUpload.PENDING):
+        raise ValidationError('This upload has already been processed')
+    if not default_storage.exists(upload.key):
+        raise ValidationError('The image has not been uploaded yet')
+
+    upload.status = ImageUpload.PENDING
+    upload.next_attempt_at = timezone.now()
+    upload.save(update_fields=['status', 'next_attempt_at'])
+    if getattr(settings, 'IMAGE_WORKER_IN_PROCESS', True):
+        transaction.on_commit(worker.kick)
+
+def drain(batch_size=BATCH_SIZE):
+    """
+    Processes up to batch_size pending uploads. They are leased for
+    PROCESSING_TIMEOUT seconds rather than kept locked while images are
+    resized, so the ones a crashed worker leaves behind are picked up
+    again. Failures are retried with exponential backoff up to
+    MAX_ATTEMPTS times, invalid images are not.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        batch = list(ImageUpload.objects
+                     .select_for_update(skip_locked=True)
+                     .filter(status=ImageUpload.PENDING, next_attempt_at__lte=now)
+                     .order_by('next_attempt_at', 'id')[:batch_size])
+        ImageUpload.objects.filter(pk__in=[upload.pk for upload in batch]).update(
+            next_attempt_at=now + timedelta(seconds=PROCESSING_TIMEOUT)
+        )
+
+    ready, retried, failed = 0, 0, 0
+    for upload in batch:
+        upload.attempts += 1
+        try:
+            process(upload)
+        except Exception as exc:
+            upload.last_error = repr(exc)
+            if isinstance(exc, InvalidImage) or upload.attempts >= MAX_ATTEMPTS:
+                upload.status = ImageUpload.FAILED
+                failed += 1
+                logger.error('Image upload %d failed after %d attempts: %s', upload.pk, upload.attempts, exc)
+            else:
+                upload.next_attempt_at = timezone.now() + timedelta(seconds=RETRY_DELAY * 2 ** (upload.attempts - 1))
+                retried += 1
+            upload.save(update_fields=['status', 'attempts', 'last_error', 'next_attempt_at'])
+        else:
+            ready += 1
+
+    stats = DrainStats(ready=ready, retried=retried, failed=failed)
+    if batch:
+        logger.info('Processed %d profile images (%d retried, %d failed)', stats.ready, stats.retried, stats.failed)
+    return stats
+
+def drain_all(batch_size=BATCH_SIZE):
+    total = DrainStats(ready=0, retried=0, failed=0)
+    while True:
+        stats = drain(batch_size)
+        total = DrainStats(*(a + b for a, b in zip(total, stats)))
+        if sum(stats) < batch_size:
+            return total
+
+def process(upload):
+    storage = default_storage
+    if storage.size(upload.key) > MAX_UPLOAD_SIZE:
+        raise InvalidImage(f'The image is larger than {MAX_UPLOAD_SIZE} bytes')
+
+    with storage.open(upload.key) as file:
+        image = load(file)
+
+    directory = posixpath.splitext(upload.key.replace('uploads/', 'profile/', 1))[0]
+    for size in PROFILE_IMAGE_SIZES:
+        replace(storage, variant_name(directory, size), ContentFile(webp(image, size)))
+
+    with transaction.atomic():
+        student = Student.objects.select_for_update().get(pk=upload.student_id)
+        student.profile_image = variant_name(directory, max(PROFILE_IMAGE_SIZES))
+        student.profile_image_sizes = ','.join(str(size) for size in sorted(PROFILE_IMAGE_SIZES))
+        student.save(update_fields=['profile_image', 'profile_image_sizes'])
+
+        upload.status = ImageUpload.READY
+        upload.last_error = ''
+        upload.processed_at = timezone.now()
+        upload.save(update_fields=['status', 'attempts', 'last_error', 'processed_at'])
+
+    storage.delete(upload.key)
+
+def replace(storage, name, content):
+    # Media storages never overwrite, they would save under another name.
+    if storage.exists(name):
+        storage.delete(name)
+    storage.save(name, content)
+
+def load(file):
+    """
+    The decoded image in file, upright and in RGB or RGBA. JPEGs are
+    decoded straight at the smallest scale that still covers the largest
+    variant, which keeps big photos from being decoded in full.
+    """
+    try:
+        image = Image.open(file)
+        if image.format not in FORMATS:
+            raise InvalidImage(f'{image.format} images are not supported')
+        if image.width * image.height > MAX_PIXELS:
+            raise InvalidImage(f'The image has more than {MAX_PIXELS} pixels')
+        image.draft('RGB', (max(PROFILE_IMAGE_SIZES),) * 2)
+        image.load()
+    except (OSError, SyntaxError, Image.DecompressionBombError) as exc:
+        raise InvalidImage(f'The file is not a valid image: {exc}')
+
+    image = ImageOps.exif_transpose(image)
+    if image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA' if 'A' in image.getbands() or 'transparency' in image.info else 'RGB')
+    return image
+
+def webp(image, size):
+    thumbnail = image.copy()
+    thumbnail.thumbnail((size, size), Image.LANCZOS)
+    buffer = io.BytesIO()
+    thumbnail.save(buffer, 'WEBP', quality=WEBP_QUALITY)
+    return buffer.getvalue()
+
+
+class ImageWorker(Worker):
+    """
+    Processes uploads whenever a transaction that completed one commits.
+    """
+
+    name = 'image-worker'
+
+    def __init__(self, batch_size=BATCH_SIZE, poll_interval=POLL_INTERVAL):
+        super().__init__(poll_interval)
+        self.batch_size = batch_size
+
+    def drain(self):
+        drain_all(self.batch_size)
+
+
+worker = ImageWorker()
@@ -0,0 +1,92 @@
+import logging
+import os
+import socket
+import time
+import uuid
+from datetime import timedelta
+from django.db.models import Q
+from django.utils import timezone
+
+from core.models import SchedulerLease
+
+
+logger = logging.getLogger(__name__)
+
+
+class LeaderElection:
+    """
+    Lease based leader election on top of a database row.
+
+    Every process calls heartbeat() periodically. The process that owns a
+    non-expired lease renews it, the rest stand by and take the lease over
+    once it expires because its owner stopped renewing it.
+
+    A leader only trusts its lease until ttl seconds after it last renewed
+    it, measured on its own monotonic clock, and steps down as soon as a
+    renewal fails. Otherwise a leader cut off from the database would keep
+    running its jobs while another process takes the lease over.
+    """
+
+    def __init__(self, name, ttl=30, on_elected=None, on_revoked=None):
+        self.name = name
+        self.ttl = ttl
+        self.on_elected = on_elected
+        self.on_revoked = on_revoked
+        self.identity = f'{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}'
+        self.is_leader = False
+        self.lease_deadline = 0
+
+    def heartbeat(self):
+        started = time.monotonic()
+        try:
+            acquired = self._try_acquire()
+            if not acquired:
+                SchedulerLease.objects.get_or_create(name=self.name, defaults={'expires_at': timezone.now()})
+                acquired = self._try_acquire()
+        except Exception:
+            logger.exception('%s could not renew the lease of %s', self.identity, self.name)
+            acquired = False
+
+        if acquired:
+            self.lease_deadline = started + self.ttl
+            if not self.is_leader:
+                logger.info('%s elected leader of %s', self.identity, self.name)
+                self.is_leader = True
+                if self.on_elected:
+                    self.on_elected()
+        elif self.is_leader:
+            logger.warning('%s lost leadership of %s', self.identity, self.name)
+            self._revoke()
+
+        return self.is_leader
+
+    def holds_lease(self):
+        """
+        Whether this process is the leader and its lease has not expired
+        since it last renewed it. An expired one revokes the leadership.
+        """
+        if self.is_leader and time.monotonic() >= self.lease_deadline:
+            logger.warning('%s let the lease of %s expire', self.identity, self.name)
+            self._revoke()
+        return self.is_leader
+
+    def resign(self):
+        if self.is_leader:
+            SchedulerLease.objects.filter(name=self.name, owner=self.identity).update(
+                owner='', expires_at=timezone.now()
+            )
+            self._revoke()
+
+    def _revoke(self):
+        self.is_leader = False
+        self.lease_deadline = 0
+        if self.on_revoked:
+            self.on_revoked()
+
+    def _try_acquire(self):
+        now = timezone.now()
+        updated = (SchedulerLease.objects
+                   .filter(name=self.name)
+                   .filter(Q(owner=self.identity) | Q(expires_at__lt=now))
+                   .update(owner=self.identity, expires_at=now + timedelta(seconds=self.ttl)))
+        return updated == 1
@@ -0,0 +1,111 @@
+from collections import defaultdict
+from django.db import transaction
+from django.db.models import F, IntegerField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+from core.models import Student, TimeEntry
+from core import response_cache
+
+
+class InsufficientTime(Exception):
+    pass
+
+
+def reference(instance):
+    return f'{instance._meta.label_lower}:{instance.pk}'
+
+def open_account(student):
+    TimeEntry.objects.create(student=student, minutes=student.available_minutes or 0, kind=TimeEntry.OPENING)
+
+@transaction.atomic
+def debit(student_id, minutes, kind=TimeEntry.RESERVE, ref=''):
+    """
+    Takes minutes from the student's balance with a conditional UPDATE, so
+    concurrent debits never lose updates nor overdraw the account, and
+    records the entry. Raises InsufficientTime when the balance is short.
+    """
+    debited = (Student.objects
+               .filter(pk=student_id, available_minutes__gte=minutes)
+               .update(available_minutes=F('available_minutes') - minutes))
+    if not debited:
+        raise InsufficientTime(f'Student {student_id} has less than {minutes} minutes available')
+
+    # Balances change through UPDATEs, which send no signals.
+    response_cache.invalidate(response_cache.STUDENT, (student_id,))
+    return TimeEntry.objects.create(student_id=student_id, minutes=-minutes, kind=kind, reference=ref)
+
+@transaction.atomic
+def credit(student_id, minutes, kind, ref=''):
+    Student.objects.filter(pk=student_id).update(available_minutes=F('available_minutes') + minutes)
+    response_cache.invalidate(response_cache.STUDENT, (student_id,))
+    return TimeEntry.objects.create(student_id=student_id, minutes=minutes, kind=kind, reference=ref)
+
+@transaction.atomic
+def credit_rows(queryset, student_field, kind):
+    """
+    Credits every student with the requested minutes of their rows in
+    queryset. The rows are locked first so two processes expiring the same
+    rows cannot credit them twice, and balances are updated with a single
+    set-based UPDATE.
+    """
+    rows = list(queryset.select_for_update().values_list('pk', student_field, 'requested_minutes'))
+    if not rows:
+        return 0
+
+    label = queryset.model._meta.label_lower
+    TimeEntry.objects.bulk_create([
+        TimeEntry(student_id=student_id, minutes=requested_minutes, kind=kind, reference=f'{label}:{pk}')
+        for pk, student_id, requested_minutes in rows
+    ])
+
+    totals = (queryset.model.objects
+              .filter(pk__in=[pk for pk, _, _ in rows], **{student_field: OuterRef('pk')})
+              .order_by()
+              .values(student_field)
+              .annotate(total=Sum('requested_minutes'))
+              .values('total'))
+    student_ids = {student_id for _, student_id, _ in rows}
+    Student.objects.filter(pk__in=student_ids).update(available_minutes=F('available_minutes') + Subquery(totals))
+    response_cache.invalidate(response_cache.STUDENT, student_ids)
+    return len(rows)
+
+def ledger_balances():
+    """
+    Students annotated with the balance derived from their ledger entries.
+    """
+    entries = (TimeEntry.objects
+               .filter(student=OuterRef('pk'))
+               .order_by()
+               .values('student')
+               .annotate(total=Sum('minutes'))
+               .values('total'))
+    return Student.objects.annotate(
+        ledger_balance=Coalesce(Subquery(entries, output_field=IntegerField()), Value(0))
+    )
+
+def reconcile(student_ids=None, fix=False):
+    """
+    Compares the cached balances with their ledgers in one query and
+    returns the mismatches as (student_id, cached, ledger) tuples. With fix
+    the cached balances are rewritten from the ledger.
+    """
+    balances = ledger_balances()
+    if student_ids is not None:
+        balances = balances.filter(pk__in=student_ids)
+
+    mismatches = [
+        (student_id, cached or 0, balance)
+        for student_id, cached, balance in balances.values_list('pk', 'available_minutes', 'ledger_balance')
+        if (cached or 0) != balance
+    ]
+
+    if fix and mismatches:
+        by_balance = defaultdict(list)
+        for student_id, _, balance in mismatches:
+            by_balance[balance].append(student_id)
+        with transaction.atomic():
+            for balance, student_ids in by_balance.items():
+                Student.objects.filter(pk__in=student_ids).update(available_minutes=balance)
+            response_cache.invalidate(response_cache.STUDENT, [student_id for student_id, _, _ in mismatches])
+
+    return mismatches
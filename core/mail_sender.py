@@ -1,15 +1,14 @@
 import os
-from django.core.mail import send_mail
+from core.outbox import enqueue
 
 
 def send(applicant, collaborator):
     applicant_name = applicant.full_name
     email = collaborator.user.email
 
-    send_mail(
+    enqueue(
         'Chronus: Aceptación de ofrecimiento de colaboración', 
         f'{applicant_name} acaba de aceptar tu ofrecimiento de colaboración.', 
         os.getenv('SENDGRID_USERNAME'), 
-        [email], 
-        fail_silently=False
+        [email]
     )
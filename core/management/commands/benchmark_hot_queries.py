@@ -0,0 +1,154 @@
+import random
+import time
+from datetime import date, timedelta
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from chat.models import Message
+from core.models import Collaboration, CollaborationRequest, OutboxEmail, Student, User
+
+
+# Indexes added for the hot queries and the ones they replaced, as
+# (table, name, columns, predicate).
+NEW_INDEXES = [
+    ('core_collaboration', 'core_collab_applica_531f53_idx', ('applicant_id', 'deadline', 'id'), None),
+    ('core_collaboration', 'core_collab_collabo_584e09_idx', ('collaborator_id', 'deadline', 'id'), None),
+    ('core_collaborationrequest', 'core_collab_applica_8d5cfc_idx', ('applicant_id', 'deadline', 'id'), None),
+    ('core_collaborationrequest_offerers', 'core_collaborationrequest_offerers_student_request_idx',
+     ('student_id', 'collaborationrequest_id'), None),
+    ('chat_message', 'chat_messag_collabo_dcbbb0_idx', ('collaboration_id', 'timestamp', 'id'), None),
+    ('core_outboxemail', 'core_outbox_pending_idx', ('next_attempt_at', 'id'), "status = 'PE'"),
+]
+OLD_INDEXES = [
+    ('core_collaboration', 'benchmark_collaboration_applicant', ('applicant_id',), None),
+    ('core_collaboration', 'benchmark_collaboration_collaborator', ('collaborator_id',), None),
+    ('core_collaborationrequest', 'benchmark_collaborationrequest_applicant', ('applicant_id',), None),
+    ('chat_message', 'benchmark_message_collaboration', ('collaboration_id',), None),
+    ('core_outboxemail', 'benchmark_outboxemail_status', ('status', 'next_attempt_at'), None),
+]
+
+
+class Command(BaseCommand):
+    help = ('Seeds collaborations, requests, messages and emails inside a transaction that is rolled back '
+            'and shows the plan and latency of each hot query with the previous and the current indexes')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--students', type=int, default=2000)
+        parser.add_argument('--rows', type=int, default=20000,
+                            help='Collaborations, requests and sent emails; messages are five times as many')
+        parser.add_argument('--repeat', type=int, default=50)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        with transaction.atomic():
+            student_ids = self.seed(rng, options['students'], options['rows'])
+            picks = [(rng.choice(student_ids), rng.randrange(options['rows'])) for _ in range(options['repeat'])]
+
+            after = {name: self.measure(new or old, picks) for name, old, new in self.queries()}
+            self.swap(NEW_INDEXES, OLD_INDEXES)
+            before = {name: self.measure(old, picks) for name, old, _ in self.queries()}
+            transaction.set_rollback(True)
+
+        for name, _, _ in self.queries():
+            self.stdout.write(self.style.MIGRATE_HEADING(name))
+            for label, (plan, p50) in (('before', before[name]), ('after', after[name])):
+                self.stdout.write(f'  {label}: p50={p50:.2f}ms')
+                for line in plan.splitlines():
+                    self.stdout.write(f'    {line}')
+
+    def queries(self):
+        """
+        (name, before, after) with before and after building the query
+        for a (student_id, row) pick, after being None when the query is
+        unchanged and only its indexes are new.
+        """
+        today = date.today()
+        collaboration_id = lambda row: self.collaboration_ids[row % len(self.collaboration_ids)]
+        return [
+            ('Collaborations of a student',
+             lambda student, row: Collaboration.objects
+             .filter(Q(applicant=student) | Q(collaborator=student)).order_by('deadline', 'id')[:50],
+             lambda student, row: Collaboration.objects.of_student(student).order_by('deadline', 'id')[:50]),
+            ('Upcoming requests of an applicant',
+             lambda student, row: CollaborationRequest.objects
+             .filter(applicant=student, deadline__gte=today).order_by('deadline', 'id')[:50],
+             None),
+            ('Upcoming requests offered to by a student',
+             lambda student, row: CollaborationRequest.objects
+             .filter(offerers=student, deadline__gte=today).order_by('deadline', 'id')[:50],
+             None),
+            ('Message timeline',
+             lambda student, row: Message.objects
+             .filter(collaboration=collaboration_id(row)).order_by('timestamp', 'id')[:50],
+             None),
+            ('Pending emails',
+             lambda student, row: OutboxEmail.objects
+             .filter(status=OutboxEmail.PENDING, next_attempt_at__lte=timezone.now())
+             .order_by('next_attempt_at', 'id')[:50],
+             None),
+        ]
+
+    def measure(self, query, picks):
+        timings = []
+        for student, row in picks:
+            queryset = query(student, row)
+            started = time.perf_counter()
+            list(queryset)
+            timings.append((time.perf_counter() - started) * 1000)
+        return query(*picks[0]).explain(), sorted(timings)[len(timings) // 2]
+
+    def swap(self, dropped, created):
+        with connection.cursor() as cursor:
+            for _, name, _, _ in dropped:
+                cursor.execute(f'DROP INDEX {connection.ops.quote_name(name)}')
+            for table, name, columns, predicate in created:
+                columns = ', '.join(connection.ops.quote_name(column) for column in columns)
+                where = f' WHERE {predicate}' if predicate else ''
+                cursor.execute(f'CREATE INDEX {connection.ops.quote_name(name)} '
+                               f'ON {connection.ops.quote_name(table)} ({columns}){where}')
+            cursor.execute('ANALYZE')
+
+    def seed(self, rng, students, rows):
+        today = date.today()
+        User.objects.bulk_create(User(email=f'benchmark-hot-{i}@chronus.test') for i in range(students))
+        users = list(User.objects.filter(email__startswith='benchmark-hot-').values_list('pk', flat=True))
+        Student.objects.bulk_create(Student(user_id=user_id) for user_id in users)
+
+        deadline = lambda: today + timedelta(days=rng.randint(-30, 60))
+        Collaboration.objects.bulk_create(
+            Collaboration(title='Benchmark', requested_minutes=60, deadline=deadline(),
+                          applicant_id=applicant, collaborator_id=collaborator)
+            for applicant, collaborator in (rng.sample(users, 2) for _ in range(rows))
+        )
+        self.collaboration_ids = list(Collaboration.objects.filter(title='Benchmark').values_list('pk', flat=True))
+
+        CollaborationRequest.objects.bulk_create(
+            CollaborationRequest(title='Benchmark', requested_minutes=60, deadline=deadline(),
+                                 applicant_id=rng.choice(users))
+            for _ in range(rows)
+        )
+        Offer = CollaborationRequest.offerers.through
+        Offer.objects.bulk_create(
+            Offer(collaborationrequest_id=request_id, student_id=student_id)
+            for request_id in CollaborationRequest.objects.filter(title='Benchmark').values_list('pk', flat=True)
+            for student_id in rng.sample(users, rng.randint(0, 3))
+        )
+
+        now = timezone.now()
+        Message.objects.bulk_create(
+            Message(text='Benchmark', read=True, timestamp=now - timedelta(minutes=rng.randint(0, 100000)),
+                    sender_id=rng.choice(users), collaboration_id=rng.choice(self.collaboration_ids))
+            for _ in range(rows * 5)
+        )
+        OutboxEmail.objects.bulk_create(
+            OutboxEmail(subject='Benchmark', body='', recipient='benchmark@chronus.test',
+                        status=OutboxEmail.SENT if i >= rows // 100 else OutboxEmail.PENDING,
+                        next_attempt_at=now - timedelta(minutes=rng.randint(0, 100000)))
+            for i in range(rows)
+        )
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        return users
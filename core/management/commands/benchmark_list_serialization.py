@@ -0,0 +1,119 @@
+import random
+import time
+from datetime import date, timedelta
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Prefetch
+from django.test import RequestFactory
+from rest_framework.renderers import JSONRenderer
+
+from core import rows
+from core.fieldsets import Fieldset
+from core.models import CollaborationRequest, Competence, Student, User
+from core.renderers import FastJSONRenderer
+from core.serializers import CollaborationRequestSerializer
+
+
+class Command(BaseCommand):
+    help = ('Seeds collaboration requests inside a transaction that is rolled back and compares the rows per '
+            'second of the serializer, the values() list path and a sparse fieldset of it')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=5000)
+        parser.add_argument('--students', type=int, default=500)
+        parser.add_argument('--page-size', type=int, default=200)
+        parser.add_argument('--repeat', type=int, default=3)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--fields', default='id,title,deadline',
+                            help='The ?fields= of the sparse list, as a mobile card list would ask for')
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        request = RequestFactory().get('/api/v1/collaboration-requests/')
+        page_size = options['page_size']
+        fieldset = Fieldset(frozenset(options['fields'].split(',')), frozenset())
+
+        with transaction.atomic():
+            self.seed(rng, options['students'], options['requests'])
+            queryset = (CollaborationRequest.objects
+                        .select_related('applicant__user')
+                        .prefetch_related(
+                            Prefetch('competences', queryset=Competence.objects.order_by('id')),
+                            Prefetch('offerers', queryset=Student.objects.select_related('user').order_by('pk')),
+                        )
+                        .order_by('id'))
+            ids = list(queryset.values_list('id', flat=True))
+            pages = [(ids[i], ids[min(i + page_size, len(ids)) - 1]) for i in range(0, len(ids), page_size)]
+
+            def serializer(first, last):
+                page = queryset.filter(id__range=(first, last))
+                data = CollaborationRequestSerializer(page, many=True, context={'request': request}).data
+                return JSONRenderer().render(data)
+
+            def values(first, last):
+                page = rows.values(queryset.filter(id__range=(first, last)), rows.COLLABORATION_REQUEST_FIELDS)
+                return FastJSONRenderer().render(rows.collaboration_requests(list(page), request))
+
+            def sparse(first, last):
+                page = rows.values(queryset.filter(id__range=(first, last)), rows.collaboration_request_fields(fieldset))
+                return FastJSONRenderer().render(rows.collaboration_requests(list(page), request, fieldset))
+
+            for first, last in pages:
+                if serializer(first, last) != values(first, last):
+                    raise CommandError(f'The paths differ on the page of ids {first} to {last}')
+
+            slow = self.time(serializer, pages, options['repeat'])
+            fast = self.time(values, pages, options['repeat'])
+            sparsest = self.time(sparse, pages, options['repeat'])
+            full_size = sum(len(values(first, last)) for first, last in pages)
+            sparse_size = sum(len(sparse(first, last)) for first, last in pages)
+            transaction.set_rollback(True)
+
+        count = len(ids)
+        self.stdout.write(f'{count} requests in pages of {page_size}, identical output:')
+        self.stdout.write(f'  serializer: {count / slow:,.0f} rows/s')
+        self.stdout.write(f'  values():   {count / fast:,.0f} rows/s ({slow / fast:.1f}x), {full_size / count:,.0f} B/row')
+        self.stdout.write(f'  ?fields={options["fields"]}: {count / sparsest:,.0f} rows/s ({slow / sparsest:.1f}x), '
+                          f'{sparse_size / count:,.0f} B/row')
+
+    def time(self, func, pages, repeat):
+        best = None
+        for _ in range(repeat):
+            started = time.perf_counter()
+            for first, last in pages:
+                func(first, last)
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        return best
+
+    def seed(self, rng, students, requests):
+        User.objects.bulk_create(User(email=f'benchmark-rows-{i}@chronus.test', first_name=f'Nombre {i}',
+                                      last_name='Apellido') for i in range(students))
+        users = list(User.objects.filter(email__startswith='benchmark-rows-').values_list('pk', flat=True))
+        Student.objects.bulk_create(
+            Student(user_id=user_id, profile_image=f'profile/{user_id}.png' if rng.random() < 0.5 else '',
+                    accumulated_rating=rng.randint(0, 50), rating_count=rng.randint(1, 10))
+            for user_id in users
+        )
+        Competence.objects.bulk_create(Competence(name=f'Benchmark {i}') for i in range(20))
+        competences = list(Competence.objects.filter(name__startswith='Benchmark ').values_list('pk', flat=True))
+
+        CollaborationRequest.objects.bulk_create(
+            CollaborationRequest(title='Ayuda con el proyecto', description='Necesito ayuda ' * rng.randint(1, 20),
+                                 requested_minutes=15 * rng.randint(1, 16), applicant_id=rng.choice(users),
+                                 deadline=date.today() + timedelta(days=rng.randint(0, 60)))
+            for _ in range(requests)
+        )
+        request_ids = list(CollaborationRequest.objects
+                           .filter(title='Ayuda con el proyecto')
+                           .values_list('pk', flat=True))
+        RequestCompetence = CollaborationRequest.competences.through
+        RequestCompetence.objects.bulk_create(
+            RequestCompetence(collaborationrequest_id=request_id, competence_id=competence_id)
+            for request_id in request_ids for competence_id in rng.sample(competences, rng.randint(0, 3))
+        )
+        Offer = CollaborationRequest.offerers.through
+        Offer.objects.bulk_create(
+            Offer(collaborationrequest_id=request_id, student_id=student_id)
+            for request_id in request_ids for student_id in rng.sample(users, rng.randint(0, 4))
+        )
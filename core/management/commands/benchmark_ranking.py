@@ -0,0 +1,79 @@
+import random
+import time
+import numpy as np
+from django.core.management.base import BaseCommand, CommandError
+
+from core.ranking import (COMPETENCE_WEIGHT, DEGREE_WEIGHT, RATING_WEIGHT, TIME_WEIGHT,
+                          Candidates, Degrees, bitsets, score)
+
+
+class Command(BaseCommand):
+    help = 'Times the vectorized offerer ranking against a per-student loop on synthetic candidates'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--students', type=int, default=10000)
+        parser.add_argument('--competences', type=int, default=200)
+        parser.add_argument('--degrees', type=int, default=60)
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        count = options['students']
+        words = options['competences'] // 64 + 1
+
+        competences = [rng.sample(range(options['competences']), rng.randint(0, 8)) for _ in range(count)]
+        degrees = [(row, rng.randrange(options['degrees']), rng.random() < 0.3, rng.randint(1, 6))
+                   for row in range(count) for _ in range(rng.randint(1, 2))]
+        candidates = Candidates(
+            student_ids=np.arange(count),
+            competences=bitsets([row for row, ids in enumerate(competences) for _ in ids],
+                                [id for ids in competences for id in ids], count, words),
+            accumulated_rating=np.array([rng.randint(0, 50) for _ in range(count)], dtype=np.float64),
+            rating_count=np.array([rng.randint(0, 10) for _ in range(count)], dtype=np.float64),
+            available_minutes=np.array([15 * rng.randint(0, 40) for _ in range(count)], dtype=np.float64),
+            degrees=Degrees(
+                rows=np.array([row for row, *_ in degrees], dtype=np.intp),
+                names=np.array([name for _, name, _, _ in degrees], dtype=np.int64),
+                finished=np.array([finished for _, _, finished, _ in degrees], dtype=bool),
+                grades=np.array([grade for *_, grade in degrees], dtype=np.int64),
+            )
+        )
+        requested = rng.sample(range(options['competences']), 3)
+        request_competences = bitsets([0] * len(requested), requested, 1, words)[0]
+        degree = (rng.randrange(options['degrees']), 3)
+
+        vectorized = self.time(options['repeat'], lambda: score(candidates, request_competences, degree))
+        looped = self.time(max(options['repeat'] // 10, 1),
+                           lambda: self.loop(competences, degrees, candidates, requested, degree))
+
+        expected = self.loop(competences, degrees, candidates, requested, degree)
+        if not np.allclose(score(candidates, request_competences, degree), expected):
+            raise CommandError('Vectorized and looped scores differ')
+
+        self.stdout.write(f'{count} candidates: vectorized {vectorized:.2f}ms, '
+                          f'per-student loop {looped:.2f}ms ({looped / vectorized:.0f}x)')
+
+    def time(self, repeat, func):
+        started = time.perf_counter()
+        for _ in range(repeat):
+            func()
+        return (time.perf_counter() - started) * 1000 / repeat
+
+    def loop(self, competences, degrees, candidates, requested, degree):
+        by_student = {}
+        for row, name, finished, grade in degrees:
+            by_student.setdefault(row, []).append((name, finished, grade))
+
+        available = candidates.available_minutes.tolist()
+        top = max(max(available), 1)
+        scores = []
+        for row, ids in enumerate(competences):
+            match = len(set(ids) & set(requested)) / len(requested)
+            count = candidates.rating_count[row]
+            rating = round(candidates.accumulated_rating[row] / count * 2) / 2 / 5 if count else 0
+            affinity = max([1.0 if finished else 0.75 if grade >= degree[1] else 0.5
+                            for name, finished, grade in by_student.get(row, ()) if name == degree[0]] or [0])
+            scores.append(COMPETENCE_WEIGHT * match + RATING_WEIGHT * rating +
+                          DEGREE_WEIGHT * affinity + TIME_WEIGHT * available[row] / top)
+        return np.array(scores)
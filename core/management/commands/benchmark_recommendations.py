@@ -0,0 +1,44 @@
+import random
+import time
+from datetime import date, timedelta
+from django.core.management.base import BaseCommand
+
+from core.recommendations import RecommendationIndex
+
+
+class Command(BaseCommand):
+    help = 'Times the recommendation index over synthetic open collaboration requests'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=100000)
+        parser.add_argument('--competences', type=int, default=200)
+        parser.add_argument('--student-competences', type=int, default=5)
+        parser.add_argument('--queries', type=int, default=200)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        today = date.today()
+
+        rows, links = [], []
+        for request_id in range(1, options['requests'] + 1):
+            rows.append((request_id, rng.randint(1, 10000), today + timedelta(days=rng.randint(0, 60)),
+                         15 * rng.randint(1, 16)))
+            links.extend((request_id, competence_id)
+                         for competence_id in rng.sample(range(options['competences']), rng.randint(1, 3)))
+
+        index = RecommendationIndex()
+        started = time.perf_counter()
+        index.build(rows, links)
+        self.stdout.write(f'Indexed {len(index)} requests in {(time.perf_counter() - started) * 1000:.0f}ms')
+
+        timings = []
+        for _ in range(options['queries']):
+            competences = rng.sample(range(options['competences']), options['student_competences'])
+            started = time.perf_counter()
+            index.recommend(rng.randint(1, 10000), competences, limit=20)
+            timings.append((time.perf_counter() - started) * 1000)
+
+        timings.sort()
+        self.stdout.write(f'{len(timings)} queries: p50={timings[len(timings) // 2]:.2f}ms '
+                          f'p99={timings[int(len(timings) * 0.99)]:.2f}ms max={timings[-1]:.2f}ms')
@@ -0,0 +1,81 @@
+import random
+import time
+from datetime import date, timedelta
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Q
+
+from core import search
+from core.models import CollaborationRequest, Student, User
+
+
+WORDS = ('ayuda proyecto clases matemáticas física química inglés francés programación python java '
+         'cálculo álgebra estadística historia economía derecho contabilidad redacción examen parcial '
+         'trabajo final práctica laboratorio informe presentación repaso ejercicios apuntes tutoría '
+         'conversación traducción diseño web base datos redes electrónica biología anatomía dibujo').split()
+# Word frequencies in real text roughly follow Zipf's law, which decides
+# how many rows a query matches and so how many of them have to be ranked.
+VOCABULARY = WORDS + [f'{word}{n}' for n in range(1, 100) for word in WORDS]
+FREQUENCIES = [1 / rank for rank in range(1, len(VOCABULARY) + 1)]
+
+
+class Command(BaseCommand):
+    help = ('Seeds collaboration requests inside a transaction that is rolled back and times full-text '
+            'searches against substring filtering')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=20000)
+        parser.add_argument('--queries', type=int, default=50)
+        parser.add_argument('--page-size', type=int, default=20)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        with transaction.atomic():
+            self.seed(rng, options['requests'])
+            queries = [' '.join(self.words(rng, rng.randint(1, 2))) for _ in range(options['queries'])]
+            page = options['page_size']
+
+            indexed = self.time(queries, lambda q: list(
+                search.search(CollaborationRequest.objects.all(), q).order_by('-rank', 'id')[:page]
+            ))
+            scanned = self.time(queries, lambda q: list(
+                CollaborationRequest.objects.filter(self.substring(q)).order_by('deadline', 'id')[:page]
+            ))
+            transaction.set_rollback(True)
+
+        self.stdout.write(f'{options["requests"]} requests, first page of {page}:')
+        for name, timings in (('full-text', indexed), ('substring', scanned)):
+            self.stdout.write(f'  {name}: p50={timings[len(timings) // 2]:.2f}ms '
+                              f'p99={timings[int(len(timings) * 0.99)]:.2f}ms')
+
+    def seed(self, rng, count):
+        student = Student.objects.create(user=User.objects.create_user('benchmark-search@chronus.test'))
+        CollaborationRequest.objects.bulk_create([
+            CollaborationRequest(
+                title=' '.join(self.words(rng, 3)).capitalize(),
+                description=' '.join(self.words(rng, rng.randint(5, 30))),
+                requested_minutes=15 * rng.randint(1, 16),
+                deadline=date.today() + timedelta(days=rng.randint(0, 60)),
+                applicant=student
+            )
+            for _ in range(count)
+        ])
+        search.rebuild()
+
+    def words(self, rng, count):
+        return rng.choices(VOCABULARY, FREQUENCIES, k=count)
+
+    def substring(self, q):
+        condition = Q()
+        for word in search.terms(q):
+            condition &= Q(title__icontains=word) | Q(description__icontains=word)
+        return condition
+
+    def time(self, queries, func):
+        timings = []
+        for q in queries:
+            started = time.perf_counter()
+            func(q)
+            timings.append((time.perf_counter() - started) * 1000)
+        return sorted(timings)
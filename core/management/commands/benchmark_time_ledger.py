@@ -0,0 +1,118 @@
+import random
+import threading
+import time
+import uuid
+from datetime import date, timedelta
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connection, transaction
+
+from core import ledger
+from core.models import CollaborationRequest, Student, TimeEntry, User
+from core.schedule import expire
+
+
+class Command(BaseCommand):
+    help = ('Creates and expires collaboration requests for a few students from many threads and '
+            'checks that no time was lost or overdrawn')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=8)
+        parser.add_argument('--operations', type=int, default=200, help='Operations per thread')
+        parser.add_argument('--students', type=int, default=4)
+        parser.add_argument('--naive', action='store_true',
+                            help='Debit with a read-modify-write in Python, as before the ledger')
+
+    def handle(self, *args, **options):
+        students = self.create_students(options['students'])
+        initial = {student.pk: student.available_minutes for student in students}
+        counters = {'created': 0, 'rejected': 0, 'expired': 0, 'errors': 0}
+        lock = threading.Lock()
+
+        def worker():
+            created = []
+            try:
+                for _ in range(options['operations']):
+                    outcome = self.step(random.choice(students).pk, created, options['naive'])
+                    with lock:
+                        counters[outcome] += 1
+                while created:
+                    self.expire(created.pop())
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=worker) for _ in range(options['threads'])]
+        started = time.monotonic()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.monotonic() - started
+
+        try:
+            self.report(initial, counters, elapsed)
+        finally:
+            User.objects.filter(pk__in=initial).delete()
+
+    def step(self, student_id, created, naive):
+        try:
+            if created and random.random() < 0.5:
+                self.expire(created.pop(0))
+                return 'expired'
+
+            with transaction.atomic():
+                request = CollaborationRequest.objects.create(
+                    title='Benchmark', requested_minutes=15,
+                    deadline=date.today() - timedelta(days=1), applicant_id=student_id
+                )
+                if naive:
+                    student = Student.objects.get(pk=student_id)
+                    if student.available_minutes < request.requested_minutes:
+                        raise ledger.InsufficientTime()
+                    student.available_minutes -= request.requested_minutes
+                    student.save(update_fields=['available_minutes'])
+                    TimeEntry.objects.create(student_id=student_id, minutes=-request.requested_minutes,
+                                             kind=TimeEntry.RESERVE, reference=ledger.reference(request))
+                else:
+                    ledger.debit(student_id, request.requested_minutes, ref=ledger.reference(request))
+            created.append(request.pk)
+            return 'created'
+        except ledger.InsufficientTime:
+            return 'rejected'
+        except OperationalError:
+            return 'errors'
+
+    def expire(self, request_id):
+        # SQLite only allows one writer and fails busy transactions, retry
+        # them so every request is eventually refunded.
+        while True:
+            try:
+                expire(CollaborationRequest, [request_id])
+                return
+            except OperationalError:
+                time.sleep(0.01)
+
+    def create_students(self, count):
+        run = uuid.uuid4().hex[:8]
+        return [
+            Student.objects.create(
+                user=User.objects.create_user(f'benchmark-{run}-{index}@chronus.test'),
+                available_minutes=120
+            )
+            for index in range(count)
+        ]
+
+    def report(self, initial, counters, elapsed):
+        operations = sum(counters.values())
+        self.stdout.write(f'{operations} operations in {elapsed:.2f}s ({operations / elapsed:.0f} ops/s): ' +
+                          ' '.join(f'{key}={value}' for key, value in counters.items()))
+
+        balances = dict(Student.objects.filter(pk__in=initial).values_list('pk', 'available_minutes'))
+        mismatches = ledger.reconcile(student_ids=list(initial))
+        drifted = {pk: balance for pk, balance in balances.items() if balance != initial[pk]}
+
+        for student_id, cached, balance in mismatches:
+            self.stdout.write(f'student={student_id} cached={cached} ledger={balance}')
+        if mismatches or drifted:
+            raise CommandError(f'{len(drifted)} balances drifted from their initial value and '
+                               f'{len(mismatches)} do not match their ledger')
+        self.stdout.write('All balances were restored and match their ledger')
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from core import outbox
+
+
+class Command(BaseCommand):
+    help = 'Delivers the pending emails in the outbox and prints its metrics'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=outbox.BATCH_SIZE)
+        parser.add_argument('--metrics', action='store_true', help='Only print the queue metrics')
+
+    def handle(self, *args, **options):
+        if not options['metrics']:
+            stats = outbox.drain_all(options['batch_size'])
+            self.stdout.write(f'sent={stats.sent} retried={stats.retried} dead={stats.dead} '
+                              f'max_latency={stats.latency:.3f}s')
+
+        metrics = outbox.metrics()
+        self.stdout.write(' '.join(f'{key}={value}' for key, value in metrics.items()))
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from core import degrees
+
+
+class Command(BaseCommand):
+    help = 'Loads the degree catalog from a JSON file of {code: name}'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--file', default=degrees.DEGREES_FILE, help='Defaults to core/data/degrees.json')
+        parser.add_argument('--prune', action='store_true', help='Delete the degrees missing from the file')
+
+    def handle(self, *args, **options):
+        stats = degrees.sync(degrees.read_file(options['file']), prune=options['prune'])
+
+        self.stdout.write(f'{stats.created} created, {stats.updated} updated, {stats.deleted} deleted')
+        if stats.kept:
+            codes = ', '.join(str(code) for code in stats.kept)
+            if options['prune']:
+                self.stdout.write(f'Kept degrees still in use: {codes}')
+            else:
+                self.stdout.write(f'Degrees missing from the file: {codes} (--prune deletes them)')
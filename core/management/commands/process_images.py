@@ -0,0 +1,23 @@
+import time
+from django.core.management.base import BaseCommand
+
+from core import images
+
+
+class Command(BaseCommand):
+    help = ('Processes the pending profile image uploads, so that a dedicated process rather than the app '
+            'servers can resize them')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=images.BATCH_SIZE)
+        parser.add_argument('--loop', action='store_true', help='Keep polling for uploads')
+        parser.add_argument('--interval', type=float, default=5, help='Seconds between polls with --loop')
+
+    def handle(self, *args, **options):
+        while True:
+            stats = images.drain_all(options['batch_size'])
+            if stats.ready or stats.retried or stats.failed or not options['loop']:
+                self.stdout.write(f'ready={stats.ready} retried={stats.retried} failed={stats.failed}')
+            if not options['loop']:
+                return
+            time.sleep(options['interval'])
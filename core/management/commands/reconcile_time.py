@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core import ledger
+
+
+class Command(BaseCommand):
+    help = 'Checks every student available time against its time ledger'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--fix', action='store_true', help='Rewrite mismatching balances from the ledger')
+
+    def handle(self, *args, **options):
+        mismatches = ledger.reconcile(fix=options['fix'])
+
+        for student_id, cached, balance in mismatches:
+            self.stdout.write(f'student={student_id} cached={cached} ledger={balance}')
+
+        if mismatches and not options['fix']:
+            raise CommandError(f'{len(mismatches)} balances do not match their ledger')
+        self.stdout.write(f'{len(mismatches)} balances fixed' if mismatches else 'All balances match')
@@ -0,0 +1,136 @@
+"""
+Media URLs, such as profile images, signed at most once per object key and
+rotation epoch instead of once per rendered field.
+
+How URLs are made depends on the storage:
+- public ones (not S3, a custom domain or querystring_auth off) hand out
+  their plain URLs, which need no signing nor caching;
+- private S3 ones presign every key with SigV4;
+- with AWS_CLOUDFRONT_KEY_ID, AWS_CLOUDFRONT_KEY and AWS_CLOUDFRONT_DOMAIN,
+  one CloudFront policy is signed for the whole storage location and every
+  key reuses its signature.
+
+Signed URLs are handed out for one epoch of half AWS_QUERYSTRING_EXPIRE and
+expire at the end of the next one, so they stay valid at least one epoch
+after the last response carrying them. Cached responses include epoch() in
+their key for the same reason.
+"""
+
+import threading
+import time
+from datetime import datetime
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.files.storage import default_storage
+from django.core.signals import setting_changed
+from django.utils.encoding import filepath_to_uri
+from storages.backends.s3boto3 import S3Boto3Storage
+
+try:
+    from cryptography.hazmat.backends import default_backend
+    from cryptography.hazmat.primitives import hashes, serialization
+    from cryptography.hazmat.primitives.asymmetric import padding
+except ImportError:
+    serialization = None
+
+
+PUBLIC = 'public'
+S3 = 's3'
+CLOUDFRONT = 'cloudfront'
+
+MAX_CACHED_URLS = 50000
+
+
+class MediaURLs:
+
+    def __init__(self, storage=default_storage):
+        self.storage = storage
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.cached_epoch = None
+        self.signed = {}
+        self.cloudfront_query = None
+
+    @property
+    def mode(self):
+        if getattr(settings, 'AWS_CLOUDFRONT_KEY_ID', None):
+            return CLOUDFRONT
+        if (isinstance(self.storage, S3Boto3Storage) and self.storage.querystring_auth and
+                not self.storage.custom_domain):
+            return S3
+        return PUBLIC
+
+    @property
+    def rotation(self):
+        return max(getattr(settings, 'AWS_QUERYSTRING_EXPIRE', 3600) // 2, 1)
+
+    def epoch(self):
+        """
+        The current rotation epoch, always 0 for public storages.
+        """
+        return 0 if self.mode == PUBLIC else int(time.time() // self.rotation)
+
+    def url(self, name):
+        return self.urls((name,)).get(name)
+
+    def urls(self, names):
+        """
+        A dict with the URL of each of the non-empty names, signing only
+        the ones not signed yet this epoch.
+        """
+        names = set(filter(None, names))
+        mode = self.mode
+        if mode == PUBLIC:
+            return {name: self.storage.url(name) for name in names}
+
+        epoch = self.epoch()
+        with self.lock:
+            if epoch != self.cached_epoch or len(self.signed) > MAX_CACHED_URLS:
+                self.reset()
+                self.cached_epoch = epoch
+
+            if mode == CLOUDFRONT:
+                return self.cloudfront_urls(names, epoch)
+
+            missing = names - self.signed.keys()
+            if missing:
+                expires_in = int((epoch + 2) * self.rotation - time.time())
+                for name in missing:
+                    self.signed[name] = self.storage.url(name, expire=expires_in)
+            return {name: self.signed[name] for name in names}
+
+    def cloudfront_urls(self, names, epoch):
+        base = f'https://{settings.AWS_CLOUDFRONT_DOMAIN}/'
+        if getattr(self.storage, 'location', ''):
+            base += f'{self.storage.location}/'
+
+        if self.cloudfront_query is None:
+            signer = cloudfront_signer()
+            policy = signer.build_policy(f'{base}*', datetime.utcfromtimestamp((epoch + 2) * self.rotation))
+            self.cloudfront_query = signer.generate_presigned_url(f'{base}*', policy=policy).split('?', 1)[1]
+        return {name: f'{base}{filepath_to_uri(name)}?{self.cloudfront_query}' for name in names}
+
+
+def cloudfront_signer():
+    if serialization is None:
+        raise ImproperlyConfigured('CloudFront signed URLs need the cryptography package')
+    if not getattr(settings, 'AWS_CLOUDFRONT_DOMAIN', None):
+        raise ImproperlyConfigured('CloudFront signed URLs need AWS_CLOUDFRONT_DOMAIN')
+
+    from botocore.signers import CloudFrontSigner
+    key = serialization.load_pem_private_key(settings.AWS_CLOUDFRONT_KEY.encode(), password=None,
+                                             backend=default_backend())
+    return CloudFrontSigner(settings.AWS_CLOUDFRONT_KEY_ID,
+                            lambda message: key.sign(message, padding.PKCS1v15(), hashes.SHA1()))
+
+
+media_urls = MediaURLs()
+
+
+def reset_media_urls(setting, **kwargs):
+    if setting.startswith('AWS_'):
+        media_urls.reset()
+
+setting_changed.connect(reset_media_urls)
@@ -0,0 +1,18 @@
+# Generated by Django 2.2.13 on 2026-10-18 20:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_auto_20200613_0928'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='collaboration',
+            name='deadline',
+            field=models.DateField(db_index=True),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 2.2.13 on 2026-10-18 20:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_schedulerlease'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='collaborationrequest',
+            name='deadline',
+            field=models.DateField(db_index=True),
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 2.2.13 on 2026-10-18 20:43
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def open_balances(apps, schema_editor):
+    Student = apps.get_model('core', 'Student')
+    TimeEntry = apps.get_model('core', 'TimeEntry')
+    TimeEntry.objects.bulk_create(
+        TimeEntry(student_id=student_id, amount=available_time or 0, kind='OP')
+        for student_id, available_time in Student.objects.values_list('pk', 'available_time').iterator()
+    )
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_outboxemail'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TimeEntry',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=6)),
+                ('kind', models.CharField(choices=[('OP', 'Opening'), ('RE', 'Reserve'), ('RF', 'Refund'), ('EA', 'Earn'), ('AD', 'Adjustment')], max_length=2)),
+                ('reference', models.CharField(blank=True, max_length=100)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='student',
+            constraint=models.CheckConstraint(check=models.Q(available_time__gte=0), name='student_available_time_gte_0'),
+        ),
+        migrations.AddField(
+            model_name='timeentry',
+            name='student',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='time_entries', to='core.Student'),
+        ),
+        migrations.RunPython(open_balances, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,109 @@
+import core.validators
+import django.core.validators
+from django.db import migrations, models
+from django.db.models import F, IntegerField
+from django.db.models.functions import Cast
+
+
+TIME_FIELDS = [
+    ('Student', 'available_time', 'available_minutes'),
+    ('CollaborationRequest', 'requested_time', 'requested_minutes'),
+    ('Collaboration', 'requested_time', 'requested_minutes'),
+    ('TimeEntry', 'amount', 'minutes'),
+]
+
+
+def hours_to_minutes(apps, schema_editor):
+    for model_name, hours, minutes in TIME_FIELDS:
+        model = apps.get_model('core', model_name)
+        model.objects.update(**{minutes: Cast(F(hours) * 60, IntegerField())})
+
+
+def minutes_to_hours(apps, schema_editor):
+    for model_name, hours, minutes in TIME_FIELDS:
+        model = apps.get_model('core', model_name)
+        model.objects.update(**{hours: F(minutes) / 60.0})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_time_ledger'),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name='student',
+            name='student_available_time_gte_0',
+        ),
+        migrations.AddField(
+            model_name='student',
+            name='available_minutes',
+            field=models.PositiveIntegerField(blank=True, default=60, null=True, validators=[core.validators.validate_minutes]),
+        ),
+        migrations.AddField(
+            model_name='collaborationrequest',
+            name='requested_minutes',
+            field=models.PositiveIntegerField(default=0),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='collaboration',
+            name='requested_minutes',
+            field=models.PositiveIntegerField(default=0),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='timeentry',
+            name='minutes',
+            field=models.IntegerField(default=0),
+            preserve_default=False,
+        ),
+        # Nullable hour columns can be restored and refilled when unapplying.
+        migrations.AlterField(
+            model_name='collaborationrequest',
+            name='requested_time',
+            field=models.DecimalField(decimal_places=2, max_digits=6, null=True),
+        ),
+        migrations.AlterField(
+            model_name='collaboration',
+            name='requested_time',
+            field=models.DecimalField(decimal_places=2, max_digits=6, null=True),
+        ),
+        migrations.AlterField(
+            model_name='timeentry',
+            name='amount',
+            field=models.DecimalField(decimal_places=2, max_digits=6, null=True),
+        ),
+        migrations.RunPython(hours_to_minutes, minutes_to_hours),
+        migrations.RemoveField(
+            model_name='student',
+            name='available_time',
+        ),
+        migrations.RemoveField(
+            model_name='collaborationrequest',
+            name='requested_time',
+        ),
+        migrations.RemoveField(
+            model_name='collaboration',
+            name='requested_time',
+        ),
+        migrations.RemoveField(
+            model_name='timeentry',
+            name='amount',
+        ),
+        migrations.AlterField(
+            model_name='collaborationrequest',
+            name='requested_minutes',
+            field=models.PositiveIntegerField(validators=[django.core.validators.MinValueValidator(15), core.validators.validate_minutes]),
+        ),
+        migrations.AlterField(
+            model_name='collaboration',
+            name='requested_minutes',
+            field=models.PositiveIntegerField(validators=[django.core.validators.MinValueValidator(15), core.validators.validate_minutes]),
+        ),
+        migrations.AddConstraint(
+            model_name='student',
+            constraint=models.CheckConstraint(check=models.Q(available_minutes__gte=0), name='student_available_minutes_gte_0'),
+        ),
+    ]
@@ -0,0 +1,63 @@
+from django.db import migrations
+
+
+POSTGRESQL_FORWARD = [
+    'ALTER TABLE core_collaborationrequest ADD COLUMN search_vector tsvector',
+    """
+    CREATE FUNCTION core_collaborationrequest_search_vector() RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector :=
+            setweight(to_tsvector('spanish', coalesce(NEW.title, '')), 'A') ||
+            setweight(to_tsvector('spanish', coalesce(NEW.description, '')), 'B');
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE TRIGGER core_collaborationrequest_search_vector_update
+    BEFORE INSERT OR UPDATE OF title, description ON core_collaborationrequest
+    FOR EACH ROW EXECUTE PROCEDURE core_collaborationrequest_search_vector()
+    """,
+    'UPDATE core_collaborationrequest SET title = title',
+    'CREATE INDEX core_collaborationrequest_search_vector_idx ON core_collaborationrequest USING gin (search_vector)',
+]
+
+POSTGRESQL_BACKWARD = [
+    'DROP TRIGGER core_collaborationrequest_search_vector_update ON core_collaborationrequest',
+    'DROP FUNCTION core_collaborationrequest_search_vector()',
+    'ALTER TABLE core_collaborationrequest DROP COLUMN search_vector',
+]
+
+# Kept in sync by the signals in core.signals rather than by triggers,
+# which SQLite drops whenever a migration rebuilds the table.
+SQLITE_FORWARD = [
+    "CREATE VIRTUAL TABLE core_collaborationrequest_fts USING fts5("
+    "title, description, tokenize='unicode61 remove_diacritics 2')",
+    'INSERT INTO core_collaborationrequest_fts (rowid, title, description) '
+    'SELECT id, title, description FROM core_collaborationrequest',
+]
+
+SQLITE_BACKWARD = [
+    'DROP TABLE core_collaborationrequest_fts',
+]
+
+
+def run(statements):
+    def operation(apps, schema_editor):
+        for statement in statements.get(schema_editor.connection.vendor, ()):
+            schema_editor.execute(statement)
+    return operation
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_time_in_minutes'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            run({'postgresql': POSTGRESQL_FORWARD, 'sqlite': SQLITE_FORWARD}),
+            run({'postgresql': POSTGRESQL_BACKWARD, 'sqlite': SQLITE_BACKWARD}),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 2.2.13 on 2026-10-18 21:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_collaborationrequest_search'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='collaborationrequest',
+            name='deadline',
+            field=models.DateField(),
+        ),
+        migrations.AddIndex(
+            model_name='collaborationrequest',
+            index=models.Index(fields=['deadline', 'requested_minutes'], name='core_collab_deadlin_9ae0ef_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='collaborationrequest',
+            index=models.Index(fields=['requested_minutes', 'deadline'], name='core_collab_request_c24f1e_idx'),
+        ),
+        # Covers the competence filter and facets, which only read the
+        # auto-created through table's two columns.
+        migrations.RunSQL(
+            'CREATE INDEX core_competence_collaboration_requests_competence_request_idx '
+            'ON core_competence_collaboration_requests (competence_id, collaborationrequest_id)',
+            'DROP INDEX core_competence_collaboration_requests_competence_request_idx',
+        ),
+    ]
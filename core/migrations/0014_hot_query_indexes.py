@@ -0,0 +1,56 @@
+# Generated by Django 2.2.13 on 2026-10-18 21:06
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_collaborationrequest_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='outboxemail',
+            name='core_outbox_status_b2f640_idx',
+        ),
+        migrations.AlterField(
+            model_name='collaboration',
+            name='applicant',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='applicant_collaborations', to='core.Student'),
+        ),
+        migrations.AlterField(
+            model_name='collaboration',
+            name='collaborator',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='collaborator_collaborations', to='core.Student'),
+        ),
+        migrations.AlterField(
+            model_name='collaborationrequest',
+            name='applicant',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='applicant_collaboration_requests', to='core.Student'),
+        ),
+        migrations.AddIndex(
+            model_name='collaboration',
+            index=models.Index(fields=['applicant', 'deadline', 'id'], name='core_collab_applica_531f53_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='collaboration',
+            index=models.Index(fields=['collaborator', 'deadline', 'id'], name='core_collab_collabo_584e09_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='collaborationrequest',
+            index=models.Index(fields=['applicant', 'deadline', 'id'], name='core_collab_applica_8d5cfc_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='outboxemail',
+            index=models.Index(condition=models.Q(status='PE'), fields=['next_attempt_at', 'id'], name='core_outbox_pending_idx'),
+        ),
+        # Covers ?offerer_id=, which only reads the auto-created through
+        # table's two columns.
+        migrations.RunSQL(
+            'CREATE INDEX core_collaborationrequest_offerers_student_request_idx '
+            'ON core_collaborationrequest_offerers (student_id, collaborationrequest_id)',
+            'DROP INDEX core_collaborationrequest_offerers_student_request_idx',
+        ),
+    ]
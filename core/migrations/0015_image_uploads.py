@@ -0,0 +1,39 @@
+# Generated by Django 2.2.13 on 2026-10-18 21:26
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0014_hot_query_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='student',
+            name='profile_image_sizes',
+            field=models.CharField(blank=True, max_length=50),
+        ),
+        migrations.CreateModel(
+            name='ImageUpload',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=255)),
+                ('content_type', models.CharField(max_length=50)),
+                ('status', models.CharField(choices=[('CR', 'Created'), ('PE', 'Pending'), ('RE', 'Ready'), ('FA', 'Failed')], default='CR', max_length=2)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('last_error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('next_attempt_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('processed_at', models.DateTimeField(blank=True, null=True)),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='image_uploads', to='core.Student')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='imageupload',
+            index=models.Index(condition=models.Q(status='PE'), fields=['next_attempt_at', 'id'], name='core_imageupload_pending_idx'),
+        ),
+    ]
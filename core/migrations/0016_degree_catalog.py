@@ -0,0 +1,75 @@
+import django.db.models.deletion
+import json
+import os
+from django.db import migrations, models
+from django.db.models import F, IntegerField
+from django.db.models.functions import Cast
+
+
+# The catalog as it was when degree names stopped being choices. Later
+# changes to it are loaded with `manage.py load_degrees`.
+DEGREES_FILE = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'degrees.json')
+
+
+def create_catalog(apps, schema_editor):
+    DegreeCatalog = apps.get_model('core', 'DegreeCatalog')
+    Degree = apps.get_model('core', 'Degree')
+
+    with open(DEGREES_FILE, encoding='utf-8') as json_file:
+        names = {int(code): name for code, name in json.load(json_file).items()}
+    for code in Degree.objects.values_list('name', flat=True).distinct():
+        names.setdefault(int(code), code)
+
+    DegreeCatalog.objects.bulk_create([DegreeCatalog(id=code, name=name) for code, name in names.items()])
+    Degree.objects.update(catalog=Cast(F('name'), IntegerField()))
+
+
+def restore_names(apps, schema_editor):
+    Degree = apps.get_model('core', 'Degree')
+    Degree.objects.update(name=Cast(F('catalog'), models.CharField(max_length=3)))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0015_image_uploads'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DegreeCatalog',
+            fields=[
+                ('id', models.PositiveSmallIntegerField(primary_key=True, serialize=False)),
+                ('name', models.CharField(max_length=255)),
+            ],
+            options={
+                'ordering': ('id',),
+            },
+        ),
+        migrations.AddField(
+            model_name='degree',
+            name='catalog',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.PROTECT, related_name='degrees', to='core.DegreeCatalog'),
+        ),
+        # Blank so that migrating back can add the column to existing rows.
+        migrations.AlterField(
+            model_name='degree',
+            name='name',
+            field=models.CharField(blank=True, max_length=3),
+        ),
+        migrations.RunPython(create_catalog, restore_names),
+        migrations.RemoveField(
+            model_name='degree',
+            name='name',
+        ),
+        migrations.RenameField(
+            model_name='degree',
+            old_name='catalog',
+            new_name='name',
+        ),
+        migrations.AlterField(
+            model_name='degree',
+            name='name',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='degrees', to='core.DegreeCatalog'),
+        ),
+    ]
@@ -3,8 +3,8 @@ from django.contrib.auth.models import (AbstractBaseUser, BaseUserManager,
                                         PermissionsMixin)
 from django.core.exceptions import ValidationError
 from django.core.validators import MinValueValidator
-from core.validators import validate_minutes
-from core.degrees_extractor import get_degrees
+from django.utils import timezone
+from core.validators import QUARTER_HOUR, validate_minutes
 
 
 class UserManager(BaseUserManager):
@@ -39,17 +39,23 @@ class User(AbstractBaseUser, PermissionsMixin):
     USERNAME_FIELD = 'email'
 
 
+def average_rating(accumulated_rating, rating_count):
+    return round((accumulated_rating/rating_count)*2)/2 if rating_count != 0 else 0
+
+
 class Student(models.Model):
     description = models.TextField(blank=True)
     profile_image = models.ImageField(blank=True)
+    # Comma separated widths of the WebP variants stored next to profile_image.
+    profile_image_sizes = models.CharField(max_length=50, blank=True)
     rating_count = models.PositiveIntegerField(blank=True, null=True, default=0)
     accumulated_rating = models.PositiveIntegerField(blank=True, null=True, default=0)
-    available_time = models.DecimalField(blank=True, null=True, default=1, max_digits=6, decimal_places=2, validators=[MinValueValidator(0), validate_minutes])
+    available_minutes = models.PositiveIntegerField(blank=True, null=True, default=60, validators=[validate_minutes])
     user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True)
 
     @property
     def average_rating(self):
-        return round((self.accumulated_rating/self.rating_count)*2)/2 if self.rating_count != 0 else 0
+        return average_rating(self.accumulated_rating, self.rating_count)
     
     @property
     def full_name(self):
@@ -58,16 +64,45 @@ class Student(models.Model):
     def __str__(self):
         return f'{self.user.first_name} {self.user.last_name}'
 
+    class Meta:
+        constraints = [
+            models.CheckConstraint(check=models.Q(available_minutes__gte=0), name='student_available_minutes_gte_0')
+        ]
+
 
 class CollaborationRequest(models.Model):
     title = models.CharField(max_length=100)
     description = models.TextField(blank=True)
-    requested_time = models.DecimalField(max_digits=6, decimal_places=2, validators=[MinValueValidator(0.25), validate_minutes])
+    requested_minutes = models.PositiveIntegerField(validators=[MinValueValidator(QUARTER_HOUR), validate_minutes])
     deadline = models.DateField()
     publication_date = models.DateField(auto_now_add=True)
-    applicant = models.ForeignKey(Student, on_delete=models.CASCADE, related_name='applicant_collaboration_requests')
+    applicant = models.ForeignKey(Student, on_delete=models.CASCADE, related_name='applicant_collaboration_requests',
+                                  db_index=False)
     offerers = models.ManyToManyField(Student, blank=True, related_name='offerer_collaboration_requests')
 
+    class Meta:
+        # A deadline window with or without a time range, and a time range
+        # alone, each seek one of the first two. The last one serves an
+        # applicant's requests in (deadline, id) order.
+        indexes = [
+            models.Index(fields=['deadline', 'requested_minutes']),
+            models.Index(fields=['requested_minutes', 'deadline']),
+            models.Index(fields=['applicant', 'deadline', 'id']),
+        ]
+
+
+class CollaborationQuerySet(models.QuerySet):
+
+    def of_student(self, student):
+        """
+        Collaborations where student is the applicant or the collaborator,
+        as a UNION of two seeks on the participant indexes, which an OR of
+        both columns cannot use.
+        """
+        participants = self.model.objects.values('id')
+        return self.filter(id__in=participants.filter(applicant=student)
+                           .union(participants.filter(collaborator=student)))
+
 
 class Collaboration(models.Model):
     IN_PROGRESS = 'IP'
@@ -82,11 +117,22 @@ class Collaboration(models.Model):
     ]
     title = models.CharField(max_length=100)
     description = models.TextField(blank=True)
-    requested_time = models.DecimalField(max_digits=6, decimal_places=2, validators=[MinValueValidator(0.25), validate_minutes])
-    deadline = models.DateField()
+    requested_minutes = models.PositiveIntegerField(validators=[MinValueValidator(QUARTER_HOUR), validate_minutes])
+    deadline = models.DateField(db_index=True)
     status = models.CharField(max_length=2, choices=STATUS_CHOICES, blank=True, default='IP')
-    applicant = models.ForeignKey(Student, on_delete=models.CASCADE, related_name='applicant_collaborations')
-    collaborator = models.ForeignKey(Student, on_delete=models.CASCADE, related_name='collaborator_collaborations')
+    # Indexed, and in (deadline, id) order, by the composites below.
+    applicant = models.ForeignKey(Student, on_delete=models.CASCADE, related_name='applicant_collaborations',
+                                  db_index=False)
+    collaborator = models.ForeignKey(Student, on_delete=models.CASCADE, related_name='collaborator_collaborations',
+                                     db_index=False)
+
+    objects = CollaborationQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['applicant', 'deadline', 'id']),
+            models.Index(fields=['collaborator', 'deadline', 'id']),
+        ]
 
 
 class Competence(models.Model):
@@ -99,6 +145,18 @@ class Competence(models.Model):
         return self.name
 
 
+class DegreeCatalog(models.Model):
+    # The codes clients send as a degree's name, loaded by `manage.py load_degrees`.
+    id = models.PositiveSmallIntegerField(primary_key=True)
+    name = models.CharField(max_length=255)
+
+    class Meta:
+        ordering = ('id',)
+
+    def __str__(self):
+        return self.name
+
+
 class Degree(models.Model):
     FIRST = '1'
     SECOND = '2'
@@ -114,7 +172,91 @@ class Degree(models.Model):
         (FIFTH, '5th'),
         (SIXTH, '6th')
     ]
-    name = models.CharField(max_length=3, choices=get_degrees())
+    name = models.ForeignKey(DegreeCatalog, on_delete=models.PROTECT, related_name='degrees')
     higher_grade = models.CharField(blank=True, max_length=1, choices=HIGHER_GRADE_CHOICES)
     finished = models.BooleanField()
     student = models.ForeignKey(Student, on_delete=models.CASCADE, related_name='degrees')
+
+
+class SchedulerLease(models.Model):
+    name = models.CharField(max_length=100, unique=True)
+    owner = models.CharField(max_length=255, blank=True)
+    expires_at = models.DateTimeField()
+
+    def __str__(self):
+        return f'{self.name} ({self.owner})'
+
+
+class OutboxEmail(models.Model):
+    PENDING = 'PE'
+    SENT = 'SE'
+    DEAD = 'DE'
+    STATUS_CHOICES = [
+        (PENDING, 'Pending'),
+        (SENT, 'Sent'),
+        (DEAD, 'Dead')
+    ]
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    from_email = models.CharField(max_length=255, blank=True)
+    recipient = models.EmailField(max_length=255)
+    status = models.CharField(max_length=2, choices=STATUS_CHOICES, default=PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    sent_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        # Only pending emails are ever polled, and sent ones pile up.
+        indexes = [models.Index(fields=['next_attempt_at', 'id'], condition=models.Q(status='PE'),
+                                name='core_outbox_pending_idx')]
+
+
+class ImageUpload(models.Model):
+    CREATED = 'CR'
+    PENDING = 'PE'
+    READY = 'RE'
+    FAILED = 'FA'
+    STATUS_CHOICES = [
+        (CREATED, 'Created'),
+        (PENDING, 'Pending'),
+        (READY, 'Ready'),
+        (FAILED, 'Failed')
+    ]
+    student = models.ForeignKey(Student, on_delete=models.CASCADE, related_name='image_uploads')
+    key = models.CharField(max_length=255)
+    content_type = models.CharField(max_length=50)
+    status = models.CharField(max_length=2, choices=STATUS_CHOICES, default=CREATED)
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    processed_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['next_attempt_at', 'id'], condition=models.Q(status='PE'),
+                                name='core_imageupload_pending_idx')]
+
+
+class TimeEntry(models.Model):
+    OPENING = 'OP'
+    RESERVE = 'RE'
+    REFUND = 'RF'
+    EARN = 'EA'
+    ADJUSTMENT = 'AD'
+    KIND_CHOICES = [
+        (OPENING, 'Opening'),
+        (RESERVE, 'Reserve'),
+        (REFUND, 'Refund'),
+        (EARN, 'Earn'),
+        (ADJUSTMENT, 'Adjustment')
+    ]
+    student = models.ForeignKey(Student, on_delete=models.CASCADE, related_name='time_entries')
+    minutes = models.IntegerField()
+    kind = models.CharField(max_length=2, choices=KIND_CHOICES)
+    reference = models.CharField(max_length=100, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f'{self.student_id} {self.get_kind_display()} {self.minutes}'
@@ -0,0 +1,156 @@
+import logging
+from collections import namedtuple
+from datetime import timedelta
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.db.models import Count, Min, Q
+from django.utils import timezone
+
+from core.models import OutboxEmail
+from core.workers import Worker
+
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 50
+MAX_ATTEMPTS = 5
+RETRY_DELAY = 30
+SEND_TIMEOUT = 300
+POLL_INTERVAL = 30
+
+DrainStats = namedtuple('DrainStats', ('sent', 'retried', 'dead', 'latency'))
+
+
+def enqueue(subject, body, from_email, recipient_list):
+    """
+    Stores the email in the outbox as part of the current transaction. It is
+    delivered by the worker once the transaction commits, and never if it
+    rolls back.
+    """
+    OutboxEmail.objects.bulk_create([
+        OutboxEmail(subject=subject, body=body, from_email=from_email or '', recipient=recipient)
+        for recipient in recipient_list
+    ])
+    transaction.on_commit(worker.kick)
+
+def retry_delay(attempts):
+    return timedelta(seconds=RETRY_DELAY * 2 ** (attempts - 1))
+
+def drain(batch_size=BATCH_SIZE):
+    """
+    Delivers up to batch_size due emails over a single backend connection.
+    They are leased for SEND_TIMEOUT seconds in a short transaction and
+    sent outside of it, so no row stays locked while the backend is slow,
+    and each result is saved as soon as the email is sent. Emails a crashed
+    drain leaves behind are sent again once their lease runs out. Failed
+    emails are retried with exponential backoff and marked dead after
+    MAX_ATTEMPTS.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        batch = list(OutboxEmail.objects
+                     .select_for_update(skip_locked=True)
+                     .filter(status=OutboxEmail.PENDING, next_attempt_at__lte=now)
+                     .order_by('next_attempt_at', 'id')[:batch_size])
+        OutboxEmail.objects.filter(pk__in=[email.pk for email in batch]).update(
+            next_attempt_at=now + timedelta(seconds=SEND_TIMEOUT)
+        )
+    if not batch:
+        return DrainStats(sent=0, retried=0, dead=0, latency=0)
+
+    connection = get_connection(fail_silently=False)
+    try:
+        connection.open()
+    except Exception as exc:
+        for email in batch:
+            failed(email, exc)
+            record(email)
+    else:
+        try:
+            for email in batch:
+                deliver(connection, email)
+                record(email)
+        finally:
+            connection.close()
+
+    sent = [email for email in batch if email.status == OutboxEmail.SENT]
+    dead = sum(email.status == OutboxEmail.DEAD for email in batch)
+    latency = max(((email.sent_at - email.created_at).total_seconds() for email in sent), default=0)
+    stats = DrainStats(sent=len(sent), retried=len(batch) - len(sent) - dead, dead=dead, latency=latency)
+    logger.info('Outbox delivered %d emails (%d retried, %d dead), max latency %.3fs',
+                stats.sent, stats.retried, stats.dead, stats.latency)
+    return stats
+
+def record(email):
+    now = timezone.now()
+    if email.status == OutboxEmail.SENT:
+        email.sent_at = now
+    elif email.status == OutboxEmail.PENDING:
+        email.next_attempt_at = now + retry_delay(email.attempts)
+    email.save(update_fields=['status', 'attempts', 'last_error', 'next_attempt_at', 'sent_at'])
+
+def deliver(connection, email):
+    try:
+        connection.send_messages([
+            EmailMessage(email.subject, email.body, email.from_email or None, [email.recipient])
+        ])
+    except Exception as exc:
+        failed(email, exc)
+        return
+
+    email.attempts += 1
+    email.status = OutboxEmail.SENT
+    email.last_error = ''
+
+def failed(email, exc):
+    email.attempts += 1
+    email.last_error = repr(exc)
+    if email.attempts >= MAX_ATTEMPTS:
+        email.status = OutboxEmail.DEAD
+        logger.error('Outbox email %d is dead after %d attempts: %s', email.pk, email.attempts, exc)
+
+def drain_all(batch_size=BATCH_SIZE):
+    total = DrainStats(sent=0, retried=0, dead=0, latency=0)
+    while True:
+        stats = drain(batch_size)
+        total = DrainStats(
+            sent=total.sent + stats.sent,
+            retried=total.retried + stats.retried,
+            dead=total.dead + stats.dead,
+            latency=max(total.latency, stats.latency)
+        )
+        if stats.sent + stats.retried + stats.dead < batch_size:
+            return total
+
+def metrics():
+    """
+    Queue depth per status and the age in seconds of the oldest pending
+    email.
+    """
+    counts = OutboxEmail.objects.aggregate(
+        pending=Count('id', filter=Q(status=OutboxEmail.PENDING)),
+        sent=Count('id', filter=Q(status=OutboxEmail.SENT)),
+        dead=Count('id', filter=Q(status=OutboxEmail.DEAD)),
+        oldest_pending=Min('created_at', filter=Q(status=OutboxEmail.PENDING)),
+    )
+    oldest = counts.pop('oldest_pending')
+    counts['oldest_pending_age'] = (timezone.now() - oldest).total_seconds() if oldest else 0
+    return counts
+
+
+class OutboxWorker(Worker):
+    """
+    Drains the outbox whenever a transaction that enqueued email commits.
+    """
+
+    name = 'outbox-worker'
+
+    def __init__(self, batch_size=BATCH_SIZE, poll_interval=POLL_INTERVAL):
+        super().__init__(poll_interval)
+        self.batch_size = batch_size
+
+    def drain(self):
+        drain_all(self.batch_size)
+
+
+worker = OutboxWorker()
@@ -0,0 +1,168 @@
+import base64
+import binascii
+import datetime
+import json
+from collections import OrderedDict
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination over a unique ordering such as (deadline, id).
+
+    Pages are read with a range condition on the ordering columns instead of
+    an OFFSET, so fetching a page deep in the list costs the same as fetching
+    the first one. Cursors are opaque to clients and encode the ordering
+    values of the row the page starts after.
+    """
+
+    orderings = {'id': ('id',)}
+    ordering_query_param = 'ordering'
+    cursor_query_param = 'cursor'
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request)
+        self.page_size = self.get_page_size(request)
+        reverse, position = self.decode_cursor(request)
+
+        ordering = invert_ordering(self.ordering) if reverse else self.ordering
+        queryset = queryset.order_by(*ordering)
+        if position is not None:
+            queryset = queryset.filter(self.keyset_filter(queryset.model, ordering, position))
+
+        rows = list(queryset[:self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if reverse:
+            rows.reverse()
+
+        self.page = rows
+        self.has_next = has_more if not reverse else position is not None
+        self.has_previous = position is not None if not reverse else has_more
+        return rows
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
+
+    def get_ordering(self, request):
+        ordering = request.query_params.get(self.ordering_query_param)
+        if ordering in self.orderings:
+            return self.orderings[ordering]
+        return next(iter(self.orderings.values()))
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(max(page_size, 1), self.max_page_size)
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(False, self.page[-1])
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(True, self.page[0])
+
+    def encode_cursor(self, reverse, row):
+        position = [encode_value(get_value(row, field.lstrip('-'))) for field in self.ordering]
+        payload = json.dumps({'r': reverse, 'p': position}, separators=(',', ':'))
+        cursor = base64.urlsafe_b64encode(payload.encode()).decode()
+        return replace_query_param(self.base_url, self.cursor_query_param, cursor)
+
+    def decode_cursor(self, request):
+        cursor = request.query_params.get(self.cursor_query_param)
+        if not cursor:
+            return False, None
+
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(cursor.encode()).decode())
+            reverse, position = bool(payload['r']), payload['p']
+        except (binascii.Error, ValueError, KeyError, TypeError):
+            raise NotFound(self.invalid_cursor_message)
+
+        if not isinstance(position, list) or len(position) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        return reverse, position
+
+    def keyset_filter(self, model, ordering, position):
+        """
+        Rows strictly after position: (a > x) OR (a = x AND b > y) OR ...
+        with the comparison flipped for descending fields.
+        """
+        values = []
+        for field, value in zip(ordering, position):
+            try:
+                values.append(decode_value(model, field.lstrip('-'), value))
+            except ValidationError:
+                raise NotFound(self.invalid_cursor_message)
+
+        condition = Q()
+        for i, field in enumerate(ordering):
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            clause = Q(**{f'{field.lstrip("-")}__{lookup}': values[i]})
+            for previous, value in zip(ordering[:i], values[:i]):
+                clause &= Q(**{previous.lstrip('-'): value})
+            condition |= clause
+        return condition
+
+
+def invert_ordering(ordering):
+    return tuple(field[1:] if field.startswith('-') else f'-{field}' for field in ordering)
+
+
+def get_value(row, field):
+    return row[field] if isinstance(row, dict) else getattr(row, field)
+
+
+def encode_value(value):
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        return value.isoformat()
+    return value
+
+
+def decode_value(model, field, value):
+    try:
+        return model._meta.get_field(field).to_python(value)
+    except FieldDoesNotExist:
+        return value
+
+
+class CollaborationRequestPagination(KeysetPagination):
+    orderings = {
+        'deadline': ('deadline', 'id'),
+        'publication_date': ('publication_date', 'id'),
+        'relevance': ('-rank', 'id'),
+    }
+    search_query_param = 'q'
+
+    def get_ordering(self, request):
+        # Relevance only exists for searches, where it is the default.
+        ordering = request.query_params.get(self.ordering_query_param)
+        if request.query_params.get(self.search_query_param) is None:
+            if ordering == 'relevance':
+                ordering = None
+        elif ordering not in self.orderings:
+            ordering = 'relevance'
+        return self.orderings.get(ordering, self.orderings['deadline'])
+
+
+class CollaborationPagination(KeysetPagination):
+    orderings = {'deadline': ('deadline', 'id')}
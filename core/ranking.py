@@ -0,0 +1,133 @@
+from collections import namedtuple
+import numpy as np
+
+from core.models import Degree, Student
+
+
+COMPETENCE_WEIGHT = 0.5
+RATING_WEIGHT = 0.25
+DEGREE_WEIGHT = 0.15
+TIME_WEIGHT = 0.1
+
+POPCOUNT = np.array([bin(byte).count('1') for byte in range(256)], dtype=np.uint8)
+
+Candidates = namedtuple('Candidates', (
+    'student_ids', 'competences', 'accumulated_rating', 'rating_count', 'available_minutes', 'degrees'
+))
+Degrees = namedtuple('Degrees', ('rows', 'names', 'finished', 'grades'))
+
+
+def popcount(bitsets):
+    return POPCOUNT[bitsets.view(np.uint8)].reshape(len(bitsets), -1).sum(axis=1)
+
+def bitsets(rows, positions, count, words):
+    """
+    Packs (row, position) pairs into `count` bitsets of `words` 64-bit
+    words each.
+    """
+    matrix = np.zeros((count, words), dtype=np.uint64)
+    positions = np.asarray(positions, dtype=np.uint64)
+    bits = np.left_shift(np.uint64(1), positions % np.uint64(64))
+    np.bitwise_or.at(matrix, (np.asarray(rows, dtype=np.intp), (positions // np.uint64(64)).astype(np.intp)), bits)
+    return matrix
+
+def load_candidates(student_ids, words):
+    """
+    Loads everything the ranking needs about the students in three
+    queries, with one competence bitset of `words` words per student.
+    """
+    rows = {student_id: row for row, student_id in enumerate(student_ids)}
+
+    students = dict((pk, values) for pk, *values in Student.objects
+                    .filter(pk__in=student_ids)
+                    .values_list('pk', 'accumulated_rating', 'rating_count', 'available_minutes'))
+    values = np.array([students.get(student_id, (0, 0, 0)) for student_id in student_ids],
+                      dtype=np.float64).reshape(-1, 3)
+    values = np.nan_to_num(values)
+
+    links = list(Student.competences.through.objects
+                 .filter(student_id__in=student_ids, competence_id__lt=words * 64)
+                 .values_list('student_id', 'competence_id'))
+    competences = bitsets([rows[student_id] for student_id, _ in links],
+                          [competence_id for _, competence_id in links], len(student_ids), words)
+
+    degrees = list(Degree.objects
+                   .filter(student_id__in=student_ids)
+                   .values_list('student_id', 'name_id', 'finished', 'higher_grade'))
+
+    return Candidates(
+        student_ids=np.asarray(student_ids, dtype=np.int64),
+        competences=competences,
+        accumulated_rating=values[:, 0],
+        rating_count=values[:, 1],
+        available_minutes=values[:, 2],
+        degrees=Degrees(
+            rows=np.array([rows[student_id] for student_id, *_ in degrees], dtype=np.intp),
+            names=np.array([name for _, name, _, _ in degrees], dtype=np.int64),
+            finished=np.array([finished for _, _, finished, _ in degrees], dtype=bool),
+            grades=np.array([int(grade or 0) for *_, grade in degrees], dtype=np.int64),
+        )
+    )
+
+def degree_affinity(candidates, degree):
+    """
+    1 for students who finished the applicant's degree, 0.75 for those in
+    the same or a higher year of it, 0.5 for lower years and 0 otherwise.
+    """
+    affinity = np.zeros(len(candidates.student_ids))
+    if degree is None or not len(candidates.degrees.rows):
+        return affinity
+
+    name, grade = degree
+    degrees = candidates.degrees
+    rows = np.where(
+        degrees.names == name,
+        np.where(degrees.finished, 1.0, np.where(degrees.grades >= grade, 0.75, 0.5)),
+        0.0
+    )
+    np.maximum.at(affinity, degrees.rows, rows)
+    return affinity
+
+def score(candidates, request_competences, degree=None):
+    """
+    Scores every candidate for a request asking for the competences in the
+    `request_competences` bitset, by the share of them the candidate has,
+    their average rating, their degree affinity with the applicant's
+    `degree` (name, year) and their available time.
+    """
+    requested = max(int(popcount(request_competences[np.newaxis])[0]), 1)
+    match = popcount(candidates.competences & request_competences) / requested
+
+    count = candidates.rating_count
+    average = np.round(candidates.accumulated_rating / np.maximum(count, 1) * 2) / 2
+    rating = np.where(count > 0, average, 0) / 5
+
+    available = candidates.available_minutes
+    time = available / max(available.max(initial=0), 1)
+
+    return (COMPETENCE_WEIGHT * match +
+            RATING_WEIGHT * rating +
+            DEGREE_WEIGHT * degree_affinity(candidates, degree) +
+            TIME_WEIGHT * time)
+
+def rank_students(collaboration_request, student_ids):
+    """
+    Returns {student_id: score} for the students in student_ids as
+    candidates to collaborate on collaboration_request.
+    """
+    if not student_ids:
+        return {}
+
+    competence_ids = list(collaboration_request.competences.values_list('id', flat=True))
+    words = max(competence_ids, default=0) // 64 + 1
+    request_competences = bitsets([0] * len(competence_ids), competence_ids, 1, words)[0]
+
+    degree = (Degree.objects
+              .filter(student=collaboration_request.applicant_id, finished=False)
+              .values_list('name_id', 'higher_grade')
+              .first())
+    if degree is not None:
+        degree = (degree[0], int(degree[1] or 0))
+
+    candidates = load_candidates(student_ids, words)
+    return dict(zip(candidates.student_ids.tolist(), score(candidates, request_competences, degree).tolist()))
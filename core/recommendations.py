@@ -0,0 +1,221 @@
+import heapq
+import logging
+import threading
+import time
+from collections import Counter, defaultdict, namedtuple
+from datetime import date
+from django.db import close_old_connections
+
+from core.models import CollaborationRequest
+
+
+logger = logging.getLogger(__name__)
+
+OVERLAP_WEIGHT = 0.6
+DEADLINE_WEIGHT = 0.25
+FIT_WEIGHT = 0.15
+PREFERRED_MINUTES = 60
+
+IndexedRequest = namedtuple('IndexedRequest', ('applicant_id', 'deadline', 'requested_minutes', 'competences'))
+
+
+def postings():
+    return defaultdict(lambda: defaultdict(set))
+
+
+class RecommendationIndex:
+    """
+    Process-local inverted index from competence id to the ids of the open
+    collaboration requests that ask for it, split by how many competences
+    each request asks for.
+
+    Signals keep it current with the changes made by this process once
+    they commit. Requests created elsewhere are picked up incrementally by
+    id on every query, past the highest id read from the database rather
+    than added by a signal, and the whole index is rebuilt in the
+    background every `rebuild_interval` seconds to drop what other
+    processes deleted.
+    """
+
+    def __init__(self, rebuild_interval=600):
+        self.rebuild_interval = rebuild_interval
+        self._lock = threading.RLock()
+        self._postings = postings()
+        self._requests = {}
+        self._last_seen = 0
+        self._built_at = None
+        self._rebuilding = False
+
+    def __len__(self):
+        return len(self._requests)
+
+    def clear(self):
+        with self._lock:
+            self._postings = postings()
+            self._requests = {}
+            self._last_seen = 0
+            self._built_at = None
+
+    def build(self, rows, links):
+        """
+        Replaces the index with rows of (id, applicant_id, deadline,
+        requested_minutes) and links of (request_id, competence_id).
+        """
+        competences = defaultdict(set)
+        for request_id, competence_id in links:
+            competences[request_id].add(competence_id)
+
+        index = postings()
+        requests = {}
+        last_seen = 0
+        for request_id, applicant_id, deadline, requested_minutes in rows:
+            request_competences = frozenset(competences[request_id])
+            requests[request_id] = IndexedRequest(applicant_id, deadline.toordinal(), requested_minutes,
+                                                  request_competences)
+            for competence_id in request_competences:
+                index[competence_id][len(request_competences)].add(request_id)
+            last_seen = max(last_seen, request_id)
+
+        with self._lock:
+            self._postings = index
+            self._requests = requests
+            self._last_seen = last_seen
+            self._built_at = time.monotonic()
+
+    def load(self):
+        rows, links = self.fetch(CollaborationRequest.objects.all())
+        self.build(rows, links)
+        logger.info('Indexed %d open collaboration requests', len(self._requests))
+
+    def sync(self):
+        with self._lock:
+            loaded = self._built_at is not None
+            stale = loaded and time.monotonic() - self._built_at > self.rebuild_interval
+        if not loaded:
+            self.load()
+            return
+
+        rows, links = self.fetch(CollaborationRequest.objects.filter(id__gt=self._last_seen))
+        competences = defaultdict(set)
+        for request_id, competence_id in links:
+            competences[request_id].add(competence_id)
+        for request_id, applicant_id, deadline, requested_minutes in rows:
+            self.add(request_id, applicant_id, deadline, requested_minutes, competences[request_id])
+        if rows:
+            with self._lock:
+                self._last_seen = max(self._last_seen, max(row[0] for row in rows))
+
+        if stale and not self._rebuilding:
+            self._rebuilding = True
+            threading.Thread(target=self._rebuild, name='recommendation-index', daemon=True).start()
+
+    def fetch(self, queryset):
+        rows = list(queryset
+                    .filter(deadline__gte=date.today())
+                    .values_list('id', 'applicant_id', 'deadline', 'requested_minutes'))
+        links = CollaborationRequest.competences.through.objects.filter(
+            collaborationrequest_id__in=[row[0] for row in rows]
+        ).values_list('collaborationrequest_id', 'competence_id') if rows else []
+        return rows, list(links)
+
+    def add(self, request_id, applicant_id, deadline, requested_minutes, competence_ids=()):
+        with self._lock:
+            previous = self._requests.get(request_id)
+            if previous and not competence_ids:
+                competence_ids = previous.competences
+            self._put(request_id, IndexedRequest(applicant_id, deadline.toordinal(), requested_minutes,
+                                                 frozenset(competence_ids)))
+
+    def remove(self, request_id):
+        with self._lock:
+            self._put(request_id, None)
+
+    def link(self, request_id, competence_ids):
+        with self._lock:
+            request = self._requests.get(request_id)
+            if request is not None:
+                self._put(request_id, request._replace(competences=request.competences | set(competence_ids)))
+
+    def unlink(self, request_id, competence_ids=None):
+        with self._lock:
+            request = self._requests.get(request_id)
+            if request is not None:
+                competences = frozenset() if competence_ids is None else request.competences - set(competence_ids)
+                self._put(request_id, request._replace(competences=competences))
+
+    def drop_competence(self, competence_id):
+        with self._lock:
+            for request_ids in list(self._postings.get(competence_id, {}).values()):
+                for request_id in list(request_ids):
+                    self.unlink(request_id, (competence_id,))
+
+    def recommend(self, student_id, competence_ids, preferred_minutes=PREFERRED_MINUTES, limit=20, today=None):
+        """
+        Returns the ids of the best matching open requests the student did
+        not publish, best first. Requests are scored by the weighted sum of
+        the share of their competences the student has, how close their
+        deadline is and how near their requested time is to the time the
+        student prefers to give.
+
+        Candidates are visited by decreasing share of matched competences
+        and the search stops once no remaining share can beat the current
+        top results.
+        """
+        today = (today or date.today()).toordinal()
+        with self._lock:
+            shares = defaultdict(list)
+            sizes = {size for competence_id in competence_ids for size in self._postings.get(competence_id, ())}
+            for size in sizes:
+                buckets = [self._postings.get(competence_id, {}).get(size, ()) for competence_id in competence_ids]
+                if size == 1:
+                    shares[1.0].extend(set().union(*buckets))
+                    continue
+                overlaps = Counter()
+                for bucket in buckets:
+                    overlaps.update(bucket)
+                for request_id, overlap in overlaps.items():
+                    shares[overlap / size].append(request_id)
+
+            requests = self._requests
+            top = []
+            for share in sorted(shares, reverse=True):
+                base = OVERLAP_WEIGHT * share
+                if len(top) == limit and top[0][0] > base + DEADLINE_WEIGHT + FIT_WEIGHT:
+                    break
+
+                for request_id in shares[share]:
+                    applicant_id, deadline, requested_minutes, _ = requests[request_id]
+                    if deadline < today or applicant_id == student_id:
+                        continue
+                    scored = (base +
+                              DEADLINE_WEIGHT / (1 + deadline - today) +
+                              FIT_WEIGHT / (1 + abs(requested_minutes - preferred_minutes) / 60),
+                              request_id)
+                    if len(top) < limit:
+                        heapq.heappush(top, scored)
+                    elif scored > top[0]:
+                        heapq.heapreplace(top, scored)
+
+        return [request_id for _, request_id in sorted(top, reverse=True)]
+
+    def _put(self, request_id, request):
+        previous = self._requests.pop(request_id, None)
+        if previous is not None:
+            for competence_id in previous.competences:
+                self._postings[competence_id][len(previous.competences)].discard(request_id)
+        if request is not None:
+            self._requests[request_id] = request
+            for competence_id in request.competences:
+                self._postings[competence_id][len(request.competences)].add(request_id)
+
+    def _rebuild(self):
+        try:
+            self.load()
+        except Exception:
+            logger.exception('Recommendation index rebuild failed')
+        finally:
+            self._rebuilding = False
+            close_old_connections()
+
+
+recommendation_index = RecommendationIndex()
@@ -0,0 +1,101 @@
+import hashlib
+import uuid
+from datetime import date
+from functools import wraps
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.http import parse_etags
+from rest_framework import status
+from rest_framework.response import Response
+from core.media import media_urls
+
+
+COLLABORATION_REQUESTS = 'collaboration-requests'
+COLLABORATIONS = 'collaborations'
+STUDENT = 'student'
+USER_SCOPES = (COLLABORATIONS, STUDENT)
+
+KEY_PREFIX = 'response'
+TTL = getattr(settings, 'RESPONSE_CACHE_TTL', 300)
+
+
+def version_key(scope, user_id=None):
+    return f'{KEY_PREFIX}:{scope}:version' if user_id is None else f'{KEY_PREFIX}:{scope}:version:{user_id}'
+
+def versions(keys):
+    """
+    The current version token of each key. Tokens are random rather than
+    counters so an evicted token can never come back to a value that
+    cached responses were stored under.
+    """
+    found = cache.get_many(keys)
+    missing = [key for key in keys if key not in found]
+    if missing:
+        for key in missing:
+            cache.add(key, uuid.uuid4().hex, None)
+        found.update(cache.get_many(missing))
+    return [found.get(key, '') for key in keys]
+
+def invalidate(scope, user_ids=None):
+    """
+    Drops the cached responses of scope for user_ids, or for everyone when
+    user_ids is None. It happens right away and again on commit, since a
+    request reading between the two could otherwise cache rows the
+    transaction was about to change.
+    """
+    keys = [version_key(scope)] if user_ids is None else [version_key(scope, user_id) for user_id in user_ids]
+    if not keys:
+        return
+
+    def bump():
+        cache.set_many({key: uuid.uuid4().hex for key in keys}, None)
+
+    bump()
+    transaction.on_commit(bump)
+
+def invalidate_user(user_id):
+    for scope in USER_SCOPES:
+        invalidate(scope, (user_id,))
+
+def cache_response(scope, shared=False):
+    """
+    Caches a view method's serialized response per user and query string
+    under scope, which invalidate() expires for some users or, for shared
+    scopes, for everyone. Responses carry an ETag derived from the version
+    tokens, so a matching If-None-Match gets a 304 before any query or
+    serialization runs. They also change with the media URL epoch, so
+    neither the cache nor clients keep signed URLs past their expiry, and
+    with the date, so rows are not served past their deadline.
+    """
+    def decorator(method):
+        @wraps(method)
+        def wrapper(view, request, *args, **kwargs):
+            user_id = request.user.pk
+            tokens = versions([version_key(scope) if shared else version_key(scope, user_id)])
+            digest = hashlib.sha1('\n'.join([
+                scope, str(user_id), *tokens, str(media_urls.epoch()), date.today().isoformat(), request.path,
+                *sorted(request.query_params.urlencode().split('&'))
+            ]).encode()).hexdigest()
+            etag = f'W/"{digest[:16]}-{request.accepted_renderer.format}"'
+
+            if set(parse_etags(request.META.get('HTTP_IF_NONE_MATCH', ''))) & {etag, '*'}:
+                response = Response(status=status.HTTP_304_NOT_MODIFIED)
+            else:
+                key = f'{KEY_PREFIX}:{scope}:{digest}'
+                data = cache.get(key)
+                if data is None:
+                    response = method(view, request, *args, **kwargs)
+                    if response.status_code != status.HTTP_200_OK:
+                        return response
+                    cache.set(key, response.data, TTL)
+                else:
+                    response = Response(data)
+
+            response['ETag'] = etag
+            patch_cache_control(response, private=True, no_cache=True)
+            patch_vary_headers(response, ('Authorization',))
+            return response
+        return wrapper
+    return decorator
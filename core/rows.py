@@ -0,0 +1,180 @@
+"""
+Read-only list payloads built from `.values()` rows instead of model
+instances and serializers. Each builder returns exactly what the
+matching serializer would, key order included, with the same number of
+queries: the rows, then one lookup query per relation. A Fieldset
+prunes both: relations it leaves out are never looked up, and the ones
+it does not expand are looked up as primary keys only. Profile images
+are signed together once the whole page is known.
+"""
+
+from collections import defaultdict
+from functools import lru_cache
+from operator import itemgetter
+
+from core.fields import HoursField
+from core.fieldsets import ALL
+from core.images import AVATAR_WIDTH, variant
+from core.media import media_urls
+from core.models import Collaboration, CollaborationRequest, average_rating
+
+
+COLLABORATION_FIELDS = ('id', 'title', 'description', 'requested_minutes', 'deadline')
+APPLICANT_FIELDS = ('applicant_id', 'applicant__user__first_name', 'applicant__user__last_name',
+                    'applicant__profile_image', 'applicant__profile_image_sizes', 'applicant__accumulated_rating',
+                    'applicant__rating_count')
+COLLABORATION_REQUEST_FIELDS = COLLABORATION_FIELDS + ('publication_date',) + APPLICANT_FIELDS
+SCALAR_COLUMNS = (('title', 'title'), ('description', 'description'), ('requested_time', 'requested_minutes'))
+
+hours_field = HoursField()
+
+
+@lru_cache(maxsize=1024)
+def hours(minutes):
+    return hours_field.to_representation(minutes)
+
+def collaboration_fields(fieldset=ALL):
+    """
+    The COLLABORATION_FIELDS fieldset renders, always with the id and
+    deadline pagination orders by.
+    """
+    return ('id', 'deadline') + tuple(column for name, column in SCALAR_COLUMNS if fieldset.includes(name))
+
+def collaboration_request_fields(fieldset=ALL):
+    """
+    The COLLABORATION_REQUEST_FIELDS fieldset renders, always with the
+    columns pagination orders by.
+    """
+    fields = collaboration_fields(fieldset) + ('publication_date',)
+    if fieldset.expands('applicant'):
+        return fields + APPLICANT_FIELDS
+    if fieldset.includes('applicant'):
+        return fields + ('applicant_id',)
+    return fields
+
+def values(queryset, fields):
+    """
+    queryset's rows as dicts of fields plus its annotations, which keyset
+    pagination may order by.
+    """
+    return queryset.select_related(None).prefetch_related(None).values(*fields, *queryset.query.annotations)
+
+def profile_image(url, request):
+    if url is None:
+        return None
+    return request.build_absolute_uri(url) if request is not None else url
+
+def student_short(student_id, first_name, last_name, image, accumulated_rating, rating_count, urls, request):
+    return {
+        'id': student_id,
+        'full_name': f'{first_name} {last_name}',
+        'profile_image': profile_image(urls.get(image), request),
+        'average_rating': average_rating(accumulated_rating, rating_count),
+    }
+
+def competence_names(through, column, ids):
+    names = defaultdict(list)
+    if ids:
+        for owner_id, name in (through.objects
+                               .filter(**{f'{column}__in': ids})
+                               .order_by('competence_id')
+                               .values_list(column, 'competence__name')):
+            names[owner_id].append({'name': name})
+    return names
+
+def related_ids(through, column, related_column, ids):
+    related = defaultdict(list)
+    if ids:
+        for owner_id, related_id in (through.objects
+                                     .filter(**{f'{column}__in': ids})
+                                     .order_by(related_column)
+                                     .values_list(column, related_column)):
+            related[owner_id].append(related_id)
+    return related
+
+def competences(through, column, ids, fieldset):
+    if fieldset.expands('competences'):
+        return competence_names(through, column, ids)
+    if fieldset.includes('competences'):
+        return related_ids(through, column, 'competence_id', ids)
+
+def offerers(ids, fieldset):
+    """
+    The offerers of each request as ids, or as the student_short()
+    arguments when they are expanded.
+    """
+    through = CollaborationRequest.offerers.through
+    if not fieldset.expands('offerers'):
+        return related_ids(through, 'collaborationrequest_id', 'student_id', ids) if fieldset.includes('offerers') else None
+
+    students = defaultdict(list)
+    if ids:
+        for request_id, student_id, first_name, last_name, image, sizes, *rating in (
+                through.objects
+                .filter(collaborationrequest_id__in=ids)
+                .order_by('student_id')
+                .values_list('collaborationrequest_id', 'student_id', 'student__user__first_name',
+                             'student__user__last_name', 'student__profile_image', 'student__profile_image_sizes',
+                             'student__accumulated_rating', 'student__rating_count')):
+            students[request_id].append((student_id, first_name, last_name, variant(image, sizes, AVATAR_WIDTH), *rating))
+    return students
+
+def applicant_image(row):
+    return variant(row['applicant__profile_image'], row['applicant__profile_image_sizes'], AVATAR_WIDTH)
+
+def applicant(fieldset, urls, request):
+    if fieldset.expands('applicant'):
+        return lambda row: student_short(row['applicant_id'], row['applicant__user__first_name'],
+                                         row['applicant__user__last_name'], applicant_image(row),
+                                         row['applicant__accumulated_rating'], row['applicant__rating_count'],
+                                         urls, request)
+    return itemgetter('applicant_id')
+
+def build(rows, fieldset, getters):
+    getters = [(name, getter) for name, getter in getters if fieldset.includes(name)]
+    return [{name: getter(row) for name, getter in getters} for row in rows]
+
+def collaborations(rows, fieldset=ALL):
+    """
+    CollaborationListSerializer's output for the collaboration_fields(fieldset)
+    rows.
+    """
+    related = competences(Collaboration.competences.through, 'collaboration_id', [row['id'] for row in rows], fieldset)
+    return build(rows, fieldset, (
+        ('id', itemgetter('id')),
+        ('title', itemgetter('title')),
+        ('description', itemgetter('description')),
+        ('requested_time', lambda row: hours(row['requested_minutes'])),
+        ('deadline', lambda row: row['deadline'].isoformat()),
+        ('competences', lambda row: related[row['id']]),
+    ))
+
+def collaboration_requests(rows, request=None, fieldset=ALL):
+    """
+    CollaborationRequestSerializer's output for the
+    collaboration_request_fields(fieldset) rows.
+    """
+    ids = [row['id'] for row in rows]
+    related = competences(CollaborationRequest.competences.through, 'collaborationrequest_id', ids, fieldset)
+    offered = offerers(ids, fieldset)
+
+    images = []
+    if fieldset.expands('applicant'):
+        images += [applicant_image(row) for row in rows]
+    if fieldset.expands('offerers'):
+        images += [student[3] for students in offered.values() for student in students]
+    urls = media_urls.urls(images)
+    if fieldset.expands('offerers'):
+        offered = defaultdict(list, {request_id: [student_short(*student, urls, request) for student in students]
+                                     for request_id, students in offered.items()})
+
+    return build(rows, fieldset, (
+        ('id', itemgetter('id')),
+        ('title', itemgetter('title')),
+        ('description', itemgetter('description')),
+        ('requested_time', lambda row: hours(row['requested_minutes'])),
+        ('deadline', lambda row: row['deadline'].isoformat()),
+        ('competences', lambda row: related[row['id']]),
+        ('applicant', applicant(fieldset, urls, request)),
+        ('offerers', lambda row: offered[row['id']]),
+    ))
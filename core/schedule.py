@@ -1,24 +1,128 @@
+import atexit
+import logging
+import os
+import sys
+import time
+from collections import namedtuple
 from datetime import date
 from apscheduler.schedulers.background import BackgroundScheduler
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.utils import timezone
 
-from core.models import Collaboration, Student
+from core.expiry import ExpiryEngine
+from core.leader import LeaderElection
+from core import images, ledger, outbox
+from core.models import Collaboration, CollaborationRequest, TimeEntry
 
 
+logger = logging.getLogger(__name__)
+
+SWEEP_BATCH_SIZE = 500
+LEASE_TTL = 30
+LEASE_RENEW_INTERVAL = 10
+OUTBOX_DRAIN_INTERVAL = 60
+IMAGE_DRAIN_INTERVAL = 60
+
+SweepStats = namedtuple('SweepStats', ('swept', 'duration'))
+
+
+def should_start(argv=None):
+    """
+    The scheduler only runs inside server processes (daphne, gunicorn or the
+    reloaded runserver child), never in management commands or tests.
+    """
+    if not getattr(settings, 'SCHEDULER_AUTOSTART', True):
+        return False
+
+    argv = sys.argv if argv is None else argv
+    program = os.path.basename(argv[0]) if argv else ''
+
+    if program in ('manage.py', 'django-admin', 'django-admin.py'):
+        if len(argv) < 2 or argv[1] != 'runserver':
+            return False
+        return '--noreload' in argv or os.environ.get('RUN_MAIN') == 'true'
+
+    if 'pytest' in program or 'pytest' in sys.modules:
+        return False
+    return 'test' not in argv[1:2]
+
 def start():
+    leader = LeaderElection('core.schedule', ttl=LEASE_TTL, on_elected=engine.start, on_revoked=engine.stop)
     scheduler = BackgroundScheduler()
-    scheduler.add_job(check_collaborations, 'interval', seconds=10)
+    scheduler.add_job(leader_job(leader, leader.heartbeat), 'interval', id='leader-heartbeat',
+                      seconds=LEASE_RENEW_INTERVAL, next_run_time=timezone.now())
+    # Catches emails whose post-commit delivery was lost with its process.
+    scheduler.add_job(leader_job(leader, outbox.drain_all, leader_only=True), 'interval',
+                      id='outbox-drain', seconds=OUTBOX_DRAIN_INTERVAL)
+    # Same for uploads, and for the retries of failed ones.
+    scheduler.add_job(leader_job(leader, images.drain_all, leader_only=True), 'interval',
+                      id='image-drain', seconds=IMAGE_DRAIN_INTERVAL)
     scheduler.start()
 
-def check_collaborations():
-    today = date.today()
+    def stop():
+        scheduler.shutdown(wait=False)
+        leader.resign()
+        engine.stop()
+    atexit.register(stop)
+
+    return leader
+
+def leader_job(leader, func, leader_only=False):
+    def job():
+        try:
+            if not leader_only or leader.holds_lease():
+                func()
+        finally:
+            close_old_connections()
+    return job
+
+def check_collaborations(batch_size=SWEEP_BATCH_SIZE):
+    return sweep(Collaboration, batch_size)
+
+def check_collaboration_requests(batch_size=SWEEP_BATCH_SIZE):
+    return sweep(CollaborationRequest, batch_size)
+
+def sweep(model, batch_size=SWEEP_BATCH_SIZE):
+    started = time.monotonic()
+    swept = 0
+
+    expired_ids = (model.objects
+                   .filter(deadline__lt=date.today())
+                   .order_by('id')
+                   .values_list('id', flat=True))
+
+    with transaction.atomic():
+        while True:
+            ids = list(expired_ids[:batch_size])
+            if not ids:
+                break
+            swept += expire(model, ids)
+
+    stats = SweepStats(swept=swept, duration=time.monotonic() - started)
+    logger.info('Swept %d expired %s in %.3fs', stats.swept, model._meta.verbose_name_plural, stats.duration)
+    return stats
+
+@transaction.atomic
+def expire(model, ids):
+    """
+    Refunds and deletes the rows among ids whose deadline has passed and
+    returns how many were deleted.
+    """
+    expired = model.objects.filter(id__in=ids, deadline__lt=date.today())
+    student_field, kind = REFUNDED_STUDENT[model]
+    ledger.credit_rows(expired, student_field, kind)
+    _, deleted = expired.delete()
+
+    return deleted.get(model._meta.label, 0)
+
 
-    collaborations = Collaboration.objects.all()
-    for collaboration in collaborations:
-        if collaboration.deadline < today:
-            requested_time = collaboration.requested_time
-            collaborator = Student.objects.get(user=collaboration.collaborator)
-            collaborator.available_time += requested_time
-            collaborator.save()
-            collaboration.delete()
+# Who gets the requested time back when a row expires: the collaborator
+# earns it for a finished collaboration, while the applicant recovers the
+# time reserved by a request nobody was accepted for.
+REFUNDED_STUDENT = {
+    Collaboration: ('collaborator', TimeEntry.EARN),
+    CollaborationRequest: ('applicant', TimeEntry.REFUND),
+}
 
-    print('Success')
+engine = ExpiryEngine(REFUNDED_STUDENT, expire)
@@ -0,0 +1,87 @@
+import re
+from django.db import connections
+from django.db.models import FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+
+from core.models import CollaborationRequest
+from core import response_cache
+
+
+SEARCH_CONFIG = 'spanish'
+TABLE = CollaborationRequest._meta.db_table
+FTS_TABLE = f'{TABLE}_fts'
+# Title matches count ten times as much as description matches.
+TITLE_WEIGHT = 10.0
+DESCRIPTION_WEIGHT = 1.0
+
+
+def terms(q):
+    return re.findall(r'\w+', q or '')
+
+def search(queryset, q):
+    """
+    Filters queryset to the collaboration requests matching every word in
+    q, the last one as a prefix, and annotates them with their relevance
+    as `rank`, higher first.
+
+    PostgreSQL matches the trigger maintained `search_vector` column with
+    Spanish stemming through its GIN index. SQLite matches the FTS5 table
+    kept by index() without stemming, and other databases fall back to
+    unranked substring matching.
+    """
+    words = terms(q)
+    if not words:
+        return queryset.none().annotate(rank=Value(0.0, output_field=FloatField()))
+
+    vendor = connections[queryset.db].vendor
+    if vendor == 'postgresql':
+        query = ' & '.join(words[:-1] + [f'{words[-1]}:*'])
+        tsquery = f"to_tsquery('{SEARCH_CONFIG}', %s)"
+        return queryset.annotate(
+            rank=RawSQL(f'ts_rank({TABLE}.search_vector, {tsquery})', (query,), output_field=FloatField())
+        ).extra(where=[f'{TABLE}.search_vector @@ {tsquery}'], params=[query])
+
+    if vendor == 'sqlite':
+        query = ' '.join([f'"{word}"' for word in words[:-1]] + [f'"{words[-1]}"*'])
+        # Joined rather than correlated, so MATCH runs once per query.
+        return queryset.annotate(
+            rank=RawSQL(f'-bm25({FTS_TABLE}, {TITLE_WEIGHT}, {DESCRIPTION_WEIGHT})', (), output_field=FloatField())
+        ).extra(tables=[FTS_TABLE],
+                where=[f'{FTS_TABLE}.rowid = {TABLE}.id', f'{FTS_TABLE} MATCH %s'], params=[query])
+
+    condition = Q()
+    for word in words:
+        condition &= Q(title__icontains=word) | Q(description__icontains=word)
+    return queryset.filter(condition).annotate(rank=Value(0.0, output_field=FloatField()))
+
+def index(collaboration_request):
+    """
+    Stores the request's text in the SQLite FTS5 table. PostgreSQL keeps
+    `search_vector` up to date with a trigger.
+    """
+    connection = connections[collaboration_request._state.db or 'default']
+    if connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            cursor.execute(f'INSERT OR REPLACE INTO {FTS_TABLE} (rowid, title, description) VALUES (%s, %s, %s)',
+                           [collaboration_request.id, collaboration_request.title, collaboration_request.description])
+
+def unindex(collaboration_request):
+    connection = connections[collaboration_request._state.db or 'default']
+    if connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [collaboration_request.id])
+
+def rebuild(using='default'):
+    """
+    Reindexes every request, for rows written without signals such as
+    bulk_create on SQLite.
+    """
+    connection = connections[using]
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.execute(f'DELETE FROM {FTS_TABLE}')
+            cursor.execute(f'INSERT INTO {FTS_TABLE} (rowid, title, description) '
+                           f'SELECT id, title, description FROM {TABLE}')
+        elif connection.vendor == 'postgresql':
+            cursor.execute(f'UPDATE {TABLE} SET title = title')
+    response_cache.invalidate(response_cache.COLLABORATION_REQUESTS)
@@ -1,15 +1,45 @@
 from django.contrib.auth import get_user_model, authenticate
 from django.shortcuts import get_object_or_404
+from django.core.validators import MinValueValidator
 from django.db.transaction import atomic
 from rest_framework import serializers
-from core.models import Student, Degree, Competence, CollaborationRequest, Collaboration
+from core.models import Student, Degree, Competence, CollaborationRequest, Collaboration, ImageUpload
 from core.exceptions import ResourcePermissionException
+from core.fieldsets import ALL
+from core.fields import DegreeField, HoursField, ProfileImageField
+from core.images import AVATAR_WIDTH, CONTENT_TYPES, PROFILE_WIDTH
+from core.validators import QUARTER_HOUR, validate_minutes
+from core import ledger
 from chat.models import Message
-from drf_extra_fields.fields import Base64ImageField
+from chat.notifications import notify
 from datetime import date
 from core.mail_sender import send
 
 
+class SparseFieldsetMixin:
+    """
+    Renders only the fields in context['fieldset'], and the ones in
+    expandable_fields it does not expand as primary keys.
+    """
+
+    expandable_fields = ()
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+
+        fieldset = self.context.get('fieldset', ALL)
+        if fieldset == ALL:
+            return
+
+        for name, field in list(self.fields.items()):
+            if not fieldset.includes(name):
+                self.fields.pop(name)
+            elif name in self.expandable_fields and not fieldset.expands(name):
+                self.fields[name] = serializers.PrimaryKeyRelatedField(
+                    many=isinstance(field, serializers.ListSerializer), read_only=True
+                )
+
+
 class UserSerializer(serializers.ModelSerializer):
 
     class Meta:
@@ -25,6 +55,8 @@ class UserSerializer(serializers.ModelSerializer):
 
 class DegreeSerializer(serializers.ModelSerializer):
 
+    name = DegreeField(source='name_id')
+
     class Meta:
         model = Degree
         fields = ('name', 'higher_grade', 'finished',)
@@ -47,12 +79,13 @@ class CompetenceSerializer(serializers.ModelSerializer):
         fields = ('name',)
 
 
-class StudentSerializer(serializers.ModelSerializer):
+class StudentSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
 
     user = UserSerializer(required=True)
-    profile_image = Base64ImageField(required=False)
+    profile_image = ProfileImageField(width=PROFILE_WIDTH)
     degrees = DegreeSerializer(many=True, required=True, allow_empty=False)
     competences = CompetenceSerializer(many=True, required=False)
+    available_time = HoursField(source='available_minutes', read_only=True)
 
     class Meta:
         model = Student
@@ -66,8 +99,7 @@ class StudentSerializer(serializers.ModelSerializer):
         user = UserSerializer.create(UserSerializer(), validated_data=user_data)
         student = Student.objects.create(
                             user=user,
-                            description=validated_data.pop('description', ''),
-                            profile_image=validated_data.pop('profile_image', '')
+                            description=validated_data.pop('description', '')
                             )
 
         degrees_data = validated_data.pop('degrees')
@@ -75,7 +107,7 @@ class StudentSerializer(serializers.ModelSerializer):
             self.validate_degrees(degrees_data)
             for degree in degrees_data:
                 Degree.objects.create(
-                    name=degree['name'],
+                    name_id=degree['name_id'],
                     higher_grade=degree['higher_grade'],
                     finished=degree['finished'],
                     student=student
@@ -103,10 +135,13 @@ class StudentSerializer(serializers.ModelSerializer):
         if len(in_progress_degrees) > 1:
             raise serializers.ValidationError('You can only be in one degree.')
 
+        return degrees_data
+
 
 class StudentShortSerializer(serializers.ModelSerializer):
 
     id = serializers.IntegerField(source='user.id')
+    profile_image = ProfileImageField(width=AVATAR_WIDTH)
 
     class Meta:
         model = Student
@@ -114,6 +149,25 @@ class StudentShortSerializer(serializers.ModelSerializer):
         read_only_fields = ('id',)
 
 
+class RankedStudentSerializer(StudentShortSerializer):
+
+    offered = serializers.BooleanField(read_only=True)
+    score = serializers.FloatField(read_only=True)
+
+    class Meta(StudentShortSerializer.Meta):
+        fields = StudentShortSerializer.Meta.fields + ('offered', 'score',)
+
+
+class ImageUploadSerializer(serializers.ModelSerializer):
+
+    content_type = serializers.ChoiceField(choices=list(CONTENT_TYPES))
+
+    class Meta:
+        model = ImageUpload
+        fields = ('id', 'content_type', 'status', 'last_error',)
+        read_only_fields = ('id', 'status', 'last_error',)
+
+
 class AuthTokenSerializer(serializers.Serializer):
 
     email = serializers.CharField()
@@ -138,12 +192,18 @@ class AuthTokenSerializer(serializers.Serializer):
             return data
 
 
-class CollaborationRequestSerializer(serializers.ModelSerializer):
+class CollaborationRequestSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
 
     id = serializers.IntegerField(read_only=True)
     competences = CompetenceSerializer(many=True, required=False)
     applicant = StudentShortSerializer(read_only=True)
     offerers = StudentShortSerializer(many=True, read_only=True)
+    requested_time = HoursField(source='requested_minutes', validators=[
+        MinValueValidator(QUARTER_HOUR, message='Ensure this value is greater than or equal to 0.25.'),
+        validate_minutes
+    ])
+
+    expandable_fields = ('competences', 'applicant', 'offerers')
 
     class Meta:
         model = CollaborationRequest
@@ -156,8 +216,9 @@ class CollaborationRequestSerializer(serializers.ModelSerializer):
         request = self.context.get('request')
         if request and hasattr(request, 'user'):
             applicant = request.user.student
+            applicant.refresh_from_db(fields=['available_minutes'])
 
-        if data['requested_time'] > applicant.available_time:
+        if data['requested_minutes'] > applicant.available_minutes:
             raise serializers.ValidationError('No tienes tanto tiempo disponible')
 
         if data['deadline'] < date.today():
@@ -173,16 +234,19 @@ class CollaborationRequestSerializer(serializers.ModelSerializer):
         if request and hasattr(request, 'user'):
             applicant = request.user.student
         
-        applicant.available_time -= validated_data['requested_time']
-        applicant.save()
-
         collaboration_request = CollaborationRequest.objects.create(
                         title=validated_data.pop('title'),
                         description=validated_data.pop('description', ''),
-                        requested_time=validated_data.pop('requested_time'),
+                        requested_minutes=validated_data.pop('requested_minutes'),
                         deadline=validated_data.pop('deadline'),
                         applicant=applicant
                         )
+
+        try:
+            ledger.debit(applicant.pk, collaboration_request.requested_minutes,
+                         ref=ledger.reference(collaboration_request))
+        except ledger.InsufficientTime:
+            raise serializers.ValidationError('No tienes tanto tiempo disponible')
         
         competences_data = validated_data.pop('competences', None)
         if competences_data:
@@ -218,23 +282,55 @@ class CollaborationRequestOfferSerializer(serializers.ModelSerializer):
             raise ResourcePermissionException('You\'ve already offered to collaborate on this collaboration request')
 
         instance.offerers.add(student)
+        notify((instance.applicant_id,), 'offer.created', {
+            'collaboration_request': instance.id,
+            'offerer': {'id': student.pk, 'full_name': student.full_name},
+        })
         return instance
 
 
-class CollaborationListSerializer(serializers.ModelSerializer):
+class CollaborationRequestFilterSerializer(serializers.Serializer):
+
+    competence = serializers.ListField(child=serializers.IntegerField(min_value=1), required=False)
+    min_requested_time = HoursField(required=False, min_value=0)
+    max_requested_time = HoursField(required=False, min_value=0)
+    deadline_after = serializers.DateField(required=False)
+    deadline_before = serializers.DateField(required=False)
+    facets = serializers.ChoiceField(choices=['competences'], required=False)
+
+    def validate(self, data):
+
+        if ('min_requested_time' in data and 'max_requested_time' in data and
+                data['min_requested_time'] > data['max_requested_time']):
+            raise serializers.ValidationError('min_requested_time must not be greater than max_requested_time')
+
+        if ('deadline_after' in data and 'deadline_before' in data and
+                data['deadline_after'] > data['deadline_before']):
+            raise serializers.ValidationError('deadline_after must not be later than deadline_before')
+
+        return data
+
+
+class CollaborationListSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
 
     competences = CompetenceSerializer(many=True, required=False)
+    requested_time = HoursField(source='requested_minutes', read_only=True)
+
+    expandable_fields = ('competences',)
 
     class Meta:
         model = Collaboration
         fields = ('id', 'title', 'description', 'requested_time', 'deadline', 'competences',)
 
 
-class CollaborationRetrieveSerializer(serializers.ModelSerializer):
+class CollaborationRetrieveSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
 
     competences = CompetenceSerializer(many=True)
     applicant = StudentShortSerializer()
     collaborator = StudentShortSerializer()
+    requested_time = HoursField(source='requested_minutes')
+
+    expandable_fields = ('competences', 'applicant', 'collaborator')
 
     class Meta:
         model = Collaboration
@@ -249,6 +345,7 @@ class CollaborationCreateSerializer(serializers.ModelSerializer):
 
     id = serializers.IntegerField(read_only=True)
     collaborator = StudentShortSerializer(read_only=True)
+    requested_time = HoursField(source='requested_minutes', read_only=True)
 
     class Meta:
         model = Collaboration
@@ -256,7 +353,6 @@ class CollaborationCreateSerializer(serializers.ModelSerializer):
         extra_kwargs = {
             'title': {'read_only': True},
             'description': {'read_only': True},
-            'requested_time': {'read_only': True},
             'deadline': {'read_only': True}
         }
 
@@ -278,7 +374,7 @@ class CollaborationCreateSerializer(serializers.ModelSerializer):
         collaboration_request_data = {}
         collaboration_request_data['title'] = collaboration_request.title
         collaboration_request_data['description'] = collaboration_request.description
-        collaboration_request_data['requested_time'] = collaboration_request.requested_time
+        collaboration_request_data['requested_minutes'] = collaboration_request.requested_minutes
         collaboration_request_data['deadline'] = collaboration_request.deadline
 
         collaboration = Collaboration.objects.create(**collaboration_request_data, applicant=student, collaborator=collaborator)
@@ -289,5 +385,10 @@ class CollaborationCreateSerializer(serializers.ModelSerializer):
         collaboration_request.delete()
 
         send(student, collaborator)
+        notify((collaborator.pk,), 'collaboration.created', {
+            'collaboration': collaboration.id,
+            'title': collaboration.title,
+            'applicant': {'id': student.pk, 'full_name': student.full_name},
+        })
 
         return collaboration
@@ -0,0 +1,173 @@
+from functools import partial
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+from core.authentication import token_cache
+from core.ledger import open_account
+from core.models import User, Student, Collaboration, CollaborationRequest, Competence, Degree, DegreeCatalog
+from core.recommendations import recommendation_index
+from core import degrees, response_cache, search
+from core.schedule import engine
+
+
+@receiver(post_save, sender=Collaboration)
+@receiver(post_save, sender=CollaborationRequest)
+def track_deadline(sender, instance, **kwargs):
+    engine.track(instance)
+
+
+@receiver(post_delete, sender=Collaboration)
+@receiver(post_delete, sender=CollaborationRequest)
+def untrack_deadline(sender, instance, **kwargs):
+    engine.untrack(instance)
+
+
+@receiver(post_save, sender=CollaborationRequest)
+def index_collaboration_request(sender, instance, raw=False, **kwargs):
+    if not raw:
+        transaction.on_commit(partial(recommendation_index.add, instance.id, instance.applicant_id,
+                                      instance.deadline, instance.requested_minutes))
+
+
+@receiver(post_delete, sender=CollaborationRequest)
+def unindex_collaboration_request(sender, instance, **kwargs):
+    transaction.on_commit(partial(recommendation_index.remove, instance.id))
+
+
+@receiver(post_save, sender=CollaborationRequest)
+def index_collaboration_request_text(sender, instance, raw=False, **kwargs):
+    if not raw:
+        search.index(instance)
+
+
+@receiver(post_delete, sender=CollaborationRequest)
+def unindex_collaboration_request_text(sender, instance, **kwargs):
+    search.unindex(instance)
+
+
+@receiver(m2m_changed, sender=CollaborationRequest.competences.through)
+def index_collaboration_request_competences(sender, instance, action, reverse, pk_set, **kwargs):
+    # Deferred like the row itself, so the index never sees what rolls back.
+    if isinstance(instance, CollaborationRequest):
+        if action == 'post_add':
+            transaction.on_commit(partial(recommendation_index.link, instance.pk, set(pk_set)))
+        elif action == 'post_remove':
+            transaction.on_commit(partial(recommendation_index.unlink, instance.pk, set(pk_set)))
+        elif action == 'post_clear':
+            transaction.on_commit(partial(recommendation_index.unlink, instance.pk))
+    else:
+        if action == 'post_add':
+            for request_id in pk_set:
+                transaction.on_commit(partial(recommendation_index.link, request_id, (instance.pk,)))
+        elif action == 'post_remove':
+            for request_id in pk_set:
+                transaction.on_commit(partial(recommendation_index.unlink, request_id, (instance.pk,)))
+        elif action == 'post_clear':
+            transaction.on_commit(partial(recommendation_index.drop_competence, instance.pk))
+
+
+@receiver(post_delete, sender=Token)
+def invalidate_token(sender, instance, **kwargs):
+    token_cache.invalidate(instance.key)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_user_tokens(sender, instance, **kwargs):
+    token_cache.invalidate_user(instance.pk)
+
+
+@receiver(post_save, sender=Student)
+def open_time_account(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        open_account(instance)
+
+
+@receiver(post_save, sender=Student)
+@receiver(post_delete, sender=Student)
+def invalidate_student_tokens(sender, instance, **kwargs):
+    token_cache.invalidate_user(instance.pk)
+
+
+INVALIDATING_ACTIONS = ('post_add', 'post_remove', 'pre_clear')
+
+
+def participants(collaborations):
+    return {student_id for pair in collaborations.values_list('applicant_id', 'collaborator_id') for student_id in pair}
+
+
+@receiver(post_save, sender=CollaborationRequest)
+@receiver(post_delete, sender=CollaborationRequest)
+def invalidate_collaboration_request_responses(sender, instance, **kwargs):
+    response_cache.invalidate(response_cache.COLLABORATION_REQUESTS)
+
+
+@receiver(m2m_changed, sender=CollaborationRequest.competences.through)
+@receiver(m2m_changed, sender=CollaborationRequest.offerers.through)
+def invalidate_collaboration_request_relation_responses(sender, action, **kwargs):
+    if action in INVALIDATING_ACTIONS:
+        response_cache.invalidate(response_cache.COLLABORATION_REQUESTS)
+
+
+@receiver(post_save, sender=Collaboration)
+@receiver(post_delete, sender=Collaboration)
+def invalidate_collaboration_responses(sender, instance, **kwargs):
+    response_cache.invalidate(response_cache.COLLABORATIONS, (instance.applicant_id, instance.collaborator_id))
+
+
+@receiver(m2m_changed, sender=Collaboration.competences.through)
+def invalidate_collaboration_competence_responses(sender, instance, action, pk_set, **kwargs):
+    if action not in INVALIDATING_ACTIONS:
+        return
+    if isinstance(instance, Collaboration):
+        collaborations = Collaboration.objects.filter(pk=instance.pk)
+    elif action == 'pre_clear':
+        collaborations = instance.collaborations.all()
+    else:
+        collaborations = Collaboration.objects.filter(pk__in=pk_set)
+    response_cache.invalidate(response_cache.COLLABORATIONS, participants(collaborations))
+
+
+@receiver(m2m_changed, sender=Competence.students.through)
+def invalidate_student_competence_responses(sender, instance, action, pk_set, **kwargs):
+    if action not in INVALIDATING_ACTIONS:
+        return
+    if isinstance(instance, Student):
+        student_ids = (instance.pk,)
+    elif action == 'pre_clear':
+        student_ids = list(instance.students.values_list('pk', flat=True))
+    else:
+        student_ids = pk_set
+    response_cache.invalidate(response_cache.STUDENT, student_ids)
+
+
+@receiver(post_save, sender=Competence)
+@receiver(pre_delete, sender=Competence)
+def invalidate_competence_responses(sender, instance, **kwargs):
+    # Competence names are shown wherever the competence is listed.
+    response_cache.invalidate(response_cache.COLLABORATION_REQUESTS)
+    response_cache.invalidate(response_cache.STUDENT, list(instance.students.values_list('pk', flat=True)))
+    response_cache.invalidate(response_cache.COLLABORATIONS, participants(instance.collaborations.all()))
+
+
+@receiver(post_save, sender=Degree)
+@receiver(post_delete, sender=Degree)
+def invalidate_degree_responses(sender, instance, **kwargs):
+    response_cache.invalidate(response_cache.STUDENT, (instance.student_id,))
+
+
+@receiver(post_save, sender=DegreeCatalog)
+@receiver(post_delete, sender=DegreeCatalog)
+def invalidate_degree_catalog(sender, instance, **kwargs):
+    degrees.catalog.invalidate()
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+@receiver(post_save, sender=Student)
+@receiver(post_delete, sender=Student)
+def invalidate_student_responses(sender, instance, **kwargs):
+    # Students are shown as applicants and offerers in every request list.
+    response_cache.invalidate_user(instance.pk)
+    response_cache.invalidate(response_cache.COLLABORATION_REQUESTS)
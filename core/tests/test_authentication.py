@@ -0,0 +1,72 @@
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+from rest_framework import status
+from core.authentication import TokenCache, token_cache
+from core.models import Student, User
+
+
+class CachedTokenAuthenticationTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        token_cache.clear()
+        self.user = User.objects.create_user('test@test.com', 'testpass1234')
+        self.student = Student.objects.create(user=self.user)
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def test_repeated_requests_hit_the_cache(self):
+        self.client.get('/api/v1/collaborations/')
+        res = self.client.get('/api/v1/collaborations/')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(token_cache.stats()['misses'], 1)
+        self.assertEqual(token_cache.stats()['hits'], 1)
+
+    def test_cache_hit_needs_no_query_for_the_student(self):
+        self.client.get('/api/v1/collaborations/')
+
+        # A different page size misses the response cache.
+        with self.assertNumQueries(1):
+            self.client.get('/api/v1/collaborations/', {'page_size': 10})
+
+    def test_cached_users_are_not_shared_between_lookups(self):
+        first = token_cache.get_user(self.token.key)
+        second = token_cache.get_user(self.token.key)
+
+        first.student.description = 'changed'
+        self.assertEqual(second.student.description, '')
+        self.assertIs(second.student.user, second)
+
+    def test_logout_invalidates_the_token_immediately(self):
+        self.client.get('/api/v1/collaborations/')
+        self.client.get('/api/v1/logout/')
+
+        res = self.client.get('/api/v1/collaborations/')
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(token_cache.stats()['size'], 0)
+
+    def test_logout_invalidates_the_token_in_other_processes(self):
+        other_process = TokenCache()
+        self.assertEqual(other_process.get_user(self.token.key), self.user)
+
+        self.client.get('/api/v1/logout/')
+
+        self.assertIsNone(other_process.get_user(self.token.key))
+        self.assertEqual(other_process.stats()['size'], 0)
+
+    def test_user_changes_reach_other_processes(self):
+        other_process = TokenCache()
+        other_process.get_user(self.token.key)
+        other_process.get_user(self.token.key)
+
+        self.user.is_active = False
+        self.user.save()
+
+        self.assertFalse(other_process.get_user(self.token.key).is_active)
+        self.assertFalse(other_process.get_user(self.token.key).is_active)
+        self.assertEqual(other_process.stats(), {'hits': 2, 'misses': 2, 'size': 1})
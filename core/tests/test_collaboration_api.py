@@ -11,7 +11,7 @@ class PrivateCollaborationApiTests(TestCase):
     def create_collaboration_request(self):
         collaboration_request = CollaborationRequest.objects.create(
             title='Ayuda en proyecto de matemáticas',
-            requested_time=0.25, 
+            requested_minutes=15, 
             deadline=datetime.date(2021, 1, 1), 
             applicant=self.applicant
         )
@@ -39,25 +39,25 @@ class PrivateCollaborationApiTests(TestCase):
     def test_retrieve_collaborations(self):
         Collaboration.objects.create(
             title='Ayuda en proyecto de inglés',
-             requested_time=0.25, 
-             deadline=datetime.date(2021, 1, 1), 
+             requested_minutes=15, 
+             deadline=datetime.date.today() + datetime.timedelta(days=1), 
              applicant=self.applicant, 
              collaborator=self.collaborator
         )
         Collaboration.objects.create(
             title='Ayuda en proyecto de física',
-             requested_time=0.5, 
-             deadline=datetime.date(2021, 1, 12), 
+             requested_minutes=30, 
+             deadline=datetime.date.today() + datetime.timedelta(days=12), 
              applicant=self.applicant, 
              collaborator=self.collaborator
         )
 
         res = self.client.get('/api/v1/collaborations/')
 
-        collaborations = Collaboration.objects.all()
+        collaborations = Collaboration.objects.order_by('deadline', 'id')
         serializer = CollaborationListSerializer(collaborations, many=True)
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data['results'], serializer.data)
     
     def test_create_collaboration(self):
         payload = {
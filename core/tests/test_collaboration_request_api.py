@@ -1,3 +1,5 @@
+from unittest import mock
+from django.core.cache import cache
 from django.test import TestCase
 from rest_framework.test import APIClient
 from rest_framework import status
@@ -18,15 +20,15 @@ class PrivateCollaborationRequestApiTests(TestCase):
         self.client.force_authenticate(self.user)
     
     def test_retrieve_collaboration_requests(self):
-        CollaborationRequest.objects.create(title='Ayuda en proyecto de inglés', requested_time=0.25, deadline=datetime.date(2021, 1, 1), applicant=self.student)
-        CollaborationRequest.objects.create(title='Ayuda en proyecto de informática', requested_time=0.5, deadline=datetime.date(2021, 1, 5), applicant=self.student)
+        CollaborationRequest.objects.create(title='Ayuda en proyecto de inglés', requested_minutes=15, deadline=datetime.date.today() + datetime.timedelta(days=1), applicant=self.student)
+        CollaborationRequest.objects.create(title='Ayuda en proyecto de informática', requested_minutes=30, deadline=datetime.date.today() + datetime.timedelta(days=5), applicant=self.student)
 
         res = self.client.get('/api/v1/collaboration-requests/')
 
-        collaboration_requests = CollaborationRequest.objects.all()
+        collaboration_requests = CollaborationRequest.objects.order_by('deadline', 'id')
         serializer = CollaborationRequestSerializer(collaboration_requests, many=True)
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data['results'], serializer.data)
     
     def test_create_collaboration_request(self):
         payload = {
@@ -41,4 +43,21 @@ class PrivateCollaborationRequestApiTests(TestCase):
             title=payload['title'],
             applicant=self.student
         ).exists()
-        self.assertTrue(exists)
\ No newline at end of file
+        self.assertTrue(exists)
+
+    def test_expired_requests_are_not_listed_before_they_are_deleted(self):
+        cache.clear()
+        today = datetime.date.today()
+        CollaborationRequest.objects.create(title='Vencida', requested_minutes=15,
+                                            deadline=today - datetime.timedelta(days=1), applicant=self.student)
+        current = CollaborationRequest.objects.create(title='Para hoy', requested_minutes=15, deadline=today,
+                                                      applicant=self.student)
+
+        res = self.client.get('/api/v1/collaboration-requests/')
+        self.assertEqual([result['id'] for result in res.data['results']], [current.id])
+
+        tomorrow = mock.Mock(wraps=datetime.date)
+        tomorrow.today.return_value = today + datetime.timedelta(days=1)
+        with mock.patch('core.views.date', tomorrow), mock.patch('core.response_cache.date', tomorrow):
+            res = self.client.get('/api/v1/collaboration-requests/')
+        self.assertEqual(res.data['results'], [])
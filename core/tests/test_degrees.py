@@ -0,0 +1,105 @@
+from io import StringIO
+from unittest import mock
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.exceptions import ValidationError
+from rest_framework.test import APIClient
+from core import degrees
+from core.fields import DegreeField
+from core.models import Degree, DegreeCatalog, Student, User
+import json
+import tempfile
+
+
+def registration(*degree_names):
+    return {
+        'user': {'first_name': 'Ana', 'last_name': 'Ruiz', 'email': 'ana@test.com', 'password': 'testpassword'},
+        'degrees': [{'name': name, 'higher_grade': '2', 'finished': False} for name in degree_names],
+    }
+
+
+class DegreeCatalogTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        degrees.catalog.reset()
+        self.addCleanup(degrees.catalog.reset)
+        self.client = APIClient()
+
+    def test_the_migration_loads_the_json_catalog(self):
+        self.assertEqual(dict(DegreeCatalog.objects.values_list('id', 'name')), degrees.read_file())
+
+    def test_lookups_are_served_from_memory(self):
+        degrees.catalog.get()
+        with CaptureQueriesContext(connection) as queries:
+            catalog = degrees.catalog.get()
+        self.assertEqual(len(queries), 0)
+        self.assertEqual(catalog.names[0], 'Grado en Administración y Dirección de Empresas')
+        with self.assertRaises(TypeError):
+            catalog.names[0] = 'Otro'
+
+    def test_degrees_endpoint_revalidates_with_its_etag(self):
+        res = self.client.get('/api/v1/degrees/')
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.data[0], {'id': '0', 'name': 'Grado en Administración y Dirección de Empresas'})
+        self.assertEqual(len(res.data), DegreeCatalog.objects.count())
+        self.assertIn('public', res['Cache-Control'])
+
+        with CaptureQueriesContext(connection) as queries:
+            cached = self.client.get('/api/v1/degrees/', HTTP_IF_NONE_MATCH=res['ETag'])
+        self.assertEqual(cached.status_code, 304)
+        self.assertEqual(len(queries), 0)
+
+        DegreeCatalog.objects.filter(id=0).update(name='Grado en ADE')
+        degrees.catalog.invalidate()
+        changed = self.client.get('/api/v1/degrees/', HTTP_IF_NONE_MATCH=res['ETag'])
+        self.assertEqual(changed.status_code, 200)
+        self.assertEqual(changed.data[0]['name'], 'Grado en ADE')
+
+    def test_other_processes_notice_changes_through_the_version_token(self):
+        before = degrees.catalog.get()
+        DegreeCatalog.objects.filter(id=0).update(name='Grado en ADE')
+        cache.set(degrees.VERSION_KEY, 'changed elsewhere', None)
+
+        self.assertIs(degrees.catalog.get(), before)
+        with mock.patch.object(degrees, 'CHECK_INTERVAL', 0):
+            self.assertEqual(degrees.catalog.get().names[0], 'Grado en ADE')
+
+    def test_registration_validates_codes_against_the_catalog(self):
+        res = self.client.post('/api/v1/students/', registration('999'), format='json')
+        self.assertEqual(res.status_code, 400)
+        self.assertIn('is not a valid choice', str(res.data['degrees']))
+
+        res = self.client.post('/api/v1/students/', registration(12), format='json')
+        self.assertEqual(res.status_code, 201)
+        self.assertEqual(res.data['degrees'][0]['name'], '12')
+        self.assertEqual(Degree.objects.get().name.name, 'Doble Grado en Periodismo y Comunicación Audiovisual')
+
+    def test_only_integers_and_digit_strings_are_codes(self):
+        field = DegreeField()
+        self.assertEqual(field.run_validation(12), 12)
+        self.assertEqual(field.run_validation(' 12 '), 12)
+        for data in (1.9, 1.0, True, '1.0', '-1', '²', [1]):
+            with self.assertRaisesMessage(ValidationError, 'is not a valid choice'):
+                field.run_validation(data)
+
+    def test_load_degrees_syncs_the_catalog(self):
+        student = Student.objects.create(user=User.objects.create_user('student@test.com', 'testpass1234'))
+        Degree.objects.create(name_id=1, higher_grade='2', finished=False, student=student)
+        degrees.catalog.get()
+
+        with tempfile.NamedTemporaryFile('w', suffix='.json') as json_file:
+            json.dump({'0': 'Grado en ADE', '2': 'Grado en Ciencias de la Actividad Física y del Deporte',
+                       '500': 'Grado en Inteligencia Artificial'}, json_file)
+            json_file.flush()
+            out = StringIO()
+            call_command('load_degrees', file=json_file.name, prune=True, stdout=out)
+
+        self.assertIn('1 created, 1 updated, 191 deleted', out.getvalue())
+        self.assertIn('Kept degrees still in use: 1', out.getvalue())
+        self.assertEqual(list(DegreeCatalog.objects.values_list('id', flat=True)), [0, 1, 2, 500])
+        self.assertEqual(degrees.catalog.get().names[500], 'Grado en Inteligencia Artificial')
@@ -0,0 +1,41 @@
+from django.test import TestCase
+from rest_framework.test import APIClient
+from rest_framework import status
+from core.models import Student, User, CollaborationRequest
+import datetime
+
+
+class HoursFieldTests(TestCase):
+
+    def setUp(self):
+        self.student = Student.objects.create(
+            user=User.objects.create_user('student@test.com', 'testpass1234')
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.student.user)
+
+    def create(self, requested_time):
+        return self.client.post('/api/v1/collaboration-requests/', {
+            'title': 'Ayuda en proyecto de matemáticas',
+            'requested_time': requested_time,
+            'deadline': datetime.date.today()
+        })
+
+    def test_hours_are_stored_as_minutes(self):
+        res = self.create('0.75')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res.data['requested_time'], '0.75')
+        self.assertEqual(CollaborationRequest.objects.get().requested_minutes, 45)
+
+    def test_only_quarter_hours_are_accepted(self):
+        for requested_time in ('0.1', '0.33', '0'):
+            res = self.create(requested_time)
+
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST, requested_time)
+        self.assertFalse(CollaborationRequest.objects.exists())
+
+    def test_available_time_is_returned_in_hours(self):
+        res = self.client.get('/api/v1/students/me/')
+
+        self.assertEqual(res.data['available_time'], '1.00')
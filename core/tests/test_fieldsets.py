@@ -0,0 +1,209 @@
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Prefetch
+from django.test import RequestFactory, TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+from core import rows
+from core.fieldsets import ALL, Fieldset
+from core.models import Student, User, Competence, CollaborationRequest, Collaboration, Degree
+from core.renderers import FastJSONRenderer
+from core.serializers import CollaborationRequestSerializer, CollaborationListSerializer
+import datetime
+
+
+DEADLINE = datetime.date.today() + datetime.timedelta(days=5)
+
+
+def create_student(email, image=''):
+    user = User.objects.create_user(email, 'testpass1234', first_name='Test', last_name=email)
+    return Student.objects.create(user=user, profile_image=image)
+
+
+class SparseFieldsetTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.student = create_student('student@test.com', 'profile/student.png')
+        self.offerer = create_student('offerer@test.com', 'profile/offerer.png')
+        self.client = APIClient()
+        self.client.force_authenticate(self.student.user)
+
+        self.maths = Competence.objects.create(name='Matemáticas')
+        self.physics = Competence.objects.create(name='Física')
+        self.maths.students.add(self.student)
+        Degree.objects.create(name_id=1, higher_grade='2', finished=False, student=self.student)
+
+        self.collaboration_request = CollaborationRequest.objects.create(
+            title='Ayuda', description='Con derivadas', requested_minutes=60, deadline=DEADLINE,
+            applicant=self.student
+        )
+        self.collaboration_request.competences.add(self.physics, self.maths)
+        self.collaboration_request.offerers.add(self.offerer)
+
+        self.collaboration = Collaboration.objects.create(
+            title='Ayuda', requested_minutes=60, deadline=DEADLINE, applicant=self.student, collaborator=self.offerer
+        )
+        self.collaboration.competences.add(self.maths)
+
+    def get(self, url, **params):
+        with CaptureQueriesContext(connection) as context:
+            res = self.client.get(url, params)
+        return res, context
+
+    def test_fields_limit_the_keys_and_the_queries(self):
+        full, full_queries = self.get('/api/v1/collaboration-requests/')
+        res, queries = self.get('/api/v1/collaboration-requests/', fields='id,title,deadline')
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.data['results'], [
+            {'id': self.collaboration_request.id, 'title': 'Ayuda', 'deadline': DEADLINE.isoformat()}
+        ])
+        self.assertEqual(len(queries), len(full_queries) - 2)
+        self.assertFalse(any('core_user' in query['sql'] or 'offerers' in query['sql'] for query in queries))
+        self.assertNotIn(b'profile', res.content)
+        self.assertIn(b'profile', full.content)
+
+    def test_unexpanded_relations_are_primary_keys(self):
+        res, queries = self.get('/api/v1/collaboration-requests/',
+                                fields='id,competences,applicant,offerers', expand='applicant')
+
+        result = res.data['results'][0]
+        self.assertEqual(list(result), ['id', 'competences', 'applicant', 'offerers'])
+        self.assertEqual(result['competences'], [self.maths.id, self.physics.id])
+        self.assertEqual(result['applicant']['id'], self.student.pk)
+        self.assertIn('profile/student.png', result['applicant']['profile_image'])
+        self.assertEqual(result['offerers'], [self.offerer.pk])
+        self.assertEqual(sum('core_user' in query['sql'] for query in queries), 1)
+
+    def test_expand_alone_keeps_every_field(self):
+        res, _ = self.get('/api/v1/collaboration-requests/', expand='')
+
+        result = res.data['results'][0]
+        self.assertEqual(list(result), list(CollaborationRequestSerializer.Meta.fields))
+        self.assertEqual(result['applicant'], self.student.pk)
+        self.assertEqual(result['offerers'], [self.offerer.pk])
+
+    def test_unknown_fields_are_rejected(self):
+        for params in ({'fields': 'id,password'}, {'expand': 'title'}):
+            with self.subTest(params=params):
+                res, _ = self.get('/api/v1/collaboration-requests/', **params)
+                self.assertEqual(res.status_code, 400)
+                self.assertIn(next(iter(params)), res.data)
+
+    def test_retrieve_and_recommended_prune_the_queryset(self):
+        url = f'/api/v1/collaboration-requests/{self.collaboration_request.id}/'
+        res, queries = self.get(url, fields='id,title,applicant', expand='')
+
+        self.assertEqual(res.data, {'id': self.collaboration_request.id, 'title': 'Ayuda', 'applicant': self.student.pk})
+        self.assertFalse(any('core_competence' in query['sql'] or 'offerers' in query['sql'] for query in queries))
+
+        res, _ = self.get('/api/v1/collaboration-requests/recommended/', fields='id')
+        self.assertEqual(res.status_code, 200)
+        self.assertTrue(all(list(result) == ['id'] for result in res.data))
+
+    def test_writes_ignore_the_fieldset(self):
+        res = self.client.post('/api/v1/collaboration-requests/?fields=id', {
+            'title': 'Nueva', 'requested_time': '0.5', 'deadline': DEADLINE.isoformat(),
+        })
+
+        self.assertEqual(res.status_code, 201)
+        self.assertIn('applicant', res.data)
+
+    def test_collaborations_and_student(self):
+        res, _ = self.get('/api/v1/collaborations/', fields='id,competences', expand='')
+        self.assertEqual(res.data['results'], [{'id': self.collaboration.id, 'competences': [self.maths.id]}])
+
+        url = f'/api/v1/collaborations/{self.collaboration.id}/'
+        res, queries = self.get(url, fields='title,collaborator', expand='collaborator')
+        self.assertEqual(list(res.data), ['title', 'collaborator'])
+        self.assertEqual(res.data['collaborator']['id'], self.offerer.pk)
+        self.assertFalse(any('core_competence' in query['sql'] for query in queries))
+
+        for params in ({'expand': 'competences'}, {'fields': 'id,title'}):
+            with self.subTest(params=params):
+                res, queries = self.get(url, **params)
+                self.assertEqual(res.status_code, 200)
+                self.assertFalse(any('core_student' in query['sql'] for query in queries))
+
+        res, queries = self.get('/api/v1/students/me/', fields='description,available_time')
+        self.assertEqual(res.data, {'description': '', 'available_time': '1.00'})
+        self.assertFalse(any('core_degree' in query['sql'] or 'core_competence' in query['sql'] for query in queries))
+
+
+class FastPathFieldsetParityTests(TestCase):
+
+    FIELDSETS = (
+        ALL,
+        Fieldset(frozenset(['id', 'title', 'deadline']), None),
+        Fieldset(None, frozenset()),
+        Fieldset(frozenset(['id', 'applicant', 'offerers', 'competences']), frozenset(['offerers'])),
+        Fieldset(frozenset(['requested_time', 'competences']), frozenset(['competences'])),
+    )
+
+    def setUp(self):
+        self.request = RequestFactory().get('/api/v1/collaboration-requests/')
+        students = [create_student(f'student{i}@test.com', f'profile/{i}.png' if i % 2 else '') for i in range(3)]
+        competences = [Competence.objects.create(name=name) for name in ('Zoología', 'Álgebra')]
+
+        for i, applicant in enumerate(students):
+            collaboration_request = CollaborationRequest.objects.create(
+                title=f'Ayuda {i}', requested_minutes=15 * (i + 1), deadline=DEADLINE, applicant=applicant
+            )
+            collaboration_request.competences.add(*competences[:i])
+            collaboration_request.offerers.add(*[student for student in students if student != applicant][:i])
+
+            collaboration = Collaboration.objects.create(
+                title=f'Colaboración {i}', requested_minutes=15, deadline=DEADLINE,
+                applicant=applicant, collaborator=students[(i + 1) % 3]
+            )
+            collaboration.competences.add(*competences[i % 2:])
+
+    def assertSameOutput(self, serializer, build):
+        with CaptureQueriesContext(connection) as drf_queries:
+            drf = JSONRenderer().render(serializer())
+        with CaptureQueriesContext(connection) as fast_queries:
+            fast = FastJSONRenderer().render(build())
+
+        self.assertEqual(drf, fast)
+        self.assertEqual(len(fast_queries), len(drf_queries))
+
+    def test_collaboration_requests(self):
+        for fieldset in self.FIELDSETS:
+            with self.subTest(fieldset=fieldset):
+                queryset = CollaborationRequest.objects.order_by('id')
+                if fieldset.expands('applicant'):
+                    queryset = queryset.select_related('applicant__user')
+                if fieldset.includes('competences'):
+                    queryset = queryset.prefetch_related(
+                        Prefetch('competences', queryset=Competence.objects.order_by('id'))
+                    )
+                if fieldset.includes('offerers'):
+                    offerers = Student.objects.order_by('pk')
+                    if fieldset.expands('offerers'):
+                        offerers = offerers.select_related('user')
+                    queryset = queryset.prefetch_related(Prefetch('offerers', queryset=offerers))
+                context = {'request': self.request, 'fieldset': fieldset}
+
+                self.assertSameOutput(
+                    lambda: CollaborationRequestSerializer(queryset.all(), many=True, context=context).data,
+                    lambda: rows.collaboration_requests(
+                        list(rows.values(queryset, rows.collaboration_request_fields(fieldset))), self.request, fieldset
+                    ),
+                )
+
+    def test_collaborations(self):
+        for fieldset in (ALL, Fieldset(frozenset(['id', 'competences']), frozenset()), Fieldset(frozenset(['id']), None)):
+            with self.subTest(fieldset=fieldset):
+                queryset = Collaboration.objects.order_by('id')
+                if fieldset.includes('competences'):
+                    queryset = queryset.prefetch_related(
+                        Prefetch('competences', queryset=Competence.objects.order_by('id'))
+                    )
+
+                self.assertSameOutput(
+                    lambda: CollaborationListSerializer(queryset.all(), many=True, context={'fieldset': fieldset}).data,
+                    lambda: rows.collaborations(list(rows.values(queryset, rows.collaboration_fields(fieldset))),
+                                                fieldset),
+                )
@@ -0,0 +1,130 @@
+from unittest import skipUnless
+from django.db import connection
+from django.db.models import Count
+from django.test import TestCase
+from rest_framework.test import APIClient
+from core.filters import RequestCompetence, filter_collaboration_requests, with_competences
+from core.models import Student, User, Competence, CollaborationRequest
+import datetime
+
+
+TODAY = datetime.date.today()
+
+
+class CollaborationRequestFilterTests(TestCase):
+
+    def setUp(self):
+        self.student = Student.objects.create(
+            user=User.objects.create_user('student@test.com', 'testpass1234')
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.student.user)
+
+        self.maths = Competence.objects.create(name='Matemáticas')
+        self.physics = Competence.objects.create(name='Física')
+        self.english = Competence.objects.create(name='Inglés')
+
+        self.soon = self.create(30, 1, self.maths)
+        self.later = self.create(90, 10, self.maths, self.physics)
+        self.long = self.create(180, 5, self.english)
+
+    def create(self, minutes, days, *competences):
+        collaboration_request = CollaborationRequest.objects.create(
+            title='Ayuda', requested_minutes=minutes, applicant=self.student,
+            deadline=TODAY + datetime.timedelta(days=days)
+        )
+        collaboration_request.competences.add(*competences)
+        return collaboration_request
+
+    def list(self, **params):
+        return self.client.get('/api/v1/collaboration-requests/', params)
+
+    def ids(self, **params):
+        return [collaboration_request['id'] for collaboration_request in self.list(**params).data['results']]
+
+    def test_filter_by_any_of_several_competences(self):
+        self.assertEqual(self.ids(competence=[self.physics.id]), [self.later.id])
+        self.assertEqual(self.ids(competence=[self.maths.id, self.physics.id]), [self.soon.id, self.later.id])
+
+    def test_filter_by_requested_time_range(self):
+        self.assertEqual(self.ids(min_requested_time='1.5'), [self.long.id, self.later.id])
+        self.assertEqual(self.ids(min_requested_time='0.5', max_requested_time='1.5'), [self.soon.id, self.later.id])
+
+    def test_filter_by_deadline_window(self):
+        self.assertEqual(self.ids(deadline_after=TODAY + datetime.timedelta(days=2)), [self.long.id, self.later.id])
+        self.assertEqual(self.ids(deadline_after=TODAY, deadline_before=TODAY + datetime.timedelta(days=5)),
+                         [self.soon.id, self.long.id])
+
+    def test_filters_combine(self):
+        ids = self.ids(competence=[self.maths.id], max_requested_time='2', deadline_after=TODAY + datetime.timedelta(days=2))
+
+        self.assertEqual(ids, [self.later.id])
+
+    def test_invalid_filters_are_rejected(self):
+        self.assertEqual(self.list(min_requested_time='2', max_requested_time='1').status_code, 400)
+        self.assertEqual(self.list(deadline_after=TODAY, deadline_before=TODAY - datetime.timedelta(days=1)).status_code, 400)
+        self.assertEqual(self.list(competence='maths').status_code, 400)
+        self.assertEqual(self.list(facets='degrees').status_code, 400)
+
+    def test_facets_count_requests_per_competence_ignoring_the_competence_filter(self):
+        res = self.list(facets='competences', competence=[self.physics.id], max_requested_time='2')
+
+        self.assertEqual([r['id'] for r in res.data['results']], [self.later.id])
+        self.assertEqual(res.data['facets'], {'competences': [
+            {'id': self.maths.id, 'name': 'Matemáticas', 'count': 2},
+            {'id': self.physics.id, 'name': 'Física', 'count': 1},
+        ]})
+
+    def test_facets_are_opt_in(self):
+        self.assertNotIn('facets', self.list().data)
+
+
+@skipUnless(connection.vendor == 'sqlite', 'Checks SQLite query plans')
+class CollaborationRequestFilterPlanTests(TestCase):
+    """
+    Every filter combination must seek an index rather than scan the
+    requests or their competences.
+    """
+
+    FILTERS = [
+        {'deadline_after': TODAY},
+        {'deadline_after': TODAY, 'deadline_before': TODAY},
+        {'min_requested_time': 60},
+        {'min_requested_time': 60, 'max_requested_time': 120},
+        {'deadline_after': TODAY, 'min_requested_time': 60, 'max_requested_time': 120},
+    ]
+
+    def plan(self, queryset):
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+            return [row[-1] for row in cursor.fetchall()]
+
+    def assertSeeks(self, queryset):
+        plan = self.plan(queryset)
+        for table in (CollaborationRequest._meta.db_table, RequestCompetence._meta.db_table):
+            scans = [step for step in plan if step.startswith(f'SCAN {table}') and 'INDEX' not in step]
+            self.assertEqual(scans, [], plan)
+        self.assertTrue(any(step.startswith('SEARCH') for step in plan), plan)
+
+    def test_filters_seek_an_index(self):
+        queryset = CollaborationRequest.objects.order_by('deadline', 'id')
+        for filters in self.FILTERS:
+            for competences in (None, [1, 2]):
+                with self.subTest(filters=filters, competences=competences):
+                    self.assertSeeks(with_competences(filter_collaboration_requests(queryset, filters), competences)[:51])
+
+    def test_competence_filter_reads_only_the_covering_index(self):
+        plan = self.plan(with_competences(CollaborationRequest.objects.all(), [1]))
+
+        self.assertTrue(any('COVERING INDEX core_competence_collaboration_requests_competence_request_idx' in step
+                            for step in plan), plan)
+
+    def test_facets_seek_an_index(self):
+        for filters in self.FILTERS:
+            with self.subTest(filters=filters):
+                self.assertSeeks(RequestCompetence.objects
+                                 .filter(collaborationrequest_id__in=filter_collaboration_requests(
+                                     CollaborationRequest.objects.all(), filters).values('id'))
+                                 .values('competence_id')
+                                 .annotate(count=Count('collaborationrequest_id')))
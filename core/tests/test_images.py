@@ -0,0 +1,166 @@
+from io import BytesIO
+from unittest import mock
+from urllib.parse import parse_qs, urlsplit
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from PIL import Image
+from rest_framework.test import APIClient
+from chronus.storage_backends import MediaStorage
+from core import images
+from core.models import Student, User, CollaborationRequest, ImageUpload
+import datetime
+import shutil
+import tempfile
+
+
+def image_bytes(size=(1600, 1200), format='JPEG', mode='RGB'):
+    buffer = BytesIO()
+    Image.new(mode, size, 'orange').save(buffer, format)
+    return buffer.getvalue()
+
+
+class ProfileImageUploadTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        self.settings = override_settings(DEFAULT_FILE_STORAGE='django.core.files.storage.FileSystemStorage',
+                                          MEDIA_ROOT=media_root, MEDIA_URL='/media/')
+        self.settings.enable()
+        self.addCleanup(self.settings.disable)
+
+        self.student = Student.objects.create(user=User.objects.create_user('student@test.com', 'testpass1234'))
+        self.client = APIClient()
+        self.client.force_authenticate(self.student.user)
+
+    def upload(self, content, content_type='image/jpeg'):
+        res = self.client.post('/api/v1/students/me/profile-image/', {'content_type': content_type})
+        self.assertEqual(res.status_code, 201)
+        target = res.data['upload']
+
+        self.assertEqual(target['method'], 'PUT')
+        put = APIClient().put(urlsplit(target['url']).path, content, content_type=target['headers']['Content-Type'])
+        self.assertEqual(put.status_code, 204)
+        return res.data['id']
+
+    def complete(self, upload_id):
+        return self.client.post(f'/api/v1/students/me/profile-image/{upload_id}/complete/')
+
+    def test_uploaded_images_become_webp_variants(self):
+        upload_id = self.upload(image_bytes())
+        res = self.complete(upload_id)
+        self.assertEqual(res.status_code, 202)
+        self.assertEqual(res.data['status'], ImageUpload.PENDING)
+
+        self.assertEqual(images.drain(), images.DrainStats(ready=1, retried=0, failed=0))
+
+        self.student.refresh_from_db()
+        upload = ImageUpload.objects.get(pk=upload_id)
+        self.assertEqual(self.student.profile_image_sizes, '96,256,1024')
+        self.assertEqual(self.student.profile_image.name, upload.key.replace('uploads/', 'profile/')[:-4] + '/1024.webp')
+        self.assertFalse(default_storage.exists(upload.key))
+        for size in images.PROFILE_IMAGE_SIZES:
+            with default_storage.open(images.variant(self.student.profile_image.name, '96,256,1024', size)) as file:
+                image = Image.open(file)
+                self.assertEqual((image.format, image.width), ('WEBP', size))
+
+        self.assertEqual(self.client.get(f'/api/v1/students/me/profile-image/{upload_id}/').data['status'],
+                         ImageUpload.READY)
+
+    def test_each_view_gets_the_smallest_variant_that_fits(self):
+        self.complete(self.upload(image_bytes(), 'image/jpeg'))
+        images.drain()
+        CollaborationRequest.objects.create(title='Ayuda', requested_minutes=60, applicant=self.student,
+                                            deadline=datetime.date.today() + datetime.timedelta(days=1))
+
+        listed = self.client.get('/api/v1/collaboration-requests/').data['results'][0]['applicant']
+        profile = self.client.get('/api/v1/students/me/').data
+
+        self.assertTrue(listed['profile_image'].endswith('/96.webp'))
+        self.assertTrue(profile['profile_image'].endswith('/256.webp'))
+
+    def test_images_without_variants_are_served_as_they_are(self):
+        self.student.profile_image = 'legacy.png'
+        self.student.save()
+
+        self.assertEqual(self.client.get('/api/v1/students/me/').data['profile_image'],
+                         'http://testserver/media/legacy.png')
+        self.assertEqual(images.variant('profile/a/1024.webp', '96,256,1024', 2000), 'profile/a/1024.webp')
+        self.assertEqual(images.variant('profile/a/1024.webp', '96,256,1024', 100), 'profile/a/256.webp')
+
+    def test_invalid_images_fail_without_retries(self):
+        upload_id = self.upload(b'not an image at all')
+        self.complete(upload_id)
+
+        self.assertEqual(images.drain(), images.DrainStats(ready=0, retried=0, failed=1))
+
+        upload = ImageUpload.objects.get(pk=upload_id)
+        self.assertEqual(upload.status, ImageUpload.FAILED)
+        self.assertIn('InvalidImage', upload.last_error)
+        self.student.refresh_from_db()
+        self.assertEqual(self.student.profile_image.name, '')
+
+    def test_storage_errors_are_retried_later(self):
+        upload_id = self.upload(image_bytes((10, 10), 'PNG', 'RGBA'), 'image/png')
+        self.complete(upload_id)
+
+        with mock.patch.object(images, 'load', side_effect=ConnectionError('reset')):
+            self.assertEqual(images.drain(), images.DrainStats(ready=0, retried=1, failed=0))
+        self.assertEqual(images.drain(), images.DrainStats(ready=0, retried=0, failed=0))
+
+        ImageUpload.objects.filter(pk=upload_id).update(next_attempt_at=timezone.now())
+        self.assertEqual(images.drain(), images.DrainStats(ready=1, retried=0, failed=0))
+        self.assertEqual(ImageUpload.objects.get(pk=upload_id).attempts, 2)
+
+    def test_uploads_need_a_valid_token_and_size(self):
+        self.assertEqual(APIClient().put('/api/v1/uploads/forged:token/', b'x', content_type='image/png').status_code, 404)
+
+        res = self.client.post('/api/v1/students/me/profile-image/', {'content_type': 'image/png'})
+        path = urlsplit(res.data['upload']['url']).path
+        with mock.patch.object(images, 'MAX_UPLOAD_SIZE', 10):
+            self.assertEqual(APIClient().put(path, b'x' * 11, content_type='image/png').status_code, 400)
+
+        self.assertEqual(self.complete(res.data['id']).status_code, 400)
+        self.assertEqual(self.client.post('/api/v1/students/me/profile-image/',
+                                          {'content_type': 'image/svg+xml'}).status_code, 400)
+
+    def test_uploads_are_private_to_their_student(self):
+        upload = images.start_upload(self.student, 'image/png')
+        other = Student.objects.create(user=User.objects.create_user('other@test.com', 'testpass1234'))
+        client = APIClient()
+        client.force_authenticate(other.user)
+
+        self.assertEqual(client.get(f'/api/v1/students/me/profile-image/{upload.id}/').status_code, 404)
+        self.assertEqual(client.post(f'/api/v1/students/me/profile-image/{upload.id}/complete/').status_code, 404)
+
+    def test_registration_no_longer_takes_the_image(self):
+        res = APIClient().post('/api/v1/students/', {
+            'user': {'first_name': 'Ana', 'last_name': 'Ruiz', 'email': 'ana@test.com', 'password': 'testpassword'},
+            'profile_image': 'iVBORw0KGgo=',
+            'degrees': [{'name': '0', 'higher_grade': '3', 'finished': False}],
+        }, format='json')
+
+        self.assertEqual(res.status_code, 201)
+        self.assertIsNone(res.data['profile_image'])
+        self.assertEqual(Student.objects.get(user__email='ana@test.com').profile_image.name, '')
+
+
+class S3UploadTests(TestCase):
+
+    def test_s3_uploads_are_presigned_puts(self):
+        storage = MediaStorage(endpoint_url='http://localhost:9000', access_key='test', secret_key='test',
+                               bucket_name='chronus-test', region_name='us-east-1')
+        student = Student.objects.create(user=User.objects.create_user('student@test.com', 'testpass1234'))
+        upload = images.start_upload(student, 'image/webp')
+
+        with mock.patch.object(images, 'default_storage', storage):
+            target = images.presigned_put(upload, None)
+
+        url = urlsplit(target['url'])
+        query = parse_qs(url.query)
+        self.assertEqual(url.path, f'/chronus-test/media/{upload.key}')
+        self.assertIn('content-type', query['X-Amz-SignedHeaders'][0])
+        self.assertEqual(target['headers'], {'Content-Type': 'image/webp'})
@@ -0,0 +1,66 @@
+from unittest import skipUnless
+from django.db import connection
+from django.test import TestCase
+from django.utils import timezone
+from chat.models import Message
+from core.models import Student, User, Collaboration, CollaborationRequest, OutboxEmail
+import datetime
+
+
+def create_student(email):
+    return Student.objects.create(user=User.objects.create_user(email, 'testpass1234'))
+
+
+class CollaborationsOfStudentTests(TestCase):
+
+    def test_of_student_returns_each_collaboration_once(self):
+        student, other, third = [create_student(f'student{i}@test.com') for i in range(3)]
+        deadline = datetime.date.today()
+        applied = Collaboration.objects.create(title='A', requested_minutes=60, deadline=deadline,
+                                               applicant=student, collaborator=other)
+        collaborated = Collaboration.objects.create(title='B', requested_minutes=60, deadline=deadline,
+                                                    applicant=other, collaborator=student)
+        Collaboration.objects.create(title='C', requested_minutes=60, deadline=deadline,
+                                     applicant=other, collaborator=third)
+
+        self.assertEqual(list(Collaboration.objects.of_student(student).order_by('id')), [applied, collaborated])
+
+
+@skipUnless(connection.vendor == 'sqlite', 'Checks SQLite query plans')
+class HotQueryPlanTests(TestCase):
+
+    def plan(self, queryset):
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+            return [row[-1] for row in cursor.fetchall()]
+
+    def assertUsesIndex(self, queryset, index, sorts=False):
+        plan = self.plan(queryset)
+        self.assertTrue(any(index in step for step in plan), plan)
+        self.assertEqual(any('TEMP B-TREE FOR ORDER BY' in step for step in plan), sorts, plan)
+
+    def test_collaborations_of_a_student_seek_both_participant_indexes(self):
+        plan = self.plan(Collaboration.objects.of_student(1).order_by('deadline', 'id'))
+
+        self.assertTrue(any('core_collab_applica_531f53_idx' in step for step in plan), plan)
+        self.assertTrue(any('core_collab_collabo_584e09_idx' in step for step in plan), plan)
+        self.assertFalse(any(step.startswith('SCAN core_collaboration') for step in plan), plan)
+
+    def test_upcoming_requests_of_an_applicant_need_no_sort(self):
+        self.assertUsesIndex(CollaborationRequest.objects
+                             .filter(applicant=1, deadline__gte=datetime.date.today())
+                             .order_by('deadline', 'id'), 'core_collab_applica_8d5cfc_idx')
+
+    def test_requests_offered_to_read_the_covering_index(self):
+        self.assertUsesIndex(CollaborationRequest.objects.filter(offerers=1).order_by('deadline', 'id'),
+                             'COVERING INDEX core_collaborationrequest_offerers_student_request_idx', sorts=True)
+
+    def test_message_timeline_needs_no_sort(self):
+        self.assertUsesIndex(Message.objects.filter(collaboration=1).order_by('timestamp', 'id'),
+                             'chat_messag_collabo_dcbbb0_idx')
+
+    def test_pending_emails_use_the_partial_index(self):
+        self.assertUsesIndex(OutboxEmail.objects
+                             .filter(status=OutboxEmail.PENDING, next_attempt_at__lte=timezone.now())
+                             .order_by('next_attempt_at', 'id'), 'core_outbox_pending_idx')
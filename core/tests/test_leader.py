@@ -0,0 +1,74 @@
+from datetime import timedelta
+from unittest import mock
+from django.db import OperationalError
+from django.test import TestCase
+from django.utils import timezone
+from core import leader
+from core.leader import LeaderElection
+from core.models import SchedulerLease
+from core.schedule import leader_job, should_start
+
+
+class LeaderElectionTests(TestCase):
+
+    def setUp(self):
+        self.first = LeaderElection('test-lease')
+        self.second = LeaderElection('test-lease')
+
+    def test_only_one_process_is_elected(self):
+        self.assertTrue(self.first.heartbeat())
+        self.assertFalse(self.second.heartbeat())
+        self.assertTrue(self.first.heartbeat())
+
+    def test_standby_takes_over_expired_lease(self):
+        revoked = []
+        self.first.on_revoked = lambda: revoked.append(True)
+        self.first.heartbeat()
+
+        SchedulerLease.objects.filter(name='test-lease').update(
+            expires_at=timezone.now() - timedelta(seconds=1)
+        )
+
+        self.assertTrue(self.second.heartbeat())
+        self.assertFalse(self.first.heartbeat())
+        self.assertEqual(revoked, [True])
+
+    def test_failed_renewal_steps_down(self):
+        revoked = []
+        self.first.on_revoked = lambda: revoked.append(True)
+        self.first.heartbeat()
+
+        with mock.patch.object(self.first, '_try_acquire', side_effect=OperationalError('connection lost')):
+            self.assertFalse(self.first.heartbeat())
+
+        self.assertFalse(self.first.is_leader)
+        self.assertEqual(revoked, [True])
+
+    def test_leader_jobs_stop_when_the_lease_runs_out(self):
+        revoked, runs = [], []
+        self.first.on_revoked = lambda: revoked.append(True)
+        job = leader_job(self.first, lambda: runs.append(True), leader_only=True)
+        self.first.heartbeat()
+        job()
+
+        with mock.patch.object(leader.time, 'monotonic', return_value=self.first.lease_deadline):
+            job()
+
+        self.assertEqual(runs, [True])
+        self.assertEqual(revoked, [True])
+
+    def test_resign_releases_lease(self):
+        self.first.heartbeat()
+        self.first.resign()
+
+        self.assertTrue(self.second.heartbeat())
+
+
+class ShouldStartTests(TestCase):
+
+    def test_not_started_in_management_commands(self):
+        self.assertFalse(should_start(['manage.py', 'migrate']))
+        self.assertFalse(should_start(['manage.py', 'test']))
+
+    def test_not_started_in_tests(self):
+        self.assertFalse(should_start(['manage.py', 'test', 'core']))
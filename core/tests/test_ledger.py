@@ -0,0 +1,84 @@
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import IntegrityError
+from django.test import TestCase
+from rest_framework.test import APIClient
+from rest_framework import status
+from core import ledger
+from core.models import Student, User, CollaborationRequest, TimeEntry
+from core.schedule import check_collaboration_requests
+from io import StringIO
+import datetime
+
+
+class TimeLedgerTests(TestCase):
+
+    def setUp(self):
+        self.student = Student.objects.create(
+            user=User.objects.create_user('student@test.com', 'testpass1234')
+        )
+
+    def balance(self):
+        self.student.refresh_from_db()
+        return self.student.available_minutes
+
+    def test_new_students_get_an_opening_entry(self):
+        entry = TimeEntry.objects.get(student=self.student)
+
+        self.assertEqual(entry.kind, TimeEntry.OPENING)
+        self.assertEqual(entry.minutes, 60)
+
+    def test_debit_updates_balance_and_records_entry(self):
+        ledger.debit(self.student.pk, 45)
+
+        self.assertEqual(self.balance(), 15)
+        self.assertEqual(ledger.reconcile(), [])
+
+    def test_debit_never_overdraws(self):
+        with self.assertRaises(ledger.InsufficientTime):
+            ledger.debit(self.student.pk, 75)
+
+        self.assertEqual(self.balance(), 60)
+        self.assertEqual(TimeEntry.objects.count(), 1)
+
+    def test_negative_balance_is_rejected_by_the_database(self):
+        with self.assertRaises(IntegrityError):
+            Student.objects.filter(pk=self.student.pk).update(available_minutes=-1)
+
+    def test_creating_a_request_debits_through_the_ledger(self):
+        client = APIClient()
+        client.force_authenticate(self.student.user)
+
+        res = client.post('/api/v1/collaboration-requests/', {
+            'title': 'Ayuda en proyecto de matemáticas',
+            'requested_time': 0.5,
+            'deadline': datetime.date.today()
+        })
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(self.balance(), 30)
+        entry = TimeEntry.objects.get(kind=TimeEntry.RESERVE)
+        self.assertEqual(entry.reference, f'core.collaborationrequest:{res.data["id"]}')
+
+    def test_expired_requests_are_refunded_through_the_ledger(self):
+        yesterday = datetime.date.today() - datetime.timedelta(days=1)
+        request = CollaborationRequest.objects.create(title='Ayuda en proyecto de física',
+                                                      requested_minutes=30, deadline=yesterday,
+                                                      applicant=self.student)
+        ledger.debit(self.student.pk, request.requested_minutes, ref=ledger.reference(request))
+
+        check_collaboration_requests()
+
+        self.assertEqual(self.balance(), 60)
+        self.assertTrue(TimeEntry.objects.filter(kind=TimeEntry.REFUND, minutes=30).exists())
+        self.assertEqual(ledger.reconcile(), [])
+
+    def test_reconcile_time_command_reports_and_fixes_drift(self):
+        Student.objects.filter(pk=self.student.pk).update(available_minutes=180)
+
+        with self.assertRaises(CommandError):
+            call_command('reconcile_time', stdout=StringIO())
+        call_command('reconcile_time', '--fix', stdout=StringIO())
+
+        self.assertEqual(self.balance(), 60)
+        self.assertEqual(ledger.reconcile(), [])
@@ -0,0 +1,153 @@
+from base64 import b64decode
+from unittest import mock
+from urllib.parse import parse_qs, urlsplit
+from cryptography.hazmat.backends import default_backend
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import padding, rsa
+from django.core.cache import cache
+from django.core.files.storage import FileSystemStorage
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+from chronus.storage_backends import MediaStorage
+from core import media
+from core.media import MediaURLs, media_urls
+from core.models import Student, User, CollaborationRequest
+import datetime
+import json
+
+
+# Presigning needs no requests, so a local S3 stand-in such as MinIO only
+# has to be reachable for uploads.
+LOCAL_S3 = {'endpoint_url': 'http://localhost:9000', 'access_key': 'test', 'secret_key': 'test',
+            'bucket_name': 'chronus-test', 'region_name': 'us-east-1'}
+
+
+def private_storage():
+    with override_settings(AWS_MEDIA_PRIVATE=True):
+        return MediaStorage(**LOCAL_S3)
+
+
+@override_settings(AWS_QUERYSTRING_EXPIRE=3600, AWS_CLOUDFRONT_KEY_ID=None)
+class S3MediaURLTests(TestCase):
+
+    def setUp(self):
+        self.storage = private_storage()
+        self.urls = MediaURLs(self.storage)
+
+    def test_private_media_is_presigned_against_the_storage_endpoint(self):
+        url = urlsplit(self.urls.url('profile/ana.png'))
+        query = parse_qs(url.query)
+
+        self.assertEqual(f'{url.scheme}://{url.netloc}', LOCAL_S3['endpoint_url'])
+        self.assertEqual(url.path, '/chronus-test/media/profile/ana.png')
+        self.assertIn('X-Amz-Signature', query)
+        self.assertGreaterEqual(int(query['X-Amz-Expires'][0]), 1800)
+        self.assertLessEqual(int(query['X-Amz-Expires'][0]), 3600)
+
+    def test_keys_are_signed_once_per_epoch(self):
+        with mock.patch.object(self.storage, 'url', wraps=self.storage.url) as sign:
+            first = self.urls.urls(['a.png', 'b.png', '', None, 'a.png'])
+            second = self.urls.urls(['b.png', 'c.png'])
+
+        self.assertEqual(set(first), {'a.png', 'b.png'})
+        self.assertEqual(second['b.png'], first['b.png'])
+        self.assertEqual(sorted(call.args[0] for call in sign.call_args_list), ['a.png', 'b.png', 'c.png'])
+
+    def test_urls_are_signed_again_in_the_next_epoch(self):
+        now = 1800 * 1000 + 10
+        with mock.patch.object(self.storage, 'url', wraps=self.storage.url) as sign:
+            with mock.patch.object(media.time, 'time', return_value=now):
+                self.urls.url('a.png')
+                self.urls.url('a.png')
+                self.assertEqual(self.urls.epoch(), 1000)
+            with mock.patch.object(media.time, 'time', return_value=now + 1800):
+                self.urls.url('a.png')
+                self.assertEqual(self.urls.epoch(), 1001)
+
+        self.assertEqual([call.kwargs['expire'] for call in sign.call_args_list], [3590, 3590])
+
+    def test_public_storages_are_not_signed(self):
+        urls = MediaURLs(FileSystemStorage(base_url='/media/'))
+
+        self.assertEqual(urls.url('profile/ana.png'), '/media/profile/ana.png')
+        self.assertEqual(urls.epoch(), 0)
+
+        with override_settings(AWS_MEDIA_PRIVATE=False, AWS_S3_CUSTOM_DOMAIN='cdn.test'):
+            public = MediaURLs(MediaStorage(**LOCAL_S3, custom_domain='cdn.test'))
+        self.assertEqual(public.url('a b.png'), 'https://cdn.test/media/a%20b.png')
+
+
+class CloudFrontMediaURLTests(TestCase):
+
+    def setUp(self):
+        self.key = rsa.generate_private_key(public_exponent=65537, key_size=2048, backend=default_backend())
+        pem = self.key.private_bytes(serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8,
+                                     serialization.NoEncryption()).decode()
+        self.settings = override_settings(AWS_CLOUDFRONT_KEY_ID='K2JCJMDEHXQW5F', AWS_CLOUDFRONT_KEY=pem,
+                                          AWS_CLOUDFRONT_DOMAIN='media.chronus.test', AWS_QUERYSTRING_EXPIRE=3600)
+        self.settings.enable()
+        self.addCleanup(self.settings.disable)
+
+    def decode(self, value):
+        return b64decode(value.replace('-', '+').replace('_', '=').replace('~', '/'))
+
+    def test_one_policy_signs_the_whole_location(self):
+        urls = MediaURLs(private_storage())
+        with mock.patch.object(media, 'cloudfront_signer', wraps=media.cloudfront_signer) as signer:
+            signed = urls.urls(['profile/ana.png', 'profile/bea.png'])
+            urls.url('profile/carl.png')
+
+        self.assertEqual(signer.call_count, 1)
+        ana, bea = urlsplit(signed['profile/ana.png']), urlsplit(signed['profile/bea.png'])
+        self.assertEqual(ana.netloc, 'media.chronus.test')
+        self.assertEqual(ana.path, '/media/profile/ana.png')
+        self.assertEqual(ana.query, bea.query)
+
+        query = parse_qs(ana.query)
+        policy = self.decode(query['Policy'][0])
+        statement = json.loads(policy)['Statement'][0]
+        self.assertEqual(statement['Resource'], 'https://media.chronus.test/media/*')
+        self.assertEqual(query['Key-Pair-Id'], ['K2JCJMDEHXQW5F'])
+        self.key.public_key().verify(self.decode(query['Signature'][0]), policy, padding.PKCS1v15(), hashes.SHA1())
+
+
+@override_settings(AWS_QUERYSTRING_EXPIRE=3600, AWS_CLOUDFRONT_KEY_ID=None)
+class SignedProfileImageApiTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        storage = private_storage()
+        patcher = mock.patch.object(media_urls, 'storage', storage)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(media_urls.reset)
+        media_urls.reset()
+
+        self.student = Student.objects.create(
+            user=User.objects.create_user('student@test.com', 'testpass1234'), profile_image='profile/student.png'
+        )
+        self.collaboration_request = CollaborationRequest.objects.create(
+            title='Ayuda', requested_minutes=60, applicant=self.student,
+            deadline=datetime.date.today() + datetime.timedelta(days=3)
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.student.user)
+        self.sign = mock.patch.object(storage, 'url', wraps=storage.url)
+
+    def test_list_and_retrieve_share_the_signed_url(self):
+        with self.sign as sign:
+            listed = self.client.get('/api/v1/collaboration-requests/').data['results'][0]
+            retrieved = self.client.get(f'/api/v1/collaboration-requests/{self.collaboration_request.id}/').data
+
+        self.assertIn('X-Amz-Signature', listed['applicant']['profile_image'])
+        self.assertEqual(retrieved['applicant']['profile_image'], listed['applicant']['profile_image'])
+        self.assertEqual(sign.call_count, 1)
+
+    def test_cached_responses_expire_with_the_epoch(self):
+        etag = self.client.get('/api/v1/collaboration-requests/')['ETag']
+
+        with mock.patch.object(media_urls, 'epoch', return_value=media_urls.epoch() + 1):
+            res = self.client.get('/api/v1/collaboration-requests/', HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertNotEqual(res['ETag'], etag)
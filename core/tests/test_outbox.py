@@ -0,0 +1,131 @@
+from unittest import mock
+from django.core import mail
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+from core import outbox
+from core.models import Student, User, CollaborationRequest, OutboxEmail
+from io import StringIO
+import datetime
+
+
+class OutboxTests(TestCase):
+
+    def setUp(self):
+        self.applicant = Student.objects.create(
+            user=User.objects.create_user('applicant@test.com', 'testpass1234')
+        )
+        self.collaborator = Student.objects.create(
+            user=User.objects.create_user('collaborator@test.com', 'testpass4321')
+        )
+
+    def enqueue(self, count=1):
+        outbox.enqueue('Asunto', 'Cuerpo', 'chronus@test.com',
+                       [f'student{index}@test.com' for index in range(count)])
+
+    def test_accepting_an_offer_enqueues_the_email(self):
+        collaboration_request = CollaborationRequest.objects.create(
+            title='Ayuda en proyecto de matemáticas',
+            requested_minutes=15,
+            deadline=datetime.date.today(),
+            applicant=self.applicant
+        )
+        collaboration_request.offerers.add(self.collaborator)
+        client = APIClient()
+        client.force_authenticate(self.applicant.user)
+
+        client.post('/api/v1/collaborations/', {
+            'collaborator_id': self.collaborator.pk,
+            'collaboration_request': collaboration_request.id
+        })
+
+        self.assertEqual(len(mail.outbox), 0)
+        email = OutboxEmail.objects.get()
+        self.assertEqual(email.recipient, 'collaborator@test.com')
+        self.assertEqual(email.status, OutboxEmail.PENDING)
+
+    def test_drain_sends_pending_emails_in_batches(self):
+        self.enqueue(3)
+
+        stats = outbox.drain_all(batch_size=2)
+
+        self.assertEqual(stats.sent, 3)
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertFalse(OutboxEmail.objects.exclude(status=OutboxEmail.SENT).exists())
+        self.assertFalse(OutboxEmail.objects.filter(sent_at=None).exists())
+
+    def test_failed_emails_are_retried_with_backoff(self):
+        self.enqueue()
+
+        with mock.patch('django.core.mail.backends.locmem.EmailBackend.send_messages',
+                        side_effect=OSError('connection refused')):
+            stats = outbox.drain()
+
+        email = OutboxEmail.objects.get()
+        self.assertEqual(stats.retried, 1)
+        self.assertEqual(email.status, OutboxEmail.PENDING)
+        self.assertEqual(email.attempts, 1)
+        self.assertIn('connection refused', email.last_error)
+        self.assertGreater(email.next_attempt_at, timezone.now() + datetime.timedelta(seconds=20))
+        self.assertEqual(outbox.drain().sent, 0)
+
+    def test_emails_are_dead_after_max_attempts(self):
+        self.enqueue()
+        OutboxEmail.objects.update(attempts=outbox.MAX_ATTEMPTS - 1)
+
+        with mock.patch('django.core.mail.backends.locmem.EmailBackend.send_messages',
+                        side_effect=OSError('connection refused')):
+            stats = outbox.drain()
+
+        self.assertEqual(stats.dead, 1)
+        self.assertEqual(OutboxEmail.objects.get().status, OutboxEmail.DEAD)
+
+    def test_emails_are_leased_while_they_are_sent(self):
+        self.enqueue()
+        concurrent = []
+
+        def send_messages(messages):
+            concurrent.append(outbox.drain())
+            lease = OutboxEmail.objects.get().next_attempt_at
+            self.assertGreater(lease, timezone.now() + datetime.timedelta(seconds=outbox.SEND_TIMEOUT - 10))
+            return len(messages)
+
+        with mock.patch('django.core.mail.backends.locmem.EmailBackend.send_messages', side_effect=send_messages):
+            self.assertEqual(outbox.drain().sent, 1)
+
+        self.assertEqual(concurrent, [outbox.DrainStats(sent=0, retried=0, dead=0, latency=0)])
+
+    def test_a_crashed_drain_only_resends_what_it_did_not_record(self):
+        self.enqueue(2)
+
+        with mock.patch('django.core.mail.backends.locmem.EmailBackend.send_messages',
+                        side_effect=[1, KeyboardInterrupt]):
+            with self.assertRaises(KeyboardInterrupt):
+                outbox.drain()
+
+        self.assertEqual(OutboxEmail.objects.filter(status=OutboxEmail.SENT).count(), 1)
+        self.assertEqual(outbox.drain().sent, 0)
+
+        OutboxEmail.objects.filter(status=OutboxEmail.PENDING).update(next_attempt_at=timezone.now())
+        self.assertEqual(outbox.drain().sent, 1)
+        self.assertEqual(len(mail.outbox), 1)
+
+    def test_metrics_report_queue_depth(self):
+        self.enqueue(2)
+        OutboxEmail.objects.filter(recipient='student0@test.com').update(status=OutboxEmail.DEAD)
+
+        metrics = outbox.metrics()
+
+        self.assertEqual(metrics['pending'], 1)
+        self.assertEqual(metrics['dead'], 1)
+        self.assertGreaterEqual(metrics['oldest_pending_age'], 0)
+
+    def test_drain_outbox_command(self):
+        self.enqueue()
+        out = StringIO()
+
+        call_command('drain_outbox', stdout=out)
+
+        self.assertIn('sent=1', out.getvalue())
+        self.assertIn('pending=0', out.getvalue())
@@ -0,0 +1,57 @@
+from django.test import TestCase
+from rest_framework.test import APIClient
+from rest_framework import status
+from core.models import Student, User, CollaborationRequest
+import datetime
+
+
+class KeysetPaginationTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user('test@test.com', 'testpass1234')
+        self.student = Student.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+        today = datetime.date.today()
+        for i in range(7):
+            CollaborationRequest.objects.create(
+                title=f'Ayuda {i}', requested_minutes=15,
+                deadline=today + datetime.timedelta(days=i % 3), applicant=self.student
+            )
+        self.expected_ids = list(CollaborationRequest.objects.order_by('deadline', 'id').values_list('id', flat=True))
+
+    def walk(self, url):
+        ids = []
+        pages = 0
+        while url:
+            res = self.client.get(url)
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            ids += [row['id'] for row in res.data['results']]
+            url = res.data['next']
+            pages += 1
+        return ids, pages
+
+    def test_pages_follow_deadline_then_id(self):
+        ids, pages = self.walk('/api/v1/collaboration-requests/?page_size=3')
+
+        self.assertEqual(ids, self.expected_ids)
+        self.assertEqual(pages, 3)
+
+    def test_previous_link_returns_the_previous_page(self):
+        first = self.client.get('/api/v1/collaboration-requests/?page_size=3')
+        second = self.client.get(first.data['next'])
+        previous = self.client.get(second.data['previous'])
+
+        self.assertIsNone(first.data['previous'])
+        self.assertEqual(previous.data['results'], first.data['results'])
+
+    def test_publication_date_ordering(self):
+        ids, _ = self.walk('/api/v1/collaboration-requests/?page_size=2&ordering=publication_date')
+
+        self.assertEqual(ids, sorted(self.expected_ids))
+
+    def test_invalid_cursor(self):
+        res = self.client.get('/api/v1/collaboration-requests/?cursor=not-a-cursor')
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
@@ -0,0 +1,71 @@
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from core.models import Student, User, Competence, CollaborationRequest, Collaboration
+import datetime
+
+
+def create_student(email):
+    user = User.objects.create_user(email, 'testpass1234', first_name='Test', last_name='Student')
+    return Student.objects.create(user=user)
+
+
+class ListQueryCountTests(TestCase):
+
+    def setUp(self):
+        self.student = create_student('student@test.com')
+        self.offerers = [create_student(f'offerer{i}@test.com') for i in range(3)]
+        self.competences = [Competence.objects.create(name=f'Competence {i}') for i in range(2)]
+        self.deadline = datetime.date.today() + datetime.timedelta(days=7)
+
+        self.client = APIClient()
+        self.client.force_authenticate(self.student.user)
+
+    def create_collaboration_requests(self, count):
+        for i in range(count):
+            collaboration_request = CollaborationRequest.objects.create(
+                title=f'Ayuda {i}', requested_minutes=15, deadline=self.deadline, applicant=self.student
+            )
+            collaboration_request.offerers.add(*self.offerers)
+            collaboration_request.competences.add(*self.competences)
+
+    def create_collaborations(self, count):
+        for i in range(count):
+            collaboration = Collaboration.objects.create(
+                title=f'Ayuda {i}', requested_minutes=15, deadline=self.deadline,
+                applicant=self.student, collaborator=self.offerers[0]
+            )
+            collaboration.competences.add(*self.competences)
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as context:
+            res = self.client.get(url)
+        self.assertEqual(res.status_code, 200)
+        return len(context)
+
+    def test_collaboration_request_list_queries_do_not_grow_with_rows(self):
+        self.create_collaboration_requests(2)
+        few = self.count_queries('/api/v1/collaboration-requests/')
+
+        self.create_collaboration_requests(20)
+        many = self.count_queries('/api/v1/collaboration-requests/')
+
+        self.assertEqual(few, many)
+        self.assertEqual(many, 3)
+
+    def test_collaboration_list_queries_do_not_grow_with_rows(self):
+        self.create_collaborations(2)
+        few = self.count_queries('/api/v1/collaborations/')
+
+        self.create_collaborations(20)
+        many = self.count_queries('/api/v1/collaborations/')
+
+        self.assertEqual(few, many)
+        self.assertEqual(many, 2)
+
+    def test_collaboration_retrieve_queries_are_constant(self):
+        self.create_collaborations(1)
+        collaboration = Collaboration.objects.get()
+
+        self.assertEqual(self.count_queries(f'/api/v1/collaborations/{collaboration.id}/'), 3)
@@ -0,0 +1,93 @@
+from django.test import TestCase
+from rest_framework.test import APIClient
+from rest_framework import status
+from core.models import Student, User, CollaborationRequest, Competence, Degree
+from core.ranking import Candidates, Degrees, bitsets, score
+import datetime
+import numpy as np
+
+
+class RankingTests(TestCase):
+
+    def test_score_favours_matching_competences_and_degree(self):
+        candidates = Candidates(
+            student_ids=np.array([1, 2, 3]),
+            competences=bitsets([0, 1, 1, 2], [3, 3, 70, 70], 3, 2),
+            accumulated_rating=np.array([0., 10., 10.]),
+            rating_count=np.array([0., 2., 2.]),
+            available_minutes=np.array([60., 60., 60.]),
+            degrees=Degrees(rows=np.array([0, 2]), names=np.array([5, 5]),
+                            finished=np.array([True, False]), grades=np.array([0, 1]))
+        )
+        request_competences = bitsets([0, 0], [3, 70], 1, 2)[0]
+
+        scores = score(candidates, request_competences, degree=(5, 2))
+
+        self.assertEqual(list(np.argsort(-scores)), [1, 2, 0])
+        self.assertAlmostEqual(scores[1], 0.5 + 0.25 + 0.1)
+        self.assertAlmostEqual(scores[2], 0.25 + 0.25 + 0.15 * 0.5 + 0.1)
+
+
+class CollaborationRequestOfferersTests(TestCase):
+
+    def create_student(self, email, competences=(), accumulated_rating=0, rating_count=0):
+        student = Student.objects.create(
+            user=User.objects.create_user(email, 'testpass1234'),
+            accumulated_rating=accumulated_rating, rating_count=rating_count
+        )
+        for competence in competences:
+            competence.students.add(student)
+        return student
+
+    def setUp(self):
+        self.python = Competence.objects.create(name='Python')
+        self.english = Competence.objects.create(name='Inglés')
+
+        self.applicant = self.create_student('applicant@test.com')
+        Degree.objects.create(name_id=5, higher_grade='2', finished=False, student=self.applicant)
+
+        self.collaboration_request = CollaborationRequest.objects.create(
+            title='Ayuda', requested_minutes=60, applicant=self.applicant,
+            deadline=datetime.date.today() + datetime.timedelta(days=5)
+        )
+        self.collaboration_request.competences.add(self.python, self.english)
+
+        self.nobody = self.create_student('nobody@test.com')
+        self.expert = self.create_student('expert@test.com', [self.python, self.english], 9, 2)
+        self.partial = self.create_student('partial@test.com', [self.python])
+        self.candidate = self.create_student('candidate@test.com', [self.english])
+        self.create_student('unrelated@test.com')
+        for student in (self.nobody, self.expert, self.partial):
+            self.collaboration_request.offerers.add(student)
+
+        self.client = APIClient()
+        self.client.force_authenticate(self.applicant.user)
+        self.url = f'/api/v1/collaboration-requests/{self.collaboration_request.id}/offerers/'
+
+    def ids(self, res):
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return [student['id'] for student in res.data]
+
+    def test_offerers_keep_offer_order_by_default(self):
+        res = self.client.get(self.url)
+
+        self.assertEqual(self.ids(res), [self.nobody.pk, self.expert.pk, self.partial.pk])
+        self.assertTrue(all(student['offered'] for student in res.data))
+
+    def test_offerers_ordered_by_score(self):
+        res = self.client.get(self.url, {'ordering': 'score'})
+
+        self.assertEqual(self.ids(res), [self.expert.pk, self.partial.pk, self.nobody.pk])
+
+    def test_candidates_who_have_not_offered_are_ranked_too(self):
+        res = self.client.get(self.url, {'ordering': 'score', 'candidates': 'true'})
+
+        self.assertEqual(self.ids(res), [self.expert.pk, self.partial.pk, self.candidate.pk, self.nobody.pk])
+        self.assertFalse(res.data[2]['offered'])
+
+    def test_only_the_applicant_can_rank_offerers(self):
+        self.client.force_authenticate(self.expert.user)
+
+        res = self.client.get(self.url)
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
@@ -0,0 +1,107 @@
+from unittest import mock
+from django.test import TestCase, TransactionTestCase
+from rest_framework.test import APIClient
+from rest_framework import status
+from core import ledger
+from core.models import Student, User, CollaborationRequest, Competence
+from core.recommendations import RecommendationIndex, recommendation_index
+import datetime
+
+
+class RecommendedCollaborationRequestsTests(TransactionTestCase):
+
+    def setUp(self):
+        recommendation_index.clear()
+        self.student = Student.objects.create(
+            user=User.objects.create_user('student@test.com', 'testpass1234')
+        )
+        self.applicant = Student.objects.create(
+            user=User.objects.create_user('applicant@test.com', 'testpass4321')
+        )
+        self.python, self.english, self.physics = [
+            Competence.objects.create(name=name) for name in ('Python', 'Inglés', 'Física')
+        ]
+        self.python.students.add(self.student)
+        self.english.students.add(self.student)
+
+        self.client = APIClient()
+        self.client.force_authenticate(self.student.user)
+
+    def create_request(self, competences, days_left=5, applicant=None):
+        collaboration_request = CollaborationRequest.objects.create(
+            title='Ayuda', requested_minutes=60, applicant=applicant or self.applicant,
+            deadline=datetime.date.today() + datetime.timedelta(days=days_left)
+        )
+        for competence in competences:
+            competence.collaboration_requests.add(collaboration_request)
+        return collaboration_request
+
+    def recommended_ids(self):
+        res = self.client.get('/api/v1/collaboration-requests/recommended/')
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return [collaboration_request['id'] for collaboration_request in res.data]
+
+    def test_requests_are_ranked_by_overlap_and_deadline(self):
+        partial = self.create_request([self.python, self.physics], days_left=1)
+        full_later = self.create_request([self.python, self.english], days_left=10)
+        full_sooner = self.create_request([self.english], days_left=2)
+        self.create_request([self.physics])
+        self.create_request([self.python], applicant=self.student)
+        self.create_request([self.python], days_left=-1)
+
+        self.assertEqual(self.recommended_ids(), [full_sooner.id, full_later.id, partial.id])
+
+    def test_index_follows_model_changes(self):
+        first = self.create_request([self.python])
+        self.assertEqual(self.recommended_ids(), [first.id])
+
+        second = self.create_request([self.english])
+        first.delete()
+
+        self.assertEqual(self.recommended_ids(), [second.id])
+
+    def test_requests_rolled_back_are_not_indexed(self):
+        self.recommended_ids()
+        client = APIClient()
+        client.force_authenticate(self.applicant.user)
+
+        # The balance was spent by a concurrent request after validation.
+        with mock.patch.object(ledger, 'debit', side_effect=ledger.InsufficientTime()):
+            res = client.post('/api/v1/collaboration-requests/', {
+                'title': 'Ayuda', 'requested_time': 1, 'competences': [{'name': 'Python'}],
+                'deadline': str(datetime.date.today() + datetime.timedelta(days=5)),
+            }, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(CollaborationRequest.objects.exists())
+        self.assertEqual(len(recommendation_index), 0)
+        self.assertEqual(recommendation_index.recommend(self.student.pk, [self.python.pk]), [])
+
+    def test_signals_do_not_move_past_ids_committed_elsewhere(self):
+        self.recommended_ids()
+        deadline = datetime.date.today() + datetime.timedelta(days=5)
+        CollaborationRequest.objects.create(id=10, title='Ayuda', requested_minutes=60,
+                                            applicant=self.applicant, deadline=deadline)
+        # Created by another process, so no signal reaches this index.
+        CollaborationRequest.objects.bulk_create([CollaborationRequest(id=5, title='Ayuda', requested_minutes=60,
+                                                                       applicant=self.applicant, deadline=deadline)])
+        self.python.collaboration_requests.add(10, 5)
+
+        self.assertEqual(sorted(self.recommended_ids()), [5, 10])
+
+    def test_requests_missing_from_the_database_are_dropped(self):
+        collaboration_request = self.create_request([self.python])
+        self.recommended_ids()
+        recommendation_index.add(collaboration_request.id + 1, self.applicant.pk,
+                                 collaboration_request.deadline, 60, [self.python.pk])
+
+        self.assertEqual(self.recommended_ids(), [collaboration_request.id])
+        self.assertEqual(len(recommendation_index), 1)
+
+    def test_requested_time_preference_breaks_ties(self):
+        index = RecommendationIndex()
+        deadline = datetime.date.today() + datetime.timedelta(days=3)
+        index.build([(1, 9, deadline, 120), (2, 9, deadline, 30)], [(1, 7), (2, 7)])
+
+        self.assertEqual(index.recommend(5, [7], preferred_minutes=30), [2, 1])
+        self.assertEqual(index.recommend(5, [7], preferred_minutes=120), [1, 2])
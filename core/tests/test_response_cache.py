@@ -0,0 +1,145 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from core import ledger
+from core.models import Student, User, Competence, CollaborationRequest, Collaboration, Degree
+import datetime
+
+
+def create_student(email):
+    return Student.objects.create(user=User.objects.create_user(email, 'testpass1234', first_name='Test'))
+
+
+class ResponseCacheTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.student = create_student('student@test.com')
+        self.other = create_student('other@test.com')
+        self.third = create_student('third@test.com')
+        self.competence = Competence.objects.create(name='Matemáticas')
+        self.deadline = datetime.date.today() + datetime.timedelta(days=7)
+
+        self.clients = {}
+        for student in (self.student, self.other, self.third):
+            self.clients[student.pk] = APIClient()
+            self.clients[student.pk].force_authenticate(student.user)
+
+    def get(self, url, student=None, **headers):
+        with CaptureQueriesContext(connection) as context:
+            res = self.clients[(student or self.student).pk].get(url, **headers)
+        return res, len(context)
+
+    def assertCached(self, url, student=None):
+        res, queries = self.get(url, student)
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(queries, 0)
+        return res
+
+    def assertRecomputed(self, url, student=None):
+        res, queries = self.get(url, student)
+        self.assertEqual(res.status_code, 200)
+        self.assertGreater(queries, 0)
+        return res
+
+    def create_collaboration(self, applicant, collaborator):
+        return Collaboration.objects.create(title='Ayuda', requested_minutes=60, deadline=self.deadline,
+                                            applicant=applicant, collaborator=collaborator)
+
+    def test_repeated_reads_are_served_from_the_cache(self):
+        for url in ('/api/v1/collaboration-requests/', '/api/v1/collaborations/', '/api/v1/students/me/'):
+            with self.subTest(url=url):
+                first = self.assertRecomputed(url)
+                second = self.assertCached(url)
+                self.assertEqual(first.data, second.data)
+
+    def test_query_params_are_part_of_the_key(self):
+        self.assertRecomputed('/api/v1/collaboration-requests/')
+
+        self.assertRecomputed('/api/v1/collaboration-requests/?ordering=publication_date')
+
+    def test_matching_etag_gets_not_modified(self):
+        etag = self.assertRecomputed('/api/v1/collaborations/')['ETag']
+
+        res, queries = self.get('/api/v1/collaborations/', HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, 304)
+        self.assertEqual(queries, 0)
+        self.assertEqual(res['ETag'], etag)
+        self.assertIn('private', res['Cache-Control'])
+
+    def test_etag_changes_when_the_response_does(self):
+        etag = self.assertRecomputed('/api/v1/collaborations/')['ETag']
+        self.create_collaboration(self.student, self.other)
+
+        res, _ = self.get('/api/v1/collaborations/', HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertNotEqual(res['ETag'], etag)
+        self.assertEqual(len(res.data['results']), 1)
+
+    def test_collaborations_are_invalidated_only_for_their_participants(self):
+        for student in (self.student, self.other, self.third):
+            self.assertRecomputed('/api/v1/collaborations/', student)
+
+        collaboration = self.create_collaboration(self.student, self.other)
+        self.assertRecomputed('/api/v1/collaborations/', self.student)
+        self.assertRecomputed('/api/v1/collaborations/', self.other)
+        self.assertCached('/api/v1/collaborations/', self.third)
+
+        collaboration.competences.add(self.competence)
+        res = self.assertRecomputed('/api/v1/collaborations/', self.other)
+        self.assertEqual(res.data['results'][0]['competences'], [{'name': 'Matemáticas'}])
+        self.assertCached('/api/v1/collaborations/', self.third)
+
+    def test_collaboration_requests_are_invalidated_by_writes_and_offers(self):
+        self.assertRecomputed('/api/v1/collaboration-requests/')
+        collaboration_request = CollaborationRequest.objects.create(
+            title='Ayuda', requested_minutes=60, deadline=self.deadline, applicant=self.other
+        )
+        self.assertEqual(len(self.assertRecomputed('/api/v1/collaboration-requests/').data['results']), 1)
+
+        collaboration_request.offerers.add(self.student)
+        res = self.assertRecomputed('/api/v1/collaboration-requests/')
+        self.assertEqual(len(res.data['results'][0]['offerers']), 1)
+
+        self.other.user.first_name = 'Renamed'
+        self.other.user.save()
+        res = self.assertRecomputed('/api/v1/collaboration-requests/')
+        self.assertEqual(res.data['results'][0]['applicant']['full_name'], 'Renamed ')
+
+    def test_student_is_invalidated_by_its_degrees_competences_and_balance(self):
+        self.assertRecomputed('/api/v1/students/me/')
+        self.assertRecomputed('/api/v1/students/me/', self.other)
+
+        Degree.objects.create(name_id=1, higher_grade='2', finished=False, student=self.student)
+        self.assertEqual(len(self.assertRecomputed('/api/v1/students/me/').data['degrees']), 1)
+
+        self.competence.students.add(self.student)
+        self.assertEqual(self.assertRecomputed('/api/v1/students/me/').data['competences'], [{'name': 'Matemáticas'}])
+
+        ledger.debit(self.student.pk, 15)
+        self.assertEqual(self.assertRecomputed('/api/v1/students/me/').data['available_time'], '0.75')
+
+        self.assertCached('/api/v1/students/me/', self.other)
+
+    def test_competence_renames_reach_the_students_who_have_it(self):
+        self.competence.students.add(self.student)
+        self.assertRecomputed('/api/v1/students/me/')
+        self.assertRecomputed('/api/v1/students/me/', self.other)
+
+        self.competence.name = 'Álgebra'
+        self.competence.save()
+
+        self.assertEqual(self.assertRecomputed('/api/v1/students/me/').data['competences'], [{'name': 'Álgebra'}])
+        self.assertCached('/api/v1/students/me/', self.other)
+
+    def test_errors_are_not_cached(self):
+        res, _ = self.get('/api/v1/collaboration-requests/?min_requested_time=x')
+        self.assertEqual(res.status_code, 400)
+
+        res, _ = self.get('/api/v1/collaboration-requests/?min_requested_time=x')
+        self.assertEqual(res.status_code, 400)
+        self.assertNotIn('ETag', res)
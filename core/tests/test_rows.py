@@ -0,0 +1,125 @@
+from collections import OrderedDict
+from decimal import Decimal
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Prefetch
+from django.test import RequestFactory, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.utils.translation import gettext_lazy
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+from core import rows
+from core.models import Student, User, Competence, CollaborationRequest, Collaboration
+from core.renderers import FastJSONRenderer
+from core.serializers import CollaborationRequestSerializer, CollaborationListSerializer
+import datetime
+import uuid
+
+
+class FastPathParityTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.request = RequestFactory().get('/api/v1/collaboration-requests/')
+        self.students = [
+            self.create_student('ana@test.com', 'Ána', 'Nuñez "la jefa"', '', 0, 0),
+            self.create_student('bea@test.com', 'Bea ', 'Line\tBreak\x01', 'profile/bea.png', 9, 2),
+            self.create_student('carl@test.com', '山田', '太郎', 'profile/carl.jpg', 13, 3),
+        ]
+        competences = [Competence.objects.create(name=name) for name in ('Zoología', 'Álgebra', 'C++ & "más"')]
+        deadline = datetime.date.today() + datetime.timedelta(days=3)
+
+        for i, (minutes, applicant) in enumerate([(15, 0), (50, 1), (90, 2), (600, 0)]):
+            collaboration_request = CollaborationRequest.objects.create(
+                title=f'Ayuda {i}  ', description='Línea 1\nLínea 2' * i, requested_minutes=minutes,
+                deadline=deadline + datetime.timedelta(days=i), applicant=self.students[applicant]
+            )
+            collaboration_request.competences.add(*reversed(competences[:i]))
+            collaboration_request.offerers.add(*[s for s in reversed(self.students) if s != self.students[applicant]][:i])
+
+            collaboration = Collaboration.objects.create(
+                title=f'Colaboración {i}', description='\x00' * i, requested_minutes=minutes, deadline=deadline,
+                applicant=self.students[applicant], collaborator=self.students[(applicant + 1) % 3]
+            )
+            collaboration.competences.add(*competences[i % 3:])
+
+    def create_student(self, email, first_name, last_name, image, accumulated_rating, rating_count):
+        user = User.objects.create_user(email, 'testpass1234', first_name=first_name, last_name=last_name)
+        return Student.objects.create(user=user, profile_image=image,
+                                      accumulated_rating=accumulated_rating, rating_count=rating_count)
+
+    def assertSameBytes(self, drf, fast):
+        self.assertEqual(JSONRenderer().render(drf), FastJSONRenderer().render(fast))
+
+    def test_collaboration_requests_match_the_serializer(self):
+        queryset = CollaborationRequest.objects.select_related('applicant__user').prefetch_related(
+            Prefetch('competences', queryset=Competence.objects.order_by('id')),
+            Prefetch('offerers', queryset=Student.objects.select_related('user').order_by('pk')),
+        ).order_by('deadline', 'id')
+
+        with CaptureQueriesContext(connection) as drf_queries:
+            drf = CollaborationRequestSerializer(queryset, many=True, context={'request': self.request}).data
+        with CaptureQueriesContext(connection) as fast_queries:
+            fast = rows.collaboration_requests(list(rows.values(queryset, rows.COLLABORATION_REQUEST_FIELDS)),
+                                               self.request)
+
+        self.assertSameBytes(drf, fast)
+        self.assertEqual(len(fast_queries), len(drf_queries))
+
+    def test_collaborations_match_the_serializer(self):
+        queryset = Collaboration.objects.prefetch_related(
+            Prefetch('competences', queryset=Competence.objects.order_by('id'))
+        ).order_by('deadline', 'id')
+
+        with CaptureQueriesContext(connection) as drf_queries:
+            drf = CollaborationListSerializer(queryset, many=True).data
+        with CaptureQueriesContext(connection) as fast_queries:
+            fast = rows.collaborations(list(rows.values(queryset, rows.COLLABORATION_FIELDS)))
+
+        self.assertSameBytes(drf, fast)
+        self.assertEqual(len(fast_queries), len(drf_queries))
+
+    def test_empty_pages_need_no_lookup_queries(self):
+        with self.assertNumQueries(0):
+            self.assertEqual(rows.collaboration_requests([]), [])
+            self.assertEqual(rows.collaborations([]), [])
+
+    def test_list_endpoints_serve_the_serializer_output(self):
+        client = APIClient()
+        client.force_authenticate(self.students[0].user)
+        res = client.get('/api/v1/collaboration-requests/')
+        expected = CollaborationRequestSerializer(
+            CollaborationRequest.objects.order_by('deadline', 'id'), many=True, context={'request': res.wsgi_request}
+        ).data
+
+        self.assertEqual(res.content, JSONRenderer().render(OrderedDict([
+            ('next', None), ('previous', None), ('results', expected)
+        ])))
+
+
+class FastJSONRendererTests(TestCase):
+
+    def test_output_matches_the_stdlib_renderer(self):
+        data = OrderedDict([
+            ('text', 'ñ \u2028 \u2029 "quoted" \\ \x00\x1f\x7f \n\t 😀'),
+            ('numbers', [0, -1, 2 ** 62, 4.5, 0.1, 1e15, True, None]),
+            ('decimal', Decimal('1.25')),
+            ('datetime', datetime.datetime(2020, 1, 2, 3, 4, 5, 123456, tzinfo=timezone.utc)),
+            ('date', datetime.date(2020, 1, 2)),
+            ('uuid', uuid.UUID(int=1)),
+            ('lazy', gettext_lazy('Invalid cursor')),
+            ('keys', {1: 'one', 'two': 2}),
+            ('tuple', (1, 2)),
+        ])
+
+        self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+
+    def test_indented_output_uses_the_stdlib_renderer(self):
+        data = {'a': [1, 2]}
+
+        self.assertEqual(FastJSONRenderer().render(data, 'application/json; indent=2'),
+                         JSONRenderer().render(data, 'application/json; indent=2'))
+
+    def test_unsupported_values_fall_back_to_the_stdlib_renderer(self):
+        self.assertEqual(FastJSONRenderer().render({'big': 2 ** 70}), JSONRenderer().render({'big': 2 ** 70}))
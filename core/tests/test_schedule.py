@@ -0,0 +1,110 @@
+from django.test import TestCase
+from core.expiry import ExpiryEngine, ExpiryQueue, due_at
+from core.models import Student, User, Collaboration, CollaborationRequest
+from core.schedule import REFUNDED_STUDENT, check_collaborations, check_collaboration_requests, expire
+import datetime
+
+
+class CheckCollaborationsTests(TestCase):
+
+    def setUp(self):
+        self.applicant = Student.objects.create(
+            user=User.objects.create_user('applicant@test.com', 'testpass1234')
+        )
+        self.collaborator = Student.objects.create(
+            user=User.objects.create_user('collaborator@test.com', 'testpass4321')
+        )
+
+    def create_collaboration(self, requested_minutes, deadline):
+        return Collaboration.objects.create(
+            title='Ayuda en proyecto de inglés',
+            requested_minutes=requested_minutes,
+            deadline=deadline,
+            applicant=self.applicant,
+            collaborator=self.collaborator
+        )
+
+    def test_expired_collaborations_are_swept_and_refunded(self):
+        yesterday = datetime.date.today() - datetime.timedelta(days=1)
+        self.create_collaboration(15, yesterday)
+        self.create_collaboration(90, yesterday)
+
+        stats = check_collaborations(batch_size=1)
+
+        self.collaborator.refresh_from_db()
+        self.assertEqual(stats.swept, 2)
+        self.assertEqual(self.collaborator.available_minutes, 165)
+        self.assertFalse(Collaboration.objects.exists())
+
+    def test_live_collaborations_are_kept(self):
+        collaboration = self.create_collaboration(30, datetime.date.today())
+
+        stats = check_collaborations()
+
+        self.collaborator.refresh_from_db()
+        self.assertEqual(stats.swept, 0)
+        self.assertEqual(self.collaborator.available_minutes, 60)
+        self.assertTrue(Collaboration.objects.filter(id=collaboration.id).exists())
+
+    def test_expired_collaboration_requests_are_refunded_to_applicant(self):
+        yesterday = datetime.date.today() - datetime.timedelta(days=1)
+        CollaborationRequest.objects.create(title='Ayuda en proyecto de física',
+                                            requested_minutes=30, deadline=yesterday, applicant=self.applicant)
+
+        stats = check_collaboration_requests()
+
+        self.applicant.refresh_from_db()
+        self.assertEqual(stats.swept, 1)
+        self.assertEqual(self.applicant.available_minutes, 90)
+
+    def test_resync_expires_rows_committed_below_the_last_seen_id(self):
+        engine = ExpiryEngine(REFUNDED_STUDENT, expire)
+        engine._last_seen = {model: 0 for model in engine.models}
+        today = datetime.date.today()
+        CollaborationRequest.objects.create(id=10, title='Ayuda en proyecto de física',
+                                            requested_minutes=15, deadline=today, applicant=self.applicant)
+        engine.resync()
+        self.assertEqual(engine._last_seen[CollaborationRequest], 10)
+
+        # Committed by another process after id 10 was seen.
+        CollaborationRequest.objects.create(id=5, title='Ayuda en proyecto de química', requested_minutes=30,
+                                            deadline=today - datetime.timedelta(days=1), applicant=self.applicant)
+        engine.resync()
+
+        self.applicant.refresh_from_db()
+        self.assertEqual(list(CollaborationRequest.objects.values_list('id', flat=True)), [10])
+        self.assertEqual(self.applicant.available_minutes, 90)
+
+
+class ExpiryQueueTests(TestCase):
+
+    def setUp(self):
+        self.queue = ExpiryQueue()
+        self.today = datetime.date.today()
+
+    def test_due_at_is_the_end_of_the_deadline_day(self):
+        self.assertEqual(due_at(self.today), datetime.datetime.combine(self.today + datetime.timedelta(days=1), datetime.time()))
+
+    def test_pop_due_returns_only_due_keys_in_order(self):
+        now = datetime.datetime.now()
+        self.queue.schedule('late', now - datetime.timedelta(minutes=1))
+        self.queue.schedule('early', now - datetime.timedelta(hours=1))
+        self.queue.schedule('future', now + datetime.timedelta(hours=1))
+
+        self.assertEqual(self.queue.pop_due(now), ['early', 'late'])
+        self.assertEqual(len(self.queue), 1)
+
+    def test_rescheduled_and_cancelled_keys_are_skipped(self):
+        now = datetime.datetime.now()
+        self.queue.schedule('moved', now - datetime.timedelta(minutes=1))
+        self.queue.schedule('moved', now + datetime.timedelta(days=1))
+        self.queue.schedule('cancelled', now - datetime.timedelta(minutes=1))
+        self.queue.cancel('cancelled')
+
+        self.assertEqual(self.queue.pop_due(now), [])
+        self.assertEqual(self.queue.pop_due(now + datetime.timedelta(days=2)), ['moved'])
+
+    def test_wait_due_returns_immediately_for_overdue_keys(self):
+        self.queue.schedule('overdue', datetime.datetime.now() - datetime.timedelta(seconds=1))
+
+        self.assertEqual(self.queue.wait_due(timeout=5), ['overdue'])
@@ -0,0 +1,70 @@
+from django.test import TestCase
+from rest_framework.test import APIClient
+from core.models import Student, User, CollaborationRequest
+from core.search import rebuild
+import datetime
+
+
+class CollaborationRequestSearchTests(TestCase):
+
+    def setUp(self):
+        self.student = Student.objects.create(
+            user=User.objects.create_user('student@test.com', 'testpass1234')
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.student.user)
+
+        self.title_match = self.create('Ayuda con matemáticas', 'Cálculo integral para el parcial')
+        self.english = self.create('Clases de inglés', 'Práctica de conversación')
+        self.description_match = self.create('Proyecto final', 'Necesito ayuda con matemáticas discretas')
+
+    def create(self, title, description):
+        return CollaborationRequest.objects.create(
+            title=title, description=description, requested_minutes=60, applicant=self.student,
+            deadline=datetime.date.today() + datetime.timedelta(days=3)
+        )
+
+    def search(self, q, **params):
+        res = self.client.get('/api/v1/collaboration-requests/', {'q': q, **params})
+        return res, [collaboration_request['id'] for collaboration_request in res.data['results']]
+
+    def test_results_are_ranked_by_relevance(self):
+        _, ids = self.search('matematicas')
+
+        self.assertEqual(ids, [self.title_match.id, self.description_match.id])
+
+    def test_every_word_must_match_and_the_last_is_a_prefix(self):
+        _, ids = self.search('ingles conver')
+
+        self.assertEqual(ids, [self.english.id])
+
+    def test_search_pages_are_keyset_paginated(self):
+        res, first = self.search('matemáticas', page_size=1)
+        second = self.client.get(res.data['next'])
+
+        self.assertEqual(first, [self.title_match.id])
+        self.assertEqual([r['id'] for r in second.data['results']], [self.description_match.id])
+        self.assertIsNone(second.data['next'])
+
+    def test_index_follows_updates_and_deletes(self):
+        self.english.title = 'Clases de francés'
+        self.english.save()
+        self.title_match.delete()
+
+        self.assertEqual(self.search('frances')[1], [self.english.id])
+        self.assertEqual(self.search('ingles')[1], [])
+        self.assertEqual(self.search('matematicas')[1], [self.description_match.id])
+
+    def test_blank_query_matches_nothing(self):
+        self.assertEqual(self.search('  ')[1], [])
+
+    def test_rebuild_indexes_bulk_created_rows(self):
+        CollaborationRequest.objects.bulk_create([CollaborationRequest(
+            title='Repaso de física', requested_minutes=30, applicant=self.student,
+            deadline=datetime.date.today()
+        )])
+        self.assertEqual(self.search('fisica')[1], [])
+
+        rebuild()
+
+        self.assertEqual(len(self.search('fisica')[1]), 1)
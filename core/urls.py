@@ -15,13 +15,16 @@ app_name = 'core'
 router = DefaultRouter()
 router.register(r'collaboration-requests', views.CollaborationRequestViewSet, basename='collaboration-requests')
 router.register(r'collaborations', views.CollaborationViewSet, basename='collaborations')
+router.register(r'students/me/profile-image', views.ProfileImageUploadViewSet, basename='profile-image')
 
 urlpatterns = [
     path('', include(router.urls)),
     path('students/', views.CreateStudentView.as_view(), name='create-student'),
     path('students/me/', views.RetrieveLoggedStudentView.as_view({'get': 'retrieve'})),
     path('collaboration-requests/<int:id>/offer/', views.CollaborationRequestOfferView.as_view(), name='offer-collaboration-request'),
+    path('uploads/<str:token>/', views.UploadTargetView.as_view(), name='upload-target'),
     path('token/', obtain_auth_token),
     path('logout/', views.Logout.as_view()),
-    path('competences/', views.ListCompetencesView.as_view())
+    path('competences/', views.ListCompetencesView.as_view()),
+    path('degrees/', views.ListDegreesView.as_view(), name='degrees')
 ]
\ No newline at end of file
@@ -1,28 +1,118 @@
 from django.contrib.auth import get_user_model
-from django.db.models import Q
+from django.core import signing
+from django.db.models import Prefetch
+from django.utils.cache import patch_cache_control
+from django.utils.http import parse_etags
 from django.shortcuts import get_object_or_404
 from rest_framework import generics, mixins, viewsets, status
+from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound, ValidationError
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from core.models import CollaborationRequest, Collaboration, Student, Competence
+from core.models import CollaborationRequest, Collaboration, Student, Competence, ImageUpload
 from core.serializers import (StudentSerializer, CollaborationRequestSerializer, 
 CollaborationRequestOfferSerializer, CollaborationListSerializer, 
-CollaborationRetrieveSerializer, CollaborationCreateSerializer, CompetenceSerializer)
+CollaborationRetrieveSerializer, CollaborationCreateSerializer, CompetenceSerializer,
+RankedStudentSerializer, CollaborationRequestFilterSerializer, ImageUploadSerializer)
 from core.exceptions import ResourcePermissionException
+from core.fieldsets import get_fieldset
+from core.pagination import CollaborationRequestPagination, CollaborationPagination
+from core.fields import HoursField
+from core.filters import filter_collaboration_requests, with_competences, competence_facets
+from core.recommendations import PREFERRED_MINUTES, recommendation_index
+from core.ranking import rank_students
+from core.response_cache import COLLABORATION_REQUESTS, COLLABORATIONS, STUDENT, cache_response
+from core.search import search
+from core import degrees, images, rows
 from datetime import date
 
 
+class SparseFieldsetViewMixin:
+    """
+    Parses ?fields= and ?expand= for the view's serializer and hands the
+    Fieldset to it, so that get_queryset can also leave out what is not
+    rendered.
+    """
+
+    def get_fieldset(self):
+        if not hasattr(self, '_fieldset'):
+            self._fieldset = get_fieldset(self.request, self.get_serializer_class())
+        return self._fieldset
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['fieldset'] = self.get_fieldset()
+        return context
+
+
 class CreateStudentView(generics.CreateAPIView):
     serializer_class = StudentSerializer
     permission_classes = []
 
 
-class RetrieveLoggedStudentView(viewsets.ModelViewSet):
-    queryset = Student.objects.all()
+class RetrieveLoggedStudentView(SparseFieldsetViewMixin, viewsets.ModelViewSet):
     serializer_class = StudentSerializer
 
+    def get_queryset(self):
+        fieldset = self.get_fieldset()
+        queryset = Student.objects.all()
+        if fieldset.includes('user'):
+            queryset = queryset.select_related('user')
+        return queryset.prefetch_related(*[name for name in ('degrees', 'competences') if fieldset.includes(name)])
+
     def get_object(self):
-        return self.request.user.student
+        return self.get_queryset().get(pk=self.request.user.pk)
+
+    @cache_response(STUDENT)
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+
+
+class ProfileImageUploadViewSet(mixins.RetrieveModelMixin, viewsets.GenericViewSet):
+    """
+    Creating an upload returns where to PUT the image. Completing it, once
+    the image is there, queues it to replace the profile image; its
+    status tells when that is done.
+    """
+    serializer_class = ImageUploadSerializer
+
+    def get_queryset(self):
+        return ImageUpload.objects.filter(student=self.request.user.student)
+
+    def create(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        upload = images.start_upload(request.user.student, serializer.validated_data['content_type'])
+        data = self.get_serializer(upload).data
+        data['upload'] = images.presigned_put(upload, request)
+        return Response(data, status=status.HTTP_201_CREATED)
+
+    @action(detail=True, methods=['post'])
+    def complete(self, request, pk=None):
+        upload = self.get_object()
+        images.complete(upload)
+        return Response(self.get_serializer(upload).data, status=status.HTTP_202_ACCEPTED)
+
+
+class UploadTargetView(APIView):
+    """
+    Where images are PUT for storages that cannot presign uploads. The
+    signed token in the URL is the only credential.
+    """
+    authentication_classes = []
+    permission_classes = []
+
+    def put(self, request, token):
+        length = int(request.META.get('CONTENT_LENGTH') or 0)
+        if not 0 < length <= images.MAX_UPLOAD_SIZE:
+            raise ValidationError(f'The image must have between 1 and {images.MAX_UPLOAD_SIZE} bytes')
+
+        try:
+            images.receive(token, request.stream)
+        except (signing.BadSignature, ImageUpload.DoesNotExist):
+            raise NotFound()
+        return Response(status=status.HTTP_204_NO_CONTENT)
 
 
 class Logout(APIView):
@@ -31,38 +121,148 @@ class Logout(APIView):
         return Response(status=status.HTTP_200_OK)
 
 
-class CollaborationRequestViewSet(mixins.CreateModelMixin,
+class CollaborationRequestViewSet(SparseFieldsetViewMixin,
+                                  mixins.CreateModelMixin,
                                   mixins.ListModelMixin,
                                   mixins.RetrieveModelMixin,
                                   viewsets.GenericViewSet):
     serializer_class = CollaborationRequestSerializer
+    pagination_class = CollaborationRequestPagination
     lookup_field = 'id'
 
     def get_queryset(self):
+        fieldset = self.get_fieldset()
+        # The expiry engine deletes expired rows, but only on the leader and
+        # not right at midnight, so they are filtered out here too.
         queryset = CollaborationRequest.objects.filter(deadline__gte=date.today())
+        if fieldset.expands('applicant'):
+            queryset = queryset.select_related('applicant__user')
+        if fieldset.includes('competences'):
+            queryset = queryset.prefetch_related(Prefetch('competences', queryset=Competence.objects.order_by('id')))
+        if fieldset.includes('offerers'):
+            offerers = Student.objects.order_by('pk')
+            if fieldset.expands('offerers'):
+                offerers = offerers.select_related('user')
+            queryset = queryset.prefetch_related(Prefetch('offerers', queryset=offerers))
 
         student = self.request.user.student
         
         applicant_id = self.request.query_params.get('applicant_id', None)
         if applicant_id is not None:
             if int(applicant_id) == student.user.id:
-                queryset = queryset.filter(applicant=applicant_id, deadline__gte=date.today())
+                queryset = queryset.filter(applicant=applicant_id)
             else:
                 raise ResourcePermissionException()
         else:
             offerer_id = self.request.query_params.get('offerer_id', None)
             if offerer_id is not None:
                 if int(offerer_id) == student.user.id:
-                    queryset = queryset.filter(offerers=offerer_id, deadline__gte=date.today())
+                    queryset = queryset.filter(offerers=offerer_id)
                 else: 
                     raise ResourcePermissionException()
+
+        q = self.request.query_params.get('q', None)
+        if q is not None and self.action == 'list':
+            queryset = search(queryset, q)
         return queryset
 
+    @cache_response(COLLABORATION_REQUESTS, shared=True)
+    def list(self, request, *args, **kwargs):
+        """
+        Filtered with ?competence= (repeatable, any of them),
+        ?min_requested_time=, ?max_requested_time=, ?deadline_after= and
+        ?deadline_before=. ?facets=competences adds how many of the
+        requests matching every other filter ask for each competence.
+        ?fields= and ?expand= pick what each request carries.
+        """
+        serializer = CollaborationRequestFilterSerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        filters = serializer.validated_data
+
+        fieldset = self.get_fieldset()
+        queryset = filter_collaboration_requests(self.get_queryset(), filters)
+        page = self.paginate_queryset(rows.values(with_competences(queryset, filters.get('competence')),
+                                                  rows.collaboration_request_fields(fieldset)))
+        response = self.get_paginated_response(rows.collaboration_requests(page, request, fieldset))
+        if filters.get('facets') == 'competences':
+            response.data['facets'] = {'competences': competence_facets(queryset)}
+        return response
+
     def retrieve(self, request, *args, **kwargs):
         collaboration_request = get_object_or_404(CollaborationRequest, id=kwargs['id'])
         if collaboration_request.deadline < date.today():
             raise ResourcePermissionException('This collaboration request has expired')
         return super().retrieve(self, request, *args, **kwargs)
+
+    @action(detail=False)
+    def recommended(self, request):
+        student = request.user.student
+        try:
+            limit = min(max(int(request.query_params.get('limit', 20)), 1), 100)
+        except ValueError:
+            raise ValidationError({'limit': 'A valid integer is required.'})
+
+        preferred_minutes = PREFERRED_MINUTES
+        if 'requested_time' in request.query_params:
+            preferred_minutes = HoursField().run_validation(request.query_params['requested_time'])
+
+        recommendation_index.sync()
+        competences = list(student.competences.values_list('id', flat=True))
+        ids = recommendation_index.recommend(student.pk, competences, preferred_minutes, limit)
+
+        found = self.get_queryset().in_bulk(ids)
+        for stale_id in set(ids) - found.keys():
+            recommendation_index.remove(stale_id)
+
+        serializer = self.get_serializer([found[id] for id in ids if id in found], many=True)
+        return Response(serializer.data)
+
+    @action(detail=True)
+    def offerers(self, request, id=None):
+        """
+        The request's offerers in the order they offered, or best first
+        with ?ordering=score. ?candidates=true adds the students with a
+        requested competence who have not offered yet.
+        """
+        collaboration_request = get_object_or_404(CollaborationRequest, id=id)
+        if collaboration_request.applicant_id != request.user.student.pk:
+            raise ResourcePermissionException('The collaboration request is not yours')
+
+        ordering = request.query_params.get('ordering')
+        if ordering not in (None, 'score'):
+            raise ValidationError({'ordering': 'Valid orderings are: score'})
+        try:
+            limit = min(max(int(request.query_params.get('limit', 50)), 1), 200)
+        except ValueError:
+            raise ValidationError({'limit': 'A valid integer is required.'})
+
+        offerer_ids = list(CollaborationRequest.offerers.through.objects
+                           .filter(collaborationrequest=collaboration_request)
+                           .order_by('id')
+                           .values_list('student_id', flat=True))
+        student_ids = list(offerer_ids)
+        if request.query_params.get('candidates') == 'true':
+            student_ids += list(Student.objects
+                                .filter(competences__collaboration_requests=collaboration_request)
+                                .exclude(pk__in=offerer_ids + [collaboration_request.applicant_id])
+                                .order_by('pk')
+                                .values_list('pk', flat=True)
+                                .distinct())
+
+        scores = rank_students(collaboration_request, student_ids)
+        if ordering == 'score':
+            student_ids.sort(key=lambda student_id: -scores[student_id])
+        student_ids = student_ids[:limit]
+
+        students = Student.objects.select_related('user').in_bulk(student_ids)
+        offered = set(offerer_ids)
+        ranked = []
+        for student_id in student_ids:
+            student = students[student_id]
+            student.offered = student_id in offered
+            student.score = scores[student_id]
+            ranked.append(student)
+        return Response(RankedStudentSerializer(ranked, many=True, context={'request': request}).data)
     
 
 class CollaborationRequestOfferView(generics.UpdateAPIView):
@@ -71,16 +271,32 @@ class CollaborationRequestOfferView(generics.UpdateAPIView):
     lookup_field = 'id'
 
 
-class CollaborationViewSet(mixins.CreateModelMixin,
+class CollaborationViewSet(SparseFieldsetViewMixin,
+                           mixins.CreateModelMixin,
                            mixins.ListModelMixin,
                            mixins.RetrieveModelMixin,
                            viewsets.GenericViewSet):
+    pagination_class = CollaborationPagination
     lookup_field = 'id'
 
     def get_queryset(self):
         student = self.request.user.student
 
-        return Collaboration.objects.filter(Q(applicant=student) | Q(collaborator=student)).filter(deadline__gte=date.today())
+        fieldset = self.get_fieldset()
+        queryset = Collaboration.objects.of_student(student).filter(deadline__gte=date.today())
+        related = [f'{name}__user' for name in ('applicant', 'collaborator') if fieldset.expands(name)]
+        # With no fields select_related() would follow every foreign key.
+        if self.action == 'retrieve' and related:
+            queryset = queryset.select_related(*related)
+        if fieldset.includes('competences'):
+            queryset = queryset.prefetch_related(Prefetch('competences', queryset=Competence.objects.order_by('id')))
+        return queryset
+
+    @cache_response(COLLABORATIONS)
+    def list(self, request, *args, **kwargs):
+        fieldset = self.get_fieldset()
+        page = self.paginate_queryset(rows.values(self.get_queryset(), rows.collaboration_fields(fieldset)))
+        return self.get_paginated_response(rows.collaborations(page, fieldset))
     
     def get_serializer_class(self):
         if self.action == 'list':
@@ -93,8 +309,8 @@ class CollaborationViewSet(mixins.CreateModelMixin,
     def retrieve(self, request, *args, **kwargs):
         student = request.user.student
         collaboration = get_object_or_404(Collaboration, id=kwargs['id'])
-        if not student == collaboration.applicant and not student == collaboration.collaborator:
-            raise ResourcePermissionExceptionç
+        if student.pk not in (collaboration.applicant_id, collaboration.collaborator_id):
+            raise ResourcePermissionException
         if collaboration.deadline < date.today():
             raise ResourcePermissionException('This collaboration has expired')
         return super().retrieve(self, request, *args, **kwargs)
@@ -103,4 +319,24 @@ class CollaborationViewSet(mixins.CreateModelMixin,
 class ListCompetencesView(generics.ListAPIView):
     serializer_class = CompetenceSerializer
     queryset = Competence.objects.all()
-    permission_classes = []
\ No newline at end of file
+    permission_classes = []
+
+class ListDegreesView(APIView):
+    """
+    The degree catalog, served from memory. It carries an ETag of its
+    content, so clients revalidating it get a 304 until it changes.
+    """
+    permission_classes = []
+
+    def get(self, request):
+        catalog = degrees.catalog.get()
+        etag = f'W/"{catalog.etag}-{request.accepted_renderer.format}"'
+
+        if set(parse_etags(request.META.get('HTTP_IF_NONE_MATCH', ''))) & {etag, '*'}:
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = Response([{'id': str(code), 'name': name} for code, name in catalog.entries])
+
+        response['ETag'] = etag
+        patch_cache_control(response, public=True, max_age=degrees.MAX_AGE)
+        return response
@@ -0,0 +1,40 @@
+import logging
+import threading
+from django.db import close_old_connections
+
+
+class Worker:
+    """
+    Background thread that calls drain() whenever a transaction that queued
+    work commits and kicks it, and every `poll_interval` seconds to pick up
+    retries.
+    """
+
+    name = 'worker'
+
+    def __init__(self, poll_interval):
+        self.poll_interval = poll_interval
+        self._wakeup = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def drain(self):
+        raise NotImplementedError
+
+    def kick(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._thread.start()
+        self._wakeup.set()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.poll_interval)
+            self._wakeup.clear()
+            try:
+                self.drain()
+            except Exception:
+                logging.getLogger(type(self).__module__).exception('%s drain failed', self.name)
+            finally:
+                close_old_connections()